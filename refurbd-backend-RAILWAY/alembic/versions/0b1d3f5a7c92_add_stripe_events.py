@@ -0,0 +1,47 @@
+"""add stripe_events
+
+Revision ID: 0b1d3f5a7c92
+Revises: f2a4c6e8b0d3
+Create Date: 2026-10-19 19:04:51.338172
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b1d3f5a7c92'
+down_revision = 'f2a4c6e8b0d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stripe_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.String(length=255), nullable=False),
+        sa.Column('type', sa.String(length=100), nullable=False),
+        sa.Column('customer_id', sa.String(length=255), nullable=True),
+        sa.Column('stripe_created', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'PROCESSED', 'FAILED', name='stripeeventstatus'), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('event_id'),
+    )
+    op.create_index(op.f('ix_stripe_events_id'), 'stripe_events', ['id'], unique=False)
+    op.create_index('ix_stripe_events_status_next_attempt_at', 'stripe_events', ['status', 'next_attempt_at'], unique=False)
+    op.create_index('ix_stripe_events_customer_id_created', 'stripe_events', ['customer_id', 'stripe_created'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stripe_events_customer_id_created', table_name='stripe_events')
+    op.drop_index('ix_stripe_events_status_next_attempt_at', table_name='stripe_events')
+    op.drop_index(op.f('ix_stripe_events_id'), table_name='stripe_events')
+    op.drop_table('stripe_events')
+    sa.Enum(name='stripeeventstatus').drop(op.get_bind(), checkfirst=True)
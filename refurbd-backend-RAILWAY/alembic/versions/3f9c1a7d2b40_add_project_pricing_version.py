@@ -0,0 +1,24 @@
+"""add project pricing_version
+
+Revision ID: 3f9c1a7d2b40
+Revises: 
+Create Date: 2026-10-19 09:12:44.318502
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c1a7d2b40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('pricing_version', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'pricing_version')
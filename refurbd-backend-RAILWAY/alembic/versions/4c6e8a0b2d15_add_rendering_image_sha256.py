@@ -0,0 +1,24 @@
+"""add renderings.image_sha256
+
+Revision ID: 4c6e8a0b2d15
+Revises: 0b1d3f5a7c92
+Create Date: 2026-10-19 19:47:09.518263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c6e8a0b2d15'
+down_revision = '0b1d3f5a7c92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('renderings', sa.Column('image_sha256', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('renderings', 'image_sha256')
@@ -0,0 +1,30 @@
+"""add users.stripe_customer_id, stripe_subscription_id and subscription_ends_at
+
+Revision ID: 4e8a2c6f0b19
+Revises: 9c3e5a7b1d46
+Create Date: 2026-10-20 10:41:08.276113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e8a2c6f0b19'
+down_revision = '9c3e5a7b1d46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('stripe_customer_id', sa.String(), nullable=True))
+    op.add_column('users', sa.Column('stripe_subscription_id', sa.String(), nullable=True))
+    op.add_column('users', sa.Column('subscription_ends_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_users_stripe_subscription_id'), 'users', ['stripe_subscription_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_stripe_subscription_id'), table_name='users')
+    op.drop_column('users', 'subscription_ends_at')
+    op.drop_column('users', 'stripe_subscription_id')
+    op.drop_column('users', 'stripe_customer_id')
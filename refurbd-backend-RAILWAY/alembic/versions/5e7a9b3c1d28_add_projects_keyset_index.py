@@ -0,0 +1,29 @@
+"""add projects (user_id, created_at, id) index
+
+Revision ID: 5e7a9b3c1d28
+Revises: c4d81e2f7a56
+Create Date: 2026-10-19 14:22:10.553417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7a9b3c1d28'
+down_revision = 'c4d81e2f7a56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_projects_user_id_created_at_id',
+        'projects',
+        ['user_id', 'created_at', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_projects_user_id_created_at_id', table_name='projects')
@@ -0,0 +1,28 @@
+"""add renderings.variant_group_id and variant_style
+
+Revision ID: 7d9f1b3e5a20
+Revises: 4c6e8a0b2d15
+Create Date: 2026-10-19 20:31:44.106725
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d9f1b3e5a20'
+down_revision = '4c6e8a0b2d15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('renderings', sa.Column('variant_group_id', sa.String(length=36), nullable=True))
+    op.add_column('renderings', sa.Column('variant_style', sa.String(length=100), nullable=True))
+    op.create_index('ix_renderings_variant_group_id', 'renderings', ['variant_group_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_renderings_variant_group_id', table_name='renderings')
+    op.drop_column('renderings', 'variant_style')
+    op.drop_column('renderings', 'variant_group_id')
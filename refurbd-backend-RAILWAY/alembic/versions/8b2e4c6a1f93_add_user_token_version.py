@@ -0,0 +1,24 @@
+"""add user token_version
+
+Revision ID: 8b2e4c6a1f93
+Revises: 3f9c1a7d2b40
+Create Date: 2026-10-19 11:40:07.902144
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4c6a1f93'
+down_revision = '3f9c1a7d2b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,32 @@
+"""add users.subscription_tier, analyses_used_this_month and last_analysis_reset
+
+Revision ID: 9c3e5a7b1d46
+Revises: 7d9f1b3e5a20
+Create Date: 2026-10-20 09:12:37.514208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e5a7b1d46'
+down_revision = '7d9f1b3e5a20'
+branch_labels = None
+depends_on = None
+
+subscription_tier = sa.Enum('FREE', 'BASIC', 'PRO', 'ENTERPRISE', name='subscriptiontier')
+
+
+def upgrade() -> None:
+    subscription_tier.create(op.get_bind(), checkfirst=True)
+    op.add_column('users', sa.Column('subscription_tier', subscription_tier, server_default='FREE', nullable=False))
+    op.add_column('users', sa.Column('analyses_used_this_month', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('last_analysis_reset', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'last_analysis_reset')
+    op.drop_column('users', 'analyses_used_this_month')
+    op.drop_column('users', 'subscription_tier')
+    subscription_tier.drop(op.get_bind(), checkfirst=True)
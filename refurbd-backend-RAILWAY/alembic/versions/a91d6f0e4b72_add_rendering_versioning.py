@@ -0,0 +1,49 @@
+"""add rendering version sequence and indexes
+
+Revision ID: a91d6f0e4b72
+Revises: 5e7a9b3c1d28
+Create Date: 2026-10-19 15:10:48.907231
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a91d6f0e4b72'
+down_revision = '5e7a9b3c1d28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('rendering_version_seq', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        """
+        UPDATE projects p
+        SET rendering_version_seq = v.max_version
+        FROM (SELECT project_id, MAX(version) AS max_version FROM renderings GROUP BY project_id) v
+        WHERE v.project_id = p.id
+        """
+    )
+    # Earlier edits could leave several renderings marked latest; keep the newest
+    op.execute(
+        """
+        UPDATE renderings r
+        SET is_latest = (r.id = l.id)
+        FROM (
+            SELECT DISTINCT ON (project_id) project_id, id
+            FROM renderings
+            ORDER BY project_id, version DESC, id DESC
+        ) l
+        WHERE l.project_id = r.project_id
+        """
+    )
+    op.create_index('ix_renderings_project_id_is_latest', 'renderings', ['project_id', 'is_latest'], unique=False)
+    op.create_index('ix_renderings_parent_rendering_id', 'renderings', ['parent_rendering_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_renderings_parent_rendering_id', table_name='renderings')
+    op.drop_index('ix_renderings_project_id_is_latest', table_name='renderings')
+    op.drop_column('projects', 'rendering_version_seq')
@@ -0,0 +1,41 @@
+"""make projects, renderings and jobs user_id a UUID like users.id
+
+Revision ID: b7d1f3a5c9e2
+Revises: 4e8a2c6f0b19
+Create Date: 2026-10-20 11:27:51.904736
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d1f3a5c9e2'
+down_revision = '4e8a2c6f0b19'
+branch_labels = None
+depends_on = None
+
+# An integer can't reference users.id, so any rows here have no valid owner
+# to convert; the cast fails loudly rather than guessing one.
+TABLES = ('projects', 'renderings', 'jobs')
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.alter_column(
+            table, 'user_id',
+            type_=postgresql.UUID(as_uuid=True),
+            existing_nullable=False,
+            postgresql_using='user_id::text::uuid',
+        )
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.alter_column(
+            table, 'user_id',
+            type_=sa.Integer(),
+            existing_nullable=False,
+            postgresql_using='NULL',
+        )
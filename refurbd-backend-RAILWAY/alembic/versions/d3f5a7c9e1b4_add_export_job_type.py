@@ -0,0 +1,25 @@
+"""add EXPORT job type
+
+Revision ID: d3f5a7c9e1b4
+Revises: a91d6f0e4b72
+Create Date: 2026-10-19 16:52:33.180924
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f5a7c9e1b4'
+down_revision = 'a91d6f0e4b72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE jobtype ADD VALUE IF NOT EXISTS 'EXPORT'")
+
+
+def downgrade() -> None:
+    # Postgres can't drop a value from an enum type; it is left in place
+    pass
@@ -0,0 +1,28 @@
+"""add users.city, state and country
+
+Revision ID: e1c3a5b7d9f2
+Revises: b7d1f3a5c9e2
+Create Date: 2026-10-20 11:48:15.630294
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1c3a5b7d9f2'
+down_revision = 'b7d1f3a5c9e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('city', sa.String(), nullable=True))
+    op.add_column('users', sa.Column('state', sa.String(), nullable=True))
+    op.add_column('users', sa.Column('country', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'country')
+    op.drop_column('users', 'state')
+    op.drop_column('users', 'city')
@@ -0,0 +1,25 @@
+"""add REPORT job type
+
+Revision ID: e6b8c0d2f4a1
+Revises: d3f5a7c9e1b4
+Create Date: 2026-10-19 17:40:12.664503
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b8c0d2f4a1'
+down_revision = 'd3f5a7c9e1b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE jobtype ADD VALUE IF NOT EXISTS 'REPORT'")
+
+
+def downgrade() -> None:
+    # Postgres can't drop a value from an enum type; it is left in place
+    pass
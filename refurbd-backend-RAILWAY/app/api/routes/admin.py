@@ -8,6 +8,10 @@ from app.db.models.job import Job, JobStatus, JobType
 from app.db.models.user import User
 from app.core.security import get_current_active_user
 from app.core.job_manager import job_manager
+from app.core.rate_limit import admission_controller
+from app.services.pricing_tables import pricing_store
+from app.services.email_service import email_service
+from app.core.config import settings
 from datetime import datetime
 from typing import Optional
 import asyncio
@@ -121,6 +125,8 @@ async def job_events_stream(
                 .limit(50)
             )
             jobs = result.scalars().all()
+            # Return the pooled connection now rather than holding it for the life of the stream
+            await db.close()
             
             snapshot = {
                 "type": "queue_snapshot",
@@ -325,3 +331,72 @@ async def cancel_job(
     )
     
     return {"message": "Job cancelled successfully", "job": job.to_dict()}
+
+
+def _require_admin(user: User):
+    if user.email.lower() not in settings.ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+
+@router.get("/pricing")
+async def get_pricing_tables(
+    current_user: User = Depends(get_current_active_user)
+):
+    """Show the active pricing table version and all loaded versions."""
+    
+    _require_admin(current_user)
+    
+    table = pricing_store.current
+    return {
+        "active_version": table.version,
+        "pinned_version": pricing_store.pinned_version,
+        "versions": pricing_store.versions(),
+        "countries": sorted(region.code for region in table.countries.values()),
+    }
+
+
+@router.post("/pricing/reload")
+async def reload_pricing_tables(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Re-read pricing tables from disk and swap in the active version.
+    
+    Tables are also picked up automatically every
+    PRICING_RELOAD_INTERVAL_SECONDS; this forces it immediately.
+    """
+    
+    _require_admin(current_user)
+    
+    try:
+        table = pricing_store.reload(force=True)
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    logger.info(f"Pricing tables reloaded by {current_user.id}: {table.version} active")
+    return {"active_version": table.version, "versions": pricing_store.versions()}
+
+
+@router.get("/admission")
+async def get_admission_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """Show this worker's AI pipeline queue depth and provider concurrency."""
+    
+    _require_admin(current_user)
+    
+    return admission_controller.stats()
+
+
+@router.post("/emails/usage-digest")
+async def send_usage_digests(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Queue this period's usage digest email for every active user."""
+    
+    _require_admin(current_user)
+    
+    queued = await email_service.send_monthly_usage_digests(db)
+    logger.info(f"Usage digests queued by {current_user.id}: {queued}")
+    return {"queued": queued}
@@ -1,14 +1,17 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from pydantic import BaseModel, EmailStr
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from jose import JWTError, jwt
 from typing import Optional
 from app.db.session import get_db
 from app.db.models.user import User
 from app.db.models import Base
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import (
+    hash_password_async, verify_password_async, verify_and_update_password,
+    create_access_token, get_current_active_user, resolve_user, COOKIE_NAME
+)
+from app.core.user_cache import UserPrincipal, user_cache
 from app.core.config import settings
 
 class Credentials(BaseModel):
@@ -23,9 +26,11 @@ class UserOut(BaseModel):
     id: str
     email: EmailStr
 
-router = APIRouter()
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
 
-COOKIE_NAME = "refurbd_token"
+router = APIRouter()
 
 @router.post("/register", response_model=TokenOut)
 async def register(data: Credentials, response: Response, db: AsyncSession = Depends(get_db)):
@@ -33,10 +38,10 @@ async def register(data: Credentials, response: Response, db: AsyncSession = Dep
     res = await db.execute(select(User).where(User.email == data.email.lower()))
     if res.scalar_one_or_none() is not None:
         raise HTTPException(status_code=400, detail="Email already registered")
-    user = User(email=data.email.lower(), password_hash=hash_password(data.password))
+    user = User(email=data.email.lower(), password_hash=await hash_password_async(data.password))
     db.add(user)
     await db.commit()
-    token = create_access_token(str(user.id))
+    token = create_access_token(str(user.id), token_version=user.token_version or 0)
     _set_cookie(response, token)
     return TokenOut(access_token=token)
 
@@ -44,9 +49,36 @@ async def register(data: Credentials, response: Response, db: AsyncSession = Dep
 async def login(data: Credentials, response: Response, db: AsyncSession = Depends(get_db)):
     res = await db.execute(select(User).where(User.email == data.email.lower()))
     user = res.scalar_one_or_none()
-    if user is None or not verify_password(data.password, user.password_hash):
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    valid, new_hash = await verify_and_update_password(data.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-    token = create_access_token(str(user.id))
+    if new_hash:
+        # stored hash is below the configured cost; upgrade it transparently
+        user.password_hash = new_hash
+        await db.commit()
+    token = create_access_token(str(user.id), token_version=user.token_version or 0)
+    _set_cookie(response, token)
+    return TokenOut(access_token=token)
+
+@router.post("/password", response_model=TokenOut)
+async def change_password(
+    data: PasswordChange,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_active_user),
+):
+    res = await db.execute(select(User).where(User.id == current_user.id))
+    user = res.scalar_one()
+    if not await verify_password_async(data.current_password, user.password_hash):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    user.password_hash = await hash_password_async(data.new_password)
+    # revokes every token issued before the change
+    user.token_version = (user.token_version or 0) + 1
+    await db.commit()
+    user_cache.invalidate(user.id)
+    token = create_access_token(str(user.id), token_version=user.token_version)
     _set_cookie(response, token)
     return TokenOut(access_token=token)
 
@@ -61,23 +93,8 @@ def _set_cookie(response: Response, token: str):
         path="/",
     )
 
-def _decode_token(token: str) -> Optional[str]:
-    try:
-        payload = jwt.get_unverified_claims(token)
-        return payload.get("sub")
-    except Exception:
-        return None
-
 @router.get("/me", response_model=UserOut)
-async def me(token: Optional[str] = None, db: AsyncSession = Depends(get_db)):
-    # token through cookie preferred
-    user_id = None
-    if token:
-        user_id = _decode_token(token)
-    user = None
-    if user_id:
-        res = await db.execute(select(User).where(User.id == user_id))
-        user = res.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorised")
+async def me(request: Request, token: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    # query token for legacy clients, otherwise the auth cookie
+    user = await resolve_user(token or request.cookies.get(COOKIE_NAME), db)
     return UserOut(id=str(user.id), email=user.email)
@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Header
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from app.db.session import get_db
 from app.db.models.user import User, SubscriptionTier
 from app.schemas import SubscriptionCheckout, SubscriptionResponse, UserWithUsage
 from app.core.security import get_current_active_user
 from app.services.payment_service import payment_service
-from app.services.email_service import email_service
+from app.services.stripe_events import stripe_event_service
+from app.services.quota_service import quota_service
+from app.services.idempotency_service import idempotency_service
 from app.core.config import settings
-from datetime import datetime
+from typing import Optional
+import json
 
 router = APIRouter(prefix="/billing", tags=["Billing"])
 
@@ -18,9 +20,15 @@ router = APIRouter(prefix="/billing", tags=["Billing"])
 async def create_checkout_session(
     checkout_data: SubscriptionCheckout,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Create a Stripe checkout session for subscription."""
+    """
+    Create a Stripe checkout session for subscription.
+    
+    With an Idempotency-Key header, retries of the same request return the
+    first checkout session instead of creating another one.
+    """
     
     if checkout_data.tier == SubscriptionTier.FREE:
         raise HTTPException(
@@ -28,23 +36,32 @@ async def create_checkout_session(
             detail="Cannot create checkout for free tier"
         )
     
-    result = await payment_service.create_checkout_session(
-        user_id=current_user.id,
-        user_email=current_user.email,
-        tier=checkout_data.tier,
-        success_url=checkout_data.success_url,
-        cancel_url=checkout_data.cancel_url
+    claim = await idempotency_service.begin(
+        db, current_user.id, idempotency_key, "billing.create_checkout", checkout_data
     )
+    if claim and claim.replayed:
+        return claim.response()
+    
+    try:
+        result = await payment_service.create_checkout_session(
+            user_id=current_user.id,
+            user_email=current_user.email,
+            tier=checkout_data.tier,
+            success_url=checkout_data.success_url,
+            cancel_url=checkout_data.cancel_url,
+            customer_id=current_user.stripe_customer_id
+        )
+    except Exception:
+        await idempotency_service.abandon(db, claim)
+        raise
     
-    # Save customer ID
-    if result.get("customer_id"):
-        current_user.stripe_customer_id = result["customer_id"]
-        await db.commit()
-    
-    return SubscriptionResponse(
+    response = SubscriptionResponse(
         session_id=result["session_id"],
         url=result["url"]
     )
+    await idempotency_service.complete(db, claim, response)
+    
+    return response
 
 
 @router.post("/portal")
@@ -75,19 +92,9 @@ async def get_usage_info(
 ):
     """Get current usage and limits."""
     
-    limits = {
-        SubscriptionTier.FREE: settings.FREE_TIER_ANALYSES_PER_MONTH,
-        SubscriptionTier.BASIC: settings.BASIC_TIER_ANALYSES_PER_MONTH,
-        SubscriptionTier.PRO: settings.PRO_TIER_ANALYSES_PER_MONTH,
-        SubscriptionTier.ENTERPRISE: -1,  # Unlimited
-    }
-    
-    limit = limits.get(current_user.subscription_tier, 0)
-    
-    if limit == -1:
+    analyses_remaining = quota_service.remaining(current_user)
+    if analyses_remaining is None:
         analyses_remaining = -1  # Unlimited
-    else:
-        analyses_remaining = max(0, limit - current_user.analyses_used_this_month)
     
     can_create_project = analyses_remaining != 0
     
@@ -105,7 +112,14 @@ async def stripe_webhook(
     request: Request,
     db: AsyncSession = Depends(get_db)
 ):
-    """Handle Stripe webhook events."""
+    """
+    Receive Stripe webhook events.
+    
+    The event is verified, stored under its Stripe event ID and
+    acknowledged; StripeEventWorker applies it afterwards. Redeliveries of
+    an event that was already stored are acknowledged without doing
+    anything.
+    """
     
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
@@ -115,72 +129,6 @@ async def stripe_webhook(
     if not event:
         raise HTTPException(status_code=400, detail="Invalid signature")
     
-    event_type = event["type"]
-    
-    # Handle successful checkout
-    if event_type == "checkout.session.completed":
-        session = event["data"]["object"]
-        
-        user_id = int(session["metadata"]["user_id"])
-        tier = session["metadata"]["tier"]
-        customer_id = session["customer"]
-        subscription_id = session["subscription"]
-        
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
-        
-        if user:
-            user.subscription_tier = SubscriptionTier(tier)
-            user.stripe_customer_id = customer_id
-            user.stripe_subscription_id = subscription_id
-            
-            # Reset monthly usage
-            user.analyses_used_this_month = 0
-            user.last_analysis_reset = datetime.utcnow()
-            
-            await db.commit()
-            
-            # Send confirmation email
-            try:
-                await email_service.send_subscription_confirmation_email(
-                    user.email,
-                    user.full_name or "there",
-                    tier
-                )
-            except Exception as e:
-                print(f"Failed to send subscription email: {e}")
-    
-    # Handle subscription updates
-    elif event_type == "customer.subscription.updated":
-        subscription = event["data"]["object"]
-        subscription_id = subscription["id"]
-        status = subscription["status"]
-        
-        result = await db.execute(
-            select(User).where(User.stripe_subscription_id == subscription_id)
-        )
-        user = result.scalar_one_or_none()
-        
-        if user and status in ["active", "trialing"]:
-            user.subscription_ends_at = datetime.fromtimestamp(
-                subscription["current_period_end"]
-            )
-            await db.commit()
-    
-    # Handle subscription cancellation
-    elif event_type == "customer.subscription.deleted":
-        subscription = event["data"]["object"]
-        subscription_id = subscription["id"]
-        
-        result = await db.execute(
-            select(User).where(User.stripe_subscription_id == subscription_id)
-        )
-        user = result.scalar_one_or_none()
-        
-        if user:
-            user.subscription_tier = SubscriptionTier.FREE
-            user.stripe_subscription_id = None
-            user.subscription_ends_at = None
-            await db.commit()
-    
-    return {"status": "success"}
+    created = await stripe_event_service.record(db, json.loads(payload))
+    
+    return {"status": "received" if created else "duplicate"}
@@ -0,0 +1,137 @@
+"""Bulk export of a user's projects and renderings."""
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from datetime import datetime
+from uuid import UUID
+
+from app.db.session import get_db
+from app.db.models.job import Job, JobStatus, JobType
+from app.db.models.user import User
+from app.core.security import get_current_active_user
+from app.core.job_manager import job_manager
+from app.services.export_service import export_service
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+
+async def _get_export_job(db: AsyncSession, job_id: int, user_id: UUID) -> Job:
+    result = await db.execute(
+        select(Job).where(
+            Job.id == job_id,
+            Job.user_id == user_id,
+            Job.type == JobType.EXPORT
+        )
+    )
+    job = result.scalar_one_or_none()
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Export not found")
+
+    return job
+
+
+@router.get("/stream")
+async def stream_export(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Download all projects, analyses and renderings as a ZIP, streamed as it is built.
+
+    Nothing is buffered beyond the current image chunk. For very large
+    accounts prefer an export job, which can be resumed if interrupted.
+    """
+
+    filename = f"refurbd-export-{datetime.utcnow():%Y%m%d}.zip"
+    return StreamingResponse(
+        export_service.stream(current_user.id),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
+async def create_export(
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Start an export job that writes the archive to disk for later download."""
+
+    job = Job(
+        user_id=current_user.id,
+        type=JobType.EXPORT,
+        status=JobStatus.QUEUED,
+        current_step="Queued"
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    await job_manager.job_added(job.to_dict())
+    background_tasks.add_task(export_service.run_job, job.id)
+
+    return {"message": "Export started", "job": job.to_dict()}
+
+
+@router.get("/{job_id}")
+async def get_export(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the status of an export job."""
+
+    job = await _get_export_job(db, job_id, current_user.id)
+    return job.to_dict()
+
+
+@router.post("/{job_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+async def resume_export(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Resume a failed or paused export from its last checkpoint."""
+
+    job = await _get_export_job(db, job_id, current_user.id)
+
+    if job.status not in [JobStatus.FAILED, JobStatus.PAUSED]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot resume export with status: {job.status.value}"
+        )
+
+    job.status = JobStatus.QUEUED
+    await db.commit()
+
+    await job_manager.job_progress(job_id=job.id, status="queued")
+    background_tasks.add_task(export_service.run_job, job.id)
+
+    return {"message": "Export resumed", "job": job.to_dict()}
+
+
+@router.get("/{job_id}/download")
+async def download_export(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Download the archive of a completed export job."""
+
+    job = await _get_export_job(db, job_id, current_user.id)
+
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail="Export is not complete")
+
+    path = export_service.archive_path(job)
+    if not path.exists():
+        raise HTTPException(status_code=410, detail="Export archive is no longer available")
+
+    return FileResponse(
+        path,
+        media_type="application/zip",
+        filename=f"refurbd-export-{job.id}.zip"
+    )
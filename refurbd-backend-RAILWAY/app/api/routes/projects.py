@@ -1,52 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks, Header, Query
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List, Optional
+from sqlalchemy import select, tuple_
+from typing import List, Optional, Tuple
 from pathlib import Path
+import asyncio
+import base64
+import logging
 import shutil
+import uuid
 from datetime import datetime
 
 from app.db.session import get_db
 from app.db.models.user import User
+from app.db.models.job import Job, JobStatus, JobType
 from app.db.models.project import Project, ProjectStatus, RoomType, RenovationScope
 from app.db.models.rendering import Rendering
+from app.db.loaders import project_detail_options
 from app.schemas import (
-    ProjectCreate, ProjectResponse, ProjectWithRenderings,
-    AnalysisRequest
+    ProjectCreate, ProjectResponse, ProjectSummary, ProjectPage, ProjectWithRenderings,
+    AnalysisRequest, TimelineResponse
 )
 from app.core.security import get_current_active_user
+from app.core.rate_limit import rate_limiter, admission_controller, AdmissionTicket
+from app.core.job_manager import job_manager
 from app.services.room_analyzer import room_analyzer
-from app.services.image_generator import image_generator
+from app.services.image_generator import image_generator, variant_styles
+from app.services.image_service import image_service, ImageServiceError
 from app.services.cost_estimator import cost_estimator
 from app.services.email_service import email_service
+from app.services.email_templates import PDF_EXPORT_TIERS
+from app.services.quota_service import quota_service, QuotaReservation
+from app.services.idempotency_service import idempotency_service
+from app.services.rendering_versions import rendering_versions
+from app.services.report_service import report_service
 from app.core.config import settings
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
+logger = logging.getLogger(__name__)
+
 
 def check_usage_limit(user: User) -> bool:
-    """Check if user has remaining analyses for the month."""
-    from app.db.models.user import SubscriptionTier
-    
-    # Unlimited tiers
-    if user.subscription_tier in [SubscriptionTier.PRO, SubscriptionTier.ENTERPRISE]:
-        return True
-    
-    limits = {
-        SubscriptionTier.FREE: settings.FREE_TIER_ANALYSES_PER_MONTH,
-        SubscriptionTier.BASIC: settings.BASIC_TIER_ANALYSES_PER_MONTH,
-    }
+    """
+    Check if user has remaining analyses for the month.
     
-    limit = limits.get(user.subscription_tier, 0)
-    
-    # Check if we need to reset monthly counter
-    from datetime import datetime, timedelta
-    if user.last_analysis_reset:
-        days_since_reset = (datetime.utcnow() - user.last_analysis_reset).days
-        if days_since_reset >= 30:
-            return True  # Will reset in the endpoint
-    
-    return user.analyses_used_this_month < limit
+    Advisory pre-check only; quota is actually taken atomically by
+    quota_service.reserve when an analysis is enqueued.
+    """
+    remaining = quota_service.remaining(user)
+    return remaining is None or remaining > 0
 
 
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
@@ -104,34 +107,190 @@ async def create_project(
     return ProjectResponse.model_validate(project)
 
 
-@router.get("/", response_model=List[ProjectResponse])
+def _encode_cursor(created_at: datetime, project_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{project_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, project_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(project_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/", response_model=ProjectPage)
 async def list_projects(
-    skip: int = 0,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=100, description="Maximum number of results"),
+    cursor: Optional[str] = Query(None, description="Pagination cursor from a previous page"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """List all projects for the current user."""
+    """
+    List the current user's projects, newest first.
+    
+    Keyset pagination on (created_at, id), served from the
+    ix_projects_user_id_created_at_id index, so every page costs the same
+    however deep it is. Only summary columns are loaded.
+    
+    Returns:
+        {
+            "items": [ProjectSummary, ...],
+            "next_cursor": "..."  // or null if no more results
+        }
+    """
+    
+    columns = [getattr(Project, name) for name in ProjectSummary.model_fields]
+    query = select(*columns).where(Project.user_id == current_user.id)
+    
+    if cursor:
+        created_at, project_id = _decode_cursor(cursor)
+        query = query.where(tuple_(Project.created_at, Project.id) < (created_at, project_id))
+    
+    query = query.order_by(Project.created_at.desc(), Project.id.desc()).limit(limit + 1)
+    
+    result = await db.execute(query)
+    rows = result.all()
+    
+    # Check if there are more results
+    has_more = len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    
+    next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+    
+    return ProjectPage(
+        items=[ProjectSummary.model_validate(row) for row in rows],
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/{project_id}", response_model=ProjectWithRenderings)
+async def get_project(
+    project_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get a specific project with all renderings (2 queries)."""
     
     result = await db.execute(
         select(Project)
-        .where(Project.user_id == current_user.id)
-        .order_by(Project.created_at.desc())
-        .offset(skip)
-        .limit(limit)
+        .where(
+            Project.id == project_id,
+            Project.user_id == current_user.id
+        )
+        .options(*project_detail_options())
     )
-    projects = result.scalars().all()
+    project = result.scalar_one_or_none()
+    
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
     
-    return [ProjectResponse.model_validate(p) for p in projects]
+    return ProjectWithRenderings.model_validate(project)
 
 
-@router.get("/{project_id}", response_model=ProjectWithRenderings)
-async def get_project(
+@router.get("/{project_id}/timeline", response_model=TimelineResponse)
+async def get_project_timeline(
+    project_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the structured renovation timeline (phases with min/max days) for a project."""
+    
+    result = await db.execute(
+        select(Project.room_type, Project.renovation_scope).where(
+            Project.id == project_id,
+            Project.user_id == current_user.id
+        )
+    )
+    row = result.one_or_none()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    timeline = cost_estimator.get_timeline(
+        scope=row.renovation_scope,
+        room_type=row.room_type
+    )
+    return TimelineResponse(**timeline.to_dict())
+
+
+def _require_pdf_export(user: User):
+    tier = getattr(user.subscription_tier, "value", user.subscription_tier)
+    if tier not in PDF_EXPORT_TIERS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="PDF export is available on the Pro and Enterprise plans."
+        )
+
+
+@router.post("/{project_id}/report", status_code=status.HTTP_202_ACCEPTED)
+async def create_project_report(
+    project_id: int,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Build a PDF report for a project (runs in background).
+    
+    Returns immediately if an up-to-date report is already cached, and
+    reuses a report job that is still pending for the project.
+    """
+    
+    _require_pdf_export(current_user)
+    
+    result = await db.execute(
+        select(Project).where(
+            Project.id == project_id,
+            Project.user_id == current_user.id
+        )
+    )
+    project = result.scalar_one_or_none()
+    
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    if await report_service.cached_report(db, project):
+        return {"message": "Report ready", "project_id": project_id, "status": "ready"}
+    
+    result = await db.execute(
+        select(Job).where(
+            Job.project_id == project_id,
+            Job.type == JobType.REPORT,
+            Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+        )
+    )
+    job = result.scalars().first()
+    
+    if not job:
+        job = Job(
+            user_id=current_user.id,
+            project_id=project_id,
+            type=JobType.REPORT,
+            status=JobStatus.QUEUED,
+            current_step="Queued"
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        await job_manager.job_added(job.to_dict())
+        background_tasks.add_task(report_service.run_job, job.id)
+    
+    return {"message": "Report started", "project_id": project_id, "status": "processing", "job": job.to_dict()}
+
+
+@router.get("/{project_id}/report")
+async def download_project_report(
     project_id: int,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get a specific project with all renderings."""
+    """Download the project's PDF report, if an up-to-date one has been built."""
+    
+    _require_pdf_export(current_user)
     
     result = await db.execute(
         select(Project).where(
@@ -144,16 +303,38 @@ async def get_project(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    return ProjectWithRenderings.model_validate(project)
+    path = await report_service.cached_report(db, project)
+    if not path:
+        raise HTTPException(status_code=404, detail="Report not generated yet")
+    
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"{project.name or 'project'}-report.pdf"
+    )
 
 
 async def run_analysis_task(
     project_id: int,
-    user_id: int,
+    user_id: uuid.UUID,
     budget_constraint: Optional[float],
-    db_url: str
+    db_url: str,
+    reservation: Optional[QuotaReservation] = None,
+    ticket: Optional[AdmissionTicket] = None,
+    variants: int = 1
 ):
-    """Background task to run the full analysis pipeline."""
+    """
+    Background task to run the full analysis pipeline.
+    
+    The quota reservation taken at enqueue time is released if the
+    pipeline fails; the admission ticket is always released.
+    
+    With ``variants`` > 1, that many style variants are rendered
+    concurrently and stored as sibling renderings sharing a
+    ``variant_group_id``. The first one that succeeds (the project's own
+    style, unless it failed) becomes the latest rendering until the user
+    selects another.
+    """
     from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
     from app.db.models.user import User
     from app.db.models.project import Project
@@ -207,13 +388,15 @@ async def run_analysis_task(
                 scope=project.renovation_scope,
                 square_footage=project.square_footage or 150,
                 state=user.state,
-                city=user.city
+                city=user.city,
+                country=user.country
             )
             
             project.estimated_cost_low = cost_estimate["cost_low"]
             project.estimated_cost_high = cost_estimate["cost_high"]
             project.location_multiplier = cost_estimate["location_multiplier"]
             project.budget_breakdown = cost_estimate["breakdown"]
+            project.pricing_version = cost_estimate["pricing_version"]
             
             # Step 3: Timeline
             timeline = cost_estimator.get_timeline_estimate(
@@ -236,57 +419,104 @@ async def run_analysis_task(
             if not design_desc:
                 design_desc = f"Modern {project.room_type.value} with {project.desired_style or 'contemporary'} style"
             
-            # Save path
+            # Save paths
             render_dir = Path(settings.UPLOAD_DIR) / str(user.id) / "renderings"
             render_dir.mkdir(parents=True, exist_ok=True)
-            render_path = render_dir / f"project_{project_id}_v1.png"
+            styles = variant_styles(project.desired_style, variants)
+            # Allocate the versions in their own short transaction so the
+            # analysis results above aren't committed before the renderings
+            async with AsyncSessionLocal() as version_db:
+                versions = [
+                    await rendering_versions.next_version(version_db, project.id)
+                    for _ in styles
+                ]
+                await version_db.commit()
+            render_paths = [
+                str(render_dir / f"project_{project_id}_v{version}.png")
+                for version in versions
+            ]
             
-            image_path, gen_time = await image_generator.generate_rendering(
+            results = await image_generator.generate_variants(
                 design_description=design_desc,
                 room_type=project.room_type.value,
-                style=project.desired_style or "modern",
+                styles=styles,
                 image_size=image_size,
-                save_path=str(render_path)
+                save_paths=render_paths
             )
+            generated = [
+                (style, version, result)
+                for style, version, result in zip(styles, versions, results)
+                if not isinstance(result, BaseException)
+            ]
+            for style, result in zip(styles, results):
+                if isinstance(result, BaseException):
+                    logger.warning(f"Variant '{style}' failed for project {project_id}: {result}")
+            if not generated:
+                raise results[0]
             
-            # Save rendering
-            rendering = Rendering(
-                user_id=user.id,
-                project_id=project.id,
-                image_path=str(image_path),
-                prompt_used=design_desc[:500],
-                image_size=image_size,
-                version=1,
-                is_latest=True,
-                generation_time_seconds=int(gen_time)
+            # Thumbnails in worker processes; a rendering without one is still usable
+            thumbnails = await asyncio.gather(
+                *(image_service.thumbnail(str(result[0])) for _, _, result in generated),
+                return_exceptions=True
             )
-            db.add(rendering)
+            
+            # Save renderings
+            variant_group_id = str(uuid.uuid4()) if len(styles) > 1 else None
+            renderings = []
+            for (style, version, (image_path, gen_time, image_sha256)), thumbnail_path in zip(generated, thumbnails):
+                if isinstance(thumbnail_path, ImageServiceError):
+                    logger.warning(f"Thumbnail skipped for {image_path}: {thumbnail_path}")
+                    thumbnail_path = None
+                elif isinstance(thumbnail_path, BaseException):
+                    raise thumbnail_path
+                rendering = Rendering(
+                    user_id=user.id,
+                    project_id=project.id,
+                    image_path=str(image_path),
+                    thumbnail_path=thumbnail_path,
+                    image_sha256=image_sha256,
+                    prompt_used=design_desc[:500],
+                    image_size=image_size,
+                    version=version,
+                    is_latest=False,
+                    model_used=image_generator.provider.model,
+                    variant_group_id=variant_group_id,
+                    variant_style=style if variant_group_id else None,
+                    generation_time_seconds=int(gen_time)
+                )
+                db.add(rendering)
+                renderings.append(rendering)
+            await db.flush()
+            await rendering_versions.set_latest(db, project.id, renderings[0].id)
             
             # Update project status
             project.status = ProjectStatus.COMPLETED
             project.completed_at = datetime.utcnow()
             
-            # Update user usage
-            user.analyses_used_this_month += 1
-            
             await db.commit()
             
             # Send email notification
             try:
                 await email_service.send_analysis_complete_email(
                     user.email,
-                    user.full_name or "there",
+                    "there",
                     project.name,
-                    project.id
+                    project.id,
+                    tier=user.subscription_tier.value
                 )
             except Exception as e:
                 print(f"Failed to send completion email: {e}")
             
         except Exception as e:
             print(f"Error in analysis task: {e}")
+            await db.rollback()
+            if reservation:
+                await quota_service.release(db, reservation)
             project.status = ProjectStatus.DRAFT
             await db.commit()
         finally:
+            if ticket:
+                ticket.release()
             await engine.dispose()
 
 
@@ -296,28 +526,77 @@ async def analyze_project(
     analysis_req: AnalysisRequest,
     background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Start AI analysis of the project (runs in background)."""
+    """
+    Start AI analysis of the project (runs in background).
     
-    # Get project
-    result = await db.execute(
-        select(Project).where(
-            Project.id == project_id,
-            Project.user_id == current_user.id
-        )
-    )
-    project = result.scalar_one_or_none()
+    With an Idempotency-Key header, retries of the same request return the
+    first response instead of starting another analysis.
+    """
     
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    claim = await idempotency_service.begin(
+        db, current_user.id, idempotency_key, "projects.analyze",
+        {"project_id": project_id, "request": analysis_req}
+    )
+    if claim and claim.replayed:
+        return claim.response()
     
-    # Check usage limits
-    if not check_usage_limit(current_user):
-        raise HTTPException(
-            status_code=status.HTTP_402_PAYMENT_REQUIRED,
-            detail="Monthly analysis limit reached. Please upgrade your plan."
+    ticket = None
+    try:
+        # Charged after the replay check: retries of a recorded request are free
+        await rate_limiter.check("analyze", current_user)
+        
+        # Get project
+        result = await db.execute(
+            select(Project).where(
+                Project.id == project_id,
+                Project.user_id == current_user.id
+            )
         )
+        project = result.scalar_one_or_none()
+        
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        # Variants share one unit of quota, so how many a user may render depends on the tier
+        max_variants = {
+            "free": settings.FREE_MAX_RENDERING_VARIANTS,
+            "basic": settings.BASIC_MAX_RENDERING_VARIANTS,
+            "pro": settings.PRO_MAX_RENDERING_VARIANTS,
+            "enterprise": settings.ENTERPRISE_MAX_RENDERING_VARIANTS,
+        }.get(current_user.subscription_tier.value, 1)
+        if analysis_req.variants and analysis_req.variants > max_variants:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Your plan allows up to {max_variants} rendering variant(s) per analysis."
+            )
+        variants = min(analysis_req.variants or settings.RENDERING_VARIANTS, max_variants)
+        
+        # Shed load before taking quota (503 + Retry-After when overloaded)
+        ticket = admission_controller.admit()
+        
+        # Reserve quota (atomic; released again if the analysis fails)
+        reservation = await quota_service.reserve(db, current_user.id)
+        if not reservation:
+            raise HTTPException(
+                status_code=status.HTTP_402_PAYMENT_REQUIRED,
+                detail="Monthly analysis limit reached. Please upgrade your plan."
+            )
+    except Exception:
+        if ticket:
+            ticket.release()
+        await idempotency_service.abandon(db, claim)
+        raise
+    
+    response = {
+        "message": "Analysis started",
+        "project_id": project_id,
+        "status": "processing",
+        "variants": variants
+    }
+    await idempotency_service.complete(db, claim, response, status.HTTP_202_ACCEPTED)
     
     # Add background task
     database_url = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
@@ -326,14 +605,13 @@ async def analyze_project(
         project_id,
         current_user.id,
         analysis_req.budget_constraint,
-        database_url
+        database_url,
+        reservation,
+        ticket,
+        variants
     )
     
-    return {
-        "message": "Analysis started",
-        "project_id": project_id,
-        "status": "processing"
-    }
+    return response
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -1,29 +1,135 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Header, Query
 from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from pathlib import Path
-from typing import List
+from typing import List, Optional
+from uuid import UUID
+import logging
 
 from app.db.session import get_db
 from app.db.models.user import User
 from app.db.models.project import Project
 from app.db.models.rendering import Rendering
-from app.schemas import RenderingResponse, RenderingEditRequest
+from app.db.loaders import edit_tree_options, MAX_EDIT_DEPTH
+from app.schemas import RenderingResponse, RenderingWithEdits, RenderingEditRequest
 from app.core.security import get_current_active_user
+from app.core.rate_limit import rate_limiter, admission_controller, AdmissionTicket
 from app.services.image_generator import image_generator
+from app.services.image_service import image_service, ImageServiceError
+from app.services.idempotency_service import idempotency_service
+from app.services.rendering_versions import rendering_versions
 from app.core.config import settings
 
 router = APIRouter(prefix="/renderings", tags=["Renderings"])
 
+logger = logging.getLogger(__name__)
 
-@router.get("/{rendering_id}", response_model=RenderingResponse)
+
+def _rendering_tree(rendering: Rendering, depth: int) -> RenderingWithEdits:
+    """Serialize a rendering and the ``depth`` levels of edits loaded with it."""
+    edits = []
+    if depth > 0:
+        edits = [_rendering_tree(edit, depth - 1) for edit in rendering.edits]
+    return RenderingWithEdits(
+        **RenderingResponse.model_validate(rendering).model_dump(),
+        parent_rendering_id=rendering.parent_rendering_id,
+        edits=edits
+    )
+
+
+@router.get("/{rendering_id}", response_model=RenderingWithEdits)
 async def get_rendering(
+    rendering_id: int,
+    edit_depth: int = Query(0, ge=0, le=MAX_EDIT_DEPTH, description="Levels of edits to include"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get rendering details, optionally with its tree of edits (1 + edit_depth queries)."""
+    
+    result = await db.execute(
+        select(Rendering)
+        .where(
+            Rendering.id == rendering_id,
+            Rendering.user_id == current_user.id
+        )
+        .options(*edit_tree_options(edit_depth))
+    )
+    rendering = result.scalar_one_or_none()
+    
+    if not rendering:
+        raise HTTPException(status_code=404, detail="Rendering not found")
+    
+    return _rendering_tree(rendering, edit_depth)
+
+
+@router.get("/{rendering_id}/lineage", response_model=RenderingWithEdits)
+async def get_rendering_lineage(
+    rendering_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the whole edit tree a rendering belongs to, from its root (1 query)."""
+    
+    rows = await rendering_versions.lineage(db, rendering_id, current_user.id)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Rendering not found")
+    
+    # Rows come ordered by depth, so every parent is built before its edits
+    nodes = {}
+    for rendering, depth in rows:
+        node = RenderingWithEdits(
+            **RenderingResponse.model_validate(rendering).model_dump(),
+            parent_rendering_id=rendering.parent_rendering_id
+        )
+        nodes[rendering.id] = node
+        parent = nodes.get(rendering.parent_rendering_id) if depth else None
+        if parent:
+            parent.edits.append(node)
+    
+    return nodes[rows[0][0].id]
+
+
+@router.get("/{rendering_id}/variants", response_model=List[RenderingResponse])
+async def get_rendering_variants(
+    rendering_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """List the style variants generated together with a rendering (including itself)."""
+    
+    result = await db.execute(
+        select(Rendering).where(
+            Rendering.id == rendering_id,
+            Rendering.user_id == current_user.id
+        )
+    )
+    rendering = result.scalar_one_or_none()
+    
+    if not rendering:
+        raise HTTPException(status_code=404, detail="Rendering not found")
+    
+    if not rendering.variant_group_id:
+        return [RenderingResponse.model_validate(rendering)]
+    
+    result = await db.execute(
+        select(Rendering)
+        .where(
+            Rendering.variant_group_id == rendering.variant_group_id,
+            Rendering.user_id == current_user.id
+        )
+        .order_by(Rendering.version)
+    )
+    return [RenderingResponse.model_validate(r) for r in result.scalars().all()]
+
+
+@router.post("/{rendering_id}/select", response_model=RenderingResponse)
+async def select_rendering(
     rendering_id: int,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get rendering details."""
+    """Make a rendering (e.g. the chosen style variant) the project's latest."""
     
     result = await db.execute(
         select(Rendering).where(
@@ -36,6 +142,10 @@ async def get_rendering(
     if not rendering:
         raise HTTPException(status_code=404, detail="Rendering not found")
     
+    await rendering_versions.set_latest(db, rendering.project_id, rendering.id)
+    await db.commit()
+    await db.refresh(rendering)
+    
     return RenderingResponse.model_validate(rendering)
 
 
@@ -62,18 +172,22 @@ async def download_rendering(
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Image file not found")
     
+    headers = {"ETag": f'"{rendering.image_sha256}"'} if rendering.image_sha256 else None
+    
     return FileResponse(
         path=str(file_path),
         media_type="image/png",
-        filename=f"renovation_rendering_{rendering_id}.png"
+        filename=f"renovation_rendering_{rendering_id}.png",
+        headers=headers
     )
 
 
 async def edit_rendering_task(
     rendering_id: int,
-    user_id: int,
+    user_id: UUID,
     edit_instructions: str,
-    db_url: str
+    db_url: str,
+    ticket: Optional[AdmissionTicket] = None
 ):
     """Background task to edit rendering."""
     from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
@@ -110,45 +224,50 @@ async def edit_rendering_task(
             render_dir = Path(settings.UPLOAD_DIR) / str(user.id) / "renderings"
             render_dir.mkdir(parents=True, exist_ok=True)
             
-            new_version = original.version + 1
+            # Allocate the version up front (per-project sequence, safe under concurrent edits)
+            new_version = await rendering_versions.next_version(db, original.project_id)
+            await db.commit()
             render_path = render_dir / f"project_{original.project_id}_v{new_version}.png"
             
-            image_path, gen_time = await image_generator.edit_rendering(
+            image_path, gen_time, image_sha256 = await image_generator.edit_rendering(
                 original_image_path=original.image_path,
                 edit_instructions=edit_instructions,
                 image_size=image_size,
                 save_path=str(render_path)
             )
             
-            # Mark old renderings as not latest
-            await db.execute(
-                select(Rendering).where(
-                    Rendering.project_id == original.project_id,
-                    Rendering.is_latest == True
-                )
-            )
-            old_renderings = result.scalars().all()
-            for r in old_renderings:
-                r.is_latest = False
+            # Thumbnail in a worker process; a rendering without one is still usable
+            try:
+                thumbnail_path = await image_service.thumbnail(str(image_path))
+            except ImageServiceError as e:
+                logger.warning(f"Thumbnail skipped for {image_path}: {e}")
+                thumbnail_path = None
             
-            # Create new rendering
+            # Create new rendering and make it the project's latest
             new_rendering = Rendering(
                 user_id=user.id,
                 project_id=original.project_id,
                 image_path=str(image_path),
+                thumbnail_path=thumbnail_path,
+                image_sha256=image_sha256,
                 prompt_used=edit_instructions[:500],
                 image_size=image_size,
                 version=new_version,
                 parent_rendering_id=rendering_id,
-                is_latest=True,
+                is_latest=False,
+                model_used=image_generator.provider.model,
                 generation_time_seconds=int(gen_time)
             )
             db.add(new_rendering)
+            await db.flush()
+            await rendering_versions.set_latest(db, original.project_id, new_rendering.id)
             await db.commit()
             
         except Exception as e:
             print(f"Error in edit rendering task: {e}")
         finally:
+            if ticket:
+                ticket.release()
             await engine.dispose()
 
 
@@ -158,21 +277,51 @@ async def edit_rendering(
     edit_req: RenderingEditRequest,
     background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Edit an existing rendering based on instructions."""
+    """
+    Edit an existing rendering based on instructions.
     
-    # Verify rendering belongs to user
-    result = await db.execute(
-        select(Rendering).where(
-            Rendering.id == rendering_id,
-            Rendering.user_id == current_user.id
-        )
+    With an Idempotency-Key header, retries of the same request return the
+    first response instead of starting another edit.
+    """
+    
+    claim = await idempotency_service.begin(
+        db, current_user.id, idempotency_key, "renderings.edit",
+        {"rendering_id": rendering_id, "request": edit_req}
     )
-    rendering = result.scalar_one_or_none()
+    if claim and claim.replayed:
+        return claim.response()
     
-    if not rendering:
-        raise HTTPException(status_code=404, detail="Rendering not found")
+    try:
+        # Charged after the replay check: retries of a recorded request are free
+        await rate_limiter.check("edit", current_user)
+        
+        # Verify rendering belongs to user
+        result = await db.execute(
+            select(Rendering).where(
+                Rendering.id == rendering_id,
+                Rendering.user_id == current_user.id
+            )
+        )
+        rendering = result.scalar_one_or_none()
+        
+        if not rendering:
+            raise HTTPException(status_code=404, detail="Rendering not found")
+        
+        # Shed load when overloaded (503 + Retry-After)
+        ticket = admission_controller.admit()
+    except Exception:
+        await idempotency_service.abandon(db, claim)
+        raise
+    
+    response = {
+        "message": "Edit started",
+        "rendering_id": rendering_id,
+        "status": "processing"
+    }
+    await idempotency_service.complete(db, claim, response, status.HTTP_202_ACCEPTED)
     
     # Add background task
     database_url = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
@@ -181,14 +330,11 @@ async def edit_rendering(
         rendering_id,
         current_user.id,
         edit_req.edit_instructions,
-        database_url
+        database_url,
+        ticket
     )
     
-    return {
-        "message": "Edit started",
-        "rendering_id": rendering_id,
-        "status": "processing"
-    }
+    return response
 
 
 @router.get("/project/{project_id}", response_model=List[RenderingResponse])
@@ -219,3 +365,19 @@ async def list_project_renderings(
     renderings = result.scalars().all()
     
     return [RenderingResponse.model_validate(r) for r in renderings]
+
+
+@router.get("/project/{project_id}/latest", response_model=RenderingResponse)
+async def get_latest_rendering(
+    project_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the latest rendering of a project."""
+    
+    rendering = await rendering_versions.latest(db, project_id)
+    
+    if not rendering or rendering.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="No rendering found")
+    
+    return RenderingResponse.model_validate(rendering)
@@ -3,11 +3,12 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.websocket import manager
-from app.core.security import verify_token
+from app.core.security import verify_token, COOKIE_NAME
 from app.db.session import get_db
 from app.db.models.user import User
 from app.db.models.project import Project
 import logging
+import uuid
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -16,13 +17,13 @@ logger = logging.getLogger(__name__)
 async def get_user_from_websocket(
     websocket: WebSocket,
     token: str = Query(None)
-) -> int:
+) -> uuid.UUID:
     """
     Authenticate WebSocket connection.
     
     Can use token from:
     1. Query parameter: ?token=xxx
-    2. Cookie: access_token
+    2. Cookie: refurbd_token (or legacy access_token)
     
     Args:
         websocket: WebSocket connection
@@ -36,7 +37,7 @@ async def get_user_from_websocket(
     """
     if not token:
         # Try to get from cookie
-        token = websocket.cookies.get("access_token")
+        token = websocket.cookies.get(COOKIE_NAME) or websocket.cookies.get("access_token")
     
     if not token:
         await websocket.close(code=1008, reason="Unauthorized")
@@ -47,7 +48,7 @@ async def get_user_from_websocket(
         user_id = payload.get("sub")
         if not user_id:
             raise ValueError("Invalid token payload")
-        return int(user_id)
+        return uuid.UUID(user_id)
     except Exception as e:
         logger.error(f"WebSocket auth error: {e}")
         await websocket.close(code=1008, reason="Invalid token")
@@ -66,7 +67,7 @@ async def websocket_project_updates(
     
     Authentication via:
     - Query param: ws://host/ws/projects/1?token=xxx
-    - Cookie: access_token (if SameSite allows)
+    - Cookie: refurbd_token (if SameSite allows)
     
     Sends JSON events:
     - {"type": "status", "status": "analyzing"}
@@ -92,6 +93,8 @@ async def websocket_project_updates(
         )
     )
     project = result.scalar_one_or_none()
+    # Return the pooled connection now rather than holding it for the life of the socket
+    await db.close()
     
     if not project:
         await websocket.close(code=1008, reason="Project not found")
@@ -0,0 +1,50 @@
+"""Shared outbound HTTP client."""
+from typing import Optional
+import logging
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SharedHttpClient:
+    """
+    One pooled ``httpx.AsyncClient`` per worker process.
+
+    Reusing it keeps TLS connections to providers (e.g. the DALL·E image
+    CDN) alive between calls instead of handshaking on every request.
+    Created on first use, since a client is bound to the running loop.
+    """
+
+    def __init__(self, max_connections: int, max_keepalive: int, timeout: float):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=10.0)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global HTTP client instance
+http_client = SharedHttpClient(
+    max_connections=settings.HTTP_MAX_CONNECTIONS,
+    max_keepalive=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    timeout=settings.HTTP_TIMEOUT_SECONDS,
+)
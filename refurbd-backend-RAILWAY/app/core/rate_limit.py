@@ -0,0 +1,251 @@
+"""Per-user rate limiting and global admission control for AI endpoints."""
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Tuple
+import asyncio
+import logging
+import math
+import time
+
+from fastapi import HTTPException, status
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.user_cache import UserPrincipal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BucketRule:
+    """Token bucket: up to ``capacity`` calls, refilled evenly over ``period`` seconds."""
+    capacity: int
+    period: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.period
+
+
+def parse_rules(spec: str) -> Dict[str, BucketRule]:
+    """
+    Parse a per-tier rule string such as ``"free=5/3600,pro=120/3600"``.
+
+    Returns:
+        Dict of tier value -> BucketRule
+    """
+    rules = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        tier, _, rate = part.partition("=")
+        count, _, period = rate.partition("/")
+        rules[tier.strip().lower()] = BucketRule(capacity=int(count), period=float(period or 60))
+    return rules
+
+
+class InMemoryRateLimitBackend:
+    """Token buckets held in this process (one worker's view only)."""
+
+    def __init__(self, max_keys: int = 100_000):
+        # entries expire once the bucket would be full again anyway
+        self._buckets = TTLCache(maxsize=max_keys)
+
+    async def take(self, key: str, rule: BucketRule, cost: int = 1) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (float(rule.capacity), now))
+        tokens = min(rule.capacity, tokens + (now - updated_at) * rule.refill_per_second)
+
+        allowed = tokens >= cost
+        retry_after = 0.0
+        if allowed:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / rule.refill_per_second
+
+        self._buckets.set(key, (tokens, now), ttl=rule.period)
+        return allowed, retry_after
+
+
+class RedisRateLimitBackend:
+    """Token buckets shared by all workers through Redis (atomic Lua script)."""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        retry_after = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(retry_after)}
+    """
+
+    def __init__(self, url: str):
+        # optional dependency, only needed when RATE_LIMIT_BACKEND=redis
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+
+    async def take(self, key: str, rule: BucketRule, cost: int = 1) -> Tuple[bool, float]:
+        allowed, retry_after = await self._script(
+            keys=[key], args=[rule.capacity, rule.refill_per_second, cost]
+        )
+        return bool(int(allowed)), float(retry_after)
+
+
+class RateLimiter:
+    """Per-user, per-tier token bucket limits for named actions."""
+
+    def __init__(self, backend, rules: Dict[str, Dict[str, BucketRule]]):
+        self.backend = backend
+        self.rules = rules
+
+    async def check(self, action: str, user: UserPrincipal):
+        """
+        Take one token for ``action`` from the user's bucket.
+
+        Raises:
+            HTTPException: 429 with Retry-After if the bucket is empty
+        """
+        tier_rules = self.rules.get(action, {})
+        tier = getattr(user.subscription_tier, "value", user.subscription_tier)
+        rule = tier_rules.get(str(tier).lower())
+        if rule is None:
+            return  # no limit configured for this tier
+
+        try:
+            allowed, retry_after = await self.backend.take(f"rl:{action}:{user.id}", rule)
+        except Exception as e:
+            # a broken shared store must not take the API down with it
+            logger.error(f"Rate limit backend error, allowing request: {e}")
+            return
+
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many {action} requests. Please slow down.",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+
+def _create_backend():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(settings.REDIS_URL)
+    return InMemoryRateLimitBackend()
+
+
+rate_limiter = RateLimiter(
+    _create_backend(),
+    rules={
+        "analyze": parse_rules(settings.RATE_LIMIT_ANALYZE),
+        "edit": parse_rules(settings.RATE_LIMIT_EDIT),
+    },
+)
+
+
+class AdmissionTicket:
+    """A queued pipeline slot; release exactly once when the pipeline ends."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._finish()
+
+
+class AdmissionController:
+    """
+    Shed expensive work before it is queued.
+
+    Tracks background pipelines that have been accepted but not finished,
+    and calls currently inside (or waiting for) an AI provider. New work is
+    refused with 503 + Retry-After once either crosses its configured limit,
+    so overload turns into fast rejections instead of an ever-growing
+    backlog on the event loop.
+    """
+
+    def __init__(self, max_queue_depth: int, provider_concurrency: int, max_provider_waiters: int):
+        self.max_queue_depth = max_queue_depth
+        self.max_provider_waiters = max_provider_waiters
+        self._provider_slots = asyncio.Semaphore(provider_concurrency)
+        self._queued = 0
+        self._provider_in_flight = 0
+        self._provider_waiting = 0
+
+    def admit(self) -> AdmissionTicket:
+        """
+        Accept a new pipeline or reject it.
+
+        Raises:
+            HTTPException: 503 with Retry-After when overloaded
+        """
+        if self._queued >= self.max_queue_depth or self._provider_waiting >= self.max_provider_waiters:
+            logger.warning(
+                f"Admission rejected: queued={self._queued} "
+                f"provider_in_flight={self._provider_in_flight} provider_waiting={self._provider_waiting}"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Service is busy. Please retry shortly.",
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+        self._queued += 1
+        return AdmissionTicket(self)
+
+    def _finish(self):
+        self._queued -= 1
+
+    @asynccontextmanager
+    async def provider_call(self):
+        """
+        Hold one provider-concurrency slot for the duration of an AI API call.
+
+        The call inside must be awaited on an async client (see
+        app/services/providers); a blocking SDK call here would stall the
+        event loop while holding the slot.
+        """
+        self._provider_waiting += 1
+        try:
+            await self._provider_slots.acquire()
+        finally:
+            self._provider_waiting -= 1
+        self._provider_in_flight += 1
+        try:
+            yield
+        finally:
+            self._provider_in_flight -= 1
+            self._provider_slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queued,
+            "max_queue_depth": self.max_queue_depth,
+            "provider_in_flight": self._provider_in_flight,
+            "provider_waiting": self._provider_waiting,
+        }
+
+
+# Global admission controller instance
+admission_controller = AdmissionController(
+    max_queue_depth=settings.ADMISSION_MAX_QUEUE_DEPTH,
+    provider_concurrency=settings.PROVIDER_MAX_CONCURRENCY,
+    max_provider_waiters=settings.ADMISSION_MAX_PROVIDER_WAITERS,
+)
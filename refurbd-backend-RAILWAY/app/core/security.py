@@ -1,20 +1,132 @@
 
-from datetime import datetime, timedelta, timezone
-from typing import Optional
-from jose import jwt
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError
 from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.core.tokens import token_service
+from app.core.user_cache import UserPrincipal, user_cache
+from app.db.models.user import User
+from app.db.session import get_db
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-ALGO = "HS256"
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    # hashes below the configured cost are upgraded on next login
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
+ALGO = token_service.ALGORITHM
+COOKIE_NAME = "refurbd_token"
 
-def create_access_token(sub: str, minutes: int = None) -> str:
-    expire = datetime.now(timezone.utc) + timedelta(minutes=minutes or settings.JWT_EXPIRES_MIN)
-    to_encode = {"sub": sub, "exp": expire}
-    return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=ALGO)
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_PREFIX}/auth/login", auto_error=False)
+
+def create_access_token(sub: str, minutes: int = None, token_version: int = 0) -> str:
+    return token_service.create(sub, minutes=minutes, token_version=token_version)
+
+def verify_token(token: str) -> dict:
+    """Verify signature and expiry; raises JWTError if the token is invalid."""
+    return token_service.verify(token)
 
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
 def hash_password(plain: str) -> str:
     return pwd_context.hash(plain)
+
+# bcrypt is deliberately slow (~250ms at cost 12) and must not run on the
+# event loop. Work goes to a dedicated pool; the semaphore bounds how many
+# calls are handed to it. Requests that can't get a slot within
+# PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS get a 503, so a login burst is shed
+# instead of piling up waiters on the semaphore.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_password_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_PENDING)
+
+async def _run_password_job(fn, *args):
+    try:
+        await asyncio.wait_for(_password_slots.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress. Please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, fn, *args)
+    finally:
+        _password_slots.release()
+
+async def hash_password_async(plain: str) -> str:
+    return await _run_password_job(pwd_context.hash, plain)
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await _run_password_job(pwd_context.verify, plain, hashed)
+
+async def verify_and_update_password(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password off the event loop.
+
+    Returns:
+        (valid, new_hash) where new_hash is set if the stored hash uses a
+        deprecated scheme or a lower cost than BCRYPT_ROUNDS and should be
+        replaced
+    """
+    return await _run_password_job(pwd_context.verify_and_update, plain, hashed)
+
+_credentials_error = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+async def get_current_user(
+    request: Request,
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> UserPrincipal:
+    """Resolve the bearer token (or auth cookie) to the current user."""
+    return await resolve_user(token or request.cookies.get(COOKIE_NAME), db)
+
+async def resolve_user(token: Optional[str], db: AsyncSession) -> UserPrincipal:
+    """
+    Verify a token and load its user.
+
+    Served from user_cache when possible; the session only opens a
+    connection on a cache miss.
+    """
+    if not token:
+        raise _credentials_error
+    try:
+        payload = verify_token(token)
+    except JWTError:
+        raise _credentials_error
+    token_version = payload.get("ver", 0)
+    try:
+        user_id = uuid.UUID(payload.get("sub") or "")
+    except (TypeError, ValueError):
+        raise _credentials_error
+
+    principal = user_cache.get(user_id, token_version)
+    if principal is None:
+        res = await db.execute(select(User).where(User.id == user_id))
+        user = res.scalar_one_or_none()
+        if user is None or (user.token_version or 0) != token_version:
+            raise _credentials_error
+        principal = user_cache.put(user)
+    return principal
+
+async def get_current_active_user(
+    current_user: UserPrincipal = Depends(get_current_user),
+) -> UserPrincipal:
+    """The authenticated user (accounts have no active/disabled flag; revoke via token_version)."""
+    return current_user
@@ -0,0 +1,63 @@
+"""Single verified path for issuing and decoding access tokens."""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import hashlib
+import time
+
+from jose import JWTError, jwt
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class TokenService:
+    """
+    Issue and verify JWT access tokens.
+    
+    Verified claims are cached in a bounded LRU keyed by the SHA-256 of the
+    token until the token's ``exp``, so repeated polling and WebSocket
+    reconnects with the same token skip the HMAC check and JSON decode.
+    Only tokens that passed verification are ever cached.
+    """
+    
+    ALGORITHM = "HS256"
+    
+    def __init__(self, secret: str, cache_size: int):
+        self.secret = secret
+        self._claims = TTLCache(maxsize=cache_size, ttl=settings.JWT_EXPIRES_MIN * 60)
+    
+    def create(self, sub: str, minutes: Optional[int] = None, token_version: int = 0) -> str:
+        """Issue a signed access token for a subject."""
+        expire = datetime.now(timezone.utc) + timedelta(minutes=minutes or settings.JWT_EXPIRES_MIN)
+        to_encode = {"sub": sub, "exp": expire, "ver": token_version}
+        return jwt.encode(to_encode, self.secret, algorithm=self.ALGORITHM)
+    
+    def verify(self, token: str) -> dict:
+        """
+        Verify a token's signature and expiry and return its claims.
+        
+        Raises:
+            JWTError: If the token is malformed, forged or expired
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        claims = self._claims.get(key)
+        if claims is not None:
+            return dict(claims)
+        
+        claims = jwt.decode(token, self.secret, algorithms=[self.ALGORITHM])
+        
+        # exp is required; jose only checks it when present
+        exp = claims.get("exp")
+        if exp is None:
+            raise JWTError("Token has no expiry")
+        remaining = exp - time.time()
+        if remaining > 0:
+            self._claims.set(key, claims, ttl=remaining)
+        return dict(claims)
+    
+    def clear_cache(self):
+        self._claims.clear()
+
+
+# Global token service instance
+token_service = TokenService(settings.JWT_SECRET, cache_size=settings.TOKEN_CACHE_MAX_ENTRIES)
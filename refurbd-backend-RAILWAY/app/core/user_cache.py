@@ -0,0 +1,71 @@
+"""Short-lived cache of authenticated user principals."""
+from typing import Any, Optional
+import logging
+
+from sqlalchemy import inspect as sa_inspect
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class UserPrincipal:
+    """
+    Read-only snapshot of a ``User`` row's columns.
+    
+    Safe to share between concurrent requests, unlike a detached ORM
+    instance. Writes must go through the database (and then
+    ``user_cache.invalidate``).
+    """
+    
+    def __init__(self, user: User):
+        for attr in sa_inspect(User).mapper.column_attrs:
+            object.__setattr__(self, attr.key, getattr(user, attr.key, None))
+    
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"UserPrincipal is read-only (tried to set {name})")
+    
+    def __repr__(self) -> str:
+        return f"<UserPrincipal id={self.id}>"
+
+
+class UserCache:
+    """
+    Cache of user principals keyed by user ID and token version.
+    
+    A token only hits the cache if its ``ver`` claim matches the cached
+    row's ``token_version``, so bumping the version (password change)
+    invalidates outstanding tokens even on other workers once their
+    entry expires.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    
+    def get(self, user_id: str, token_version: int) -> Optional[UserPrincipal]:
+        principal = self._cache.get(str(user_id))
+        if principal is None or (principal.token_version or 0) != token_version:
+            return None
+        return principal
+    
+    def put(self, user: User) -> UserPrincipal:
+        principal = UserPrincipal(user)
+        self._cache.set(str(user.id), principal)
+        return principal
+    
+    def invalidate(self, user_id: Any):
+        """Drop a user's cached principal after their row changed."""
+        if self._cache.pop(str(user_id)) is not None:
+            logger.debug(f"User cache invalidated: {user_id}")
+    
+    def clear(self):
+        self._cache.clear()
+
+
+# Global user cache instance
+user_cache = UserCache(
+    maxsize=settings.USER_CACHE_MAX_ENTRIES,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
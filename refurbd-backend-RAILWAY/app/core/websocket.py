@@ -1,6 +1,7 @@
 """WebSocket connection manager for real-time updates."""
 from fastapi import WebSocket, WebSocketDisconnect
 from typing import Dict, List
+from uuid import UUID
 import asyncio
 import logging
 
@@ -55,7 +56,7 @@ class ConnectionManager:
         for connection in dead_connections:
             self.disconnect(connection, project_id)
     
-    async def broadcast_to_user(self, user_id: int, message: dict):
+    async def broadcast_to_user(self, user_id: UUID, message: dict):
         """
         Broadcast message to all projects owned by a user.
         
@@ -0,0 +1,78 @@
+"""Base class for in-process background workers that drain a database queue."""
+from abc import ABC, abstractmethod
+from typing import Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PollingWorker(ABC):
+    """
+    Run ``process_batch`` in a loop on the event loop.
+
+    The worker keeps going while batches come back non-empty, then sleeps
+    for ``poll_interval`` seconds or until ``wake()`` is called (e.g. right
+    after something was queued in this process). Queue rows should be
+    claimed with ``FOR UPDATE SKIP LOCKED`` so several app processes can
+    run the same worker safely.
+    """
+
+    name = "worker"
+
+    def __init__(self, poll_interval: float = 5.0):
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @abstractmethod
+    async def process_batch(self) -> int:
+        """Handle one batch of due work. Returns the number of items handled."""
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name=self.name)
+            logger.info(f"{self.name} started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info(f"{self.name} stopped")
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run_until_idle(self) -> int:
+        """Process batches until none is left (for tests and scripts)."""
+        total = 0
+        while True:
+            handled = await self.process_batch()
+            if not handled:
+                return total
+            total += handled
+
+    async def _run(self):
+        while True:
+            try:
+                handled = await self.process_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"{self.name} batch failed: {e}")
+                handled = 0
+
+            if handled:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,34 @@
+"""Explicit loader options for relationships serialized in API responses.
+
+AsyncSession can't lazy-load, so every relationship a response touches
+must be loaded up front. Each option here adds a fixed number of queries
+regardless of how many rows it loads.
+"""
+from sqlalchemy.orm import selectinload
+
+from app.db.models.project import Project
+from app.db.models.rendering import Rendering
+
+# Edit trees are loaded one level (one query) at a time
+MAX_EDIT_DEPTH = 5
+
+
+def project_detail_options():
+    """Project with its renderings: 1 extra query."""
+    return (selectinload(Project.renderings),)
+
+
+def edit_tree_options(depth: int):
+    """
+    Rendering with ``depth`` levels of edits: ``depth`` extra queries.
+
+    Args:
+        depth: Levels of Rendering.edits to load (capped at MAX_EDIT_DEPTH)
+    """
+    depth = min(depth, MAX_EDIT_DEPTH)
+    if depth <= 0:
+        return ()
+    loader = selectinload(Rendering.edits)
+    for _ in range(depth - 1):
+        loader = loader.selectinload(Rendering.edits)
+    return (loader,)
@@ -1,2 +1,9 @@
 from .base import Base
 from .user import User
+# Relationships name their targets as strings, so every mapped class has to be imported with the package
+from .project import Project
+from .rendering import Rendering
+from .job import Job
+from .idempotency_key import IdempotencyKey
+from .email_outbox import EmailOutbox
+from .stripe_event import StripeEvent
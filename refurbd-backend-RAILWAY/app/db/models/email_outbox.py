@@ -0,0 +1,41 @@
+"""Outbound email queue."""
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, Enum as SQLEnum
+from sqlalchemy.sql import func
+from app.db.models.base import Base
+import enum
+
+
+class EmailStatus(str, enum.Enum):
+    """Email delivery states."""
+    PENDING = "pending"
+    SENT = "sent"
+    DEAD = "dead"  # gave up after EMAIL_MAX_ATTEMPTS or a permanent error
+
+
+class EmailOutbox(Base):
+    """An email waiting to be (or already) delivered by the email worker."""
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # The worker's "due messages" scan
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    html_content = Column(Text, nullable=False)
+
+    # Messages with the same batch_key share subject and content and are
+    # sent in one API request (one personalization per recipient)
+    batch_key = Column(String(64), nullable=True)
+
+    # Delivery
+    status = Column(SQLEnum(EmailStatus), default=EmailStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
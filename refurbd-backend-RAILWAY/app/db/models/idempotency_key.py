@@ -0,0 +1,39 @@
+"""Idempotency key model for deduplicating retried POST requests."""
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, UniqueConstraint, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.db.models.base import Base
+import enum
+
+
+class IdempotencyStatus(str, enum.Enum):
+    """Idempotency key states."""
+    IN_FLIGHT = "in_flight"
+    COMPLETED = "completed"
+
+
+class IdempotencyKey(Base):
+    """First response recorded for a client-supplied Idempotency-Key."""
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", "endpoint", name="uq_idempotency_keys_user_key_endpoint"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    endpoint = Column(String(100), nullable=False)
+
+    # SHA-256 of the request parameters; a reused key with a different body is rejected
+    request_hash = Column(String(64), nullable=False)
+    status = Column(SQLEnum(IdempotencyStatus), default=IdempotencyStatus.IN_FLIGHT, nullable=False)
+
+    # Recorded response
+    response_code = Column(Integer, nullable=True)
+    response_body = Column(JSON, nullable=True)
+
+    # Timestamps; an expired row no longer blocks its key (in-flight rows
+    # get a short lease so a crashed request doesn't lock the key for long)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
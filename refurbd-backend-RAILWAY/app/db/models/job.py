@@ -1,7 +1,8 @@
 """Job model for background task tracking."""
 from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, Text, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
-from app.db.base import Base
+from app.db.models.base import Base
 import enum
 from datetime import datetime
 
@@ -22,6 +23,8 @@ class JobType(str, enum.Enum):
     ANALYSIS = "analysis"
     RENDERING = "rendering"
     EDITING = "editing"
+    EXPORT = "export"
+    REPORT = "report"
 
 
 class Job(Base):
@@ -30,7 +33,7 @@ class Job(Base):
     __tablename__ = "jobs"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, index=True, nullable=False)
+    user_id = Column(UUID(as_uuid=True), index=True, nullable=False)
     project_id = Column(Integer, index=True, nullable=True)
     rendering_id = Column(Integer, index=True, nullable=True)
     
@@ -62,7 +65,7 @@ class Job(Base):
         """Convert job to dictionary for API responses."""
         return {
             "id": self.id,
-            "user_id": self.user_id,
+            "user_id": str(self.user_id),
             "project_id": self.project_id,
             "rendering_id": self.rendering_id,
             "type": self.type.value,
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, DateTime, Enum as SQLEnum, JSON
+from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, DateTime, Enum as SQLEnum, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.db.session import Base
+from app.db.models.base import Base
 import enum
 
 
@@ -31,9 +32,13 @@ class ProjectStatus(str, enum.Enum):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # Keyset pagination of a user's projects, newest first
+        Index("ix_projects_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     
     # Project details
     name = Column(String, nullable=False)
@@ -62,6 +67,10 @@ class Project(Base):
     
     # Location-specific pricing
     location_multiplier = Column(Float, default=1.0)
+    pricing_version = Column(String, nullable=True)  # Pricing table version used for the estimate
+    
+    # Last rendering version number handed out (see RenderingVersionService)
+    rendering_version_seq = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
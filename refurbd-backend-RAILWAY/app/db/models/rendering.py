@@ -1,20 +1,30 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Index
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.db.session import Base
+from app.db.models.base import Base
 
 
 class Rendering(Base):
     __tablename__ = "renderings"
+    __table_args__ = (
+        # O(1) "latest rendering of a project" lookup
+        Index("ix_renderings_project_id_is_latest", "project_id", "is_latest"),
+        # Walking edit trees downwards
+        Index("ix_renderings_parent_rendering_id", "parent_rendering_id"),
+        # Listing the sibling variants generated together
+        Index("ix_renderings_variant_group_id", "variant_group_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
     
     # Image details
     image_path = Column(String, nullable=False)
     image_url = Column(String, nullable=True)  # For S3/CDN
     thumbnail_path = Column(String, nullable=True)
+    image_sha256 = Column(String(64), nullable=True)  # hashed while downloading
     
     # Generation details
     prompt_used = Column(Text, nullable=False)
@@ -26,6 +36,10 @@ class Rendering(Base):
     parent_rendering_id = Column(Integer, ForeignKey("renderings.id"), nullable=True)
     is_latest = Column(Boolean, default=True)
     
+    # Style variants generated together share a group; the user picks one
+    variant_group_id = Column(String(36), nullable=True)
+    variant_style = Column(String(100), nullable=True)
+    
     # Metadata
     generation_time_seconds = Column(Integer, nullable=True)
     cost_usd = Column(String, nullable=True)
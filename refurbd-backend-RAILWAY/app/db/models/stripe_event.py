@@ -0,0 +1,43 @@
+"""Received Stripe webhook events, applied asynchronously by the event worker."""
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index, Enum as SQLEnum
+from sqlalchemy.sql import func
+from app.db.models.base import Base
+import enum
+
+
+class StripeEventStatus(str, enum.Enum):
+    """Stripe event processing states."""
+    PENDING = "pending"
+    PROCESSED = "processed"
+    FAILED = "failed"  # gave up after STRIPE_EVENT_MAX_ATTEMPTS
+
+
+class StripeEvent(Base):
+    """A verified Stripe webhook event, stored once per Stripe event ID."""
+
+    __tablename__ = "stripe_events"
+    __table_args__ = (
+        # The worker's "due events" scan and its per-customer ordering check
+        Index("ix_stripe_events_status_next_attempt_at", "status", "next_attempt_at"),
+        Index("ix_stripe_events_customer_id_created", "customer_id", "stripe_created"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String(255), unique=True, nullable=False)
+    type = Column(String(100), nullable=False)
+
+    # Events for the same customer are applied in Stripe's creation order
+    customer_id = Column(String(255), nullable=True)
+    stripe_created = Column(DateTime(timezone=True), nullable=False)
+
+    payload = Column(JSON, nullable=False)
+
+    # Processing
+    status = Column(SQLEnum(StripeEventStatus), default=StripeEventStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    # Timestamps
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,12 +1,44 @@
 
+import enum
 import uuid
-from sqlalchemy import Column, String, DateTime, func
+from sqlalchemy import Column, Integer, String, DateTime, Enum as SQLEnum, func
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
 from app.db.models.base import Base
 
+
+class SubscriptionTier(str, enum.Enum):
+    """Subscription plans; limits per tier live in settings."""
+    FREE = "free"
+    BASIC = "basic"
+    PRO = "pro"
+    ENTERPRISE = "enterprise"
+
+
 class User(Base):
     __tablename__ = "users"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # bump to revoke issued tokens
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Plan and monthly analysis quota (see app/services/quota_service.py)
+    subscription_tier = Column(
+        SQLEnum(SubscriptionTier), nullable=False, default=SubscriptionTier.FREE, server_default="FREE"
+    )
+    analyses_used_this_month = Column(Integer, nullable=False, default=0, server_default="0")
+    last_analysis_reset = Column(DateTime, nullable=True)  # naive UTC, start of the current quota period
+
+    # Billing (written by the Stripe webhook handlers in app/services/stripe_events.py)
+    stripe_customer_id = Column(String, nullable=True)
+    stripe_subscription_id = Column(String, unique=True, index=True, nullable=True)
+    subscription_ends_at = Column(DateTime, nullable=True)
+
+    # Location, for regional cost estimates (see app/services/cost_estimator.py)
+    city = Column(String, nullable=True)
+    state = Column(String, nullable=True)
+    country = Column(String, nullable=True)
+
+    projects = relationship("Project", back_populates="user")
+    renderings = relationship("Rendering", back_populates="user")
@@ -0,0 +1,62 @@
+"""Count SQL statements issued through an engine (for tests and profiling)."""
+from contextlib import contextmanager
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryCounter:
+    """Statements seen while a ``count_queries`` block is active."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries(engine=None):
+    """
+    Record every statement executed on ``engine`` inside the block.
+
+    Usage:
+        with count_queries() as counter:
+            await client.get("/projects/1")
+        assert counter.count == 2
+
+    Args:
+        engine: Engine or AsyncEngine to watch (defaults to the app engine)
+    """
+    if engine is None:
+        from app.db.session import engine
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+
+    counter = QueryCounter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine=None):
+    """
+    Fail if the block issues more than ``limit`` statements.
+
+    Raises:
+        AssertionError: Listing the statements that were executed
+    """
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        statements = "\n".join(f"  {i + 1}. {sql}" for i, sql in enumerate(counter.statements))
+        raise AssertionError(f"Expected at most {limit} queries, got {counter.count}:\n{statements}")
@@ -2,6 +2,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.models.base import Base  # noqa: F401 (one declarative base for every model)
 
 # Ensure asyncpg scheme
 db_url = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
@@ -33,6 +33,37 @@ app.add_middleware(
     https_only=True,
 )
 
+# ---- background workers (opt-in: set EMAIL_WORKER_ENABLED / STRIPE_EVENT_WORKER_ENABLED=true) ----
+def _enabled(name: str) -> bool:
+    return os.getenv(name, "false").lower() == "true"
+
+@app.on_event("startup")
+async def _start_workers():
+    if _enabled("EMAIL_WORKER_ENABLED"):
+        from app.services.email_service import email_worker
+        email_worker.start()
+    if _enabled("STRIPE_EVENT_WORKER_ENABLED"):
+        from app.services.stripe_events import stripe_event_worker
+        stripe_event_worker.start()
+
+@app.on_event("shutdown")
+async def _stop_workers():
+    if _enabled("STRIPE_EVENT_WORKER_ENABLED"):
+        from app.services.stripe_events import stripe_event_worker
+        await stripe_event_worker.stop()
+    if _enabled("EMAIL_WORKER_ENABLED"):
+        from app.services.email_service import email_worker
+        await email_worker.stop()
+        await email_worker.transport.close()
+    from app.services.image_service import image_service
+    image_service.shutdown()
+    from app.services.room_analyzer import room_analyzer
+    from app.services.image_generator import image_generator
+    await room_analyzer.provider.close()
+    await image_generator.provider.close()
+    from app.core.http import http_client
+    await http_client.aclose()
+
 # ---- basic health + env introspection ----
 @app.get("/health")
 @app.get(f"{API_PREFIX}/health")
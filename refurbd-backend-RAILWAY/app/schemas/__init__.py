@@ -1,7 +1,8 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
 from datetime import datetime
-from app.db.models.user import SubscriptionTier, UserRole
+from uuid import UUID
+from app.db.models.user import SubscriptionTier
 from app.db.models.project import RoomType, RenovationScope, ProjectStatus
 
 
@@ -21,9 +22,7 @@ class UserLogin(BaseModel):
 
 
 class UserResponse(UserBase):
-    id: int
-    is_active: bool
-    role: UserRole  # NEW: Role field for frontend
+    id: UUID
     subscription_tier: SubscriptionTier
     analyses_used_this_month: int
     created_at: datetime
@@ -58,13 +57,14 @@ class ProjectCreate(ProjectBase):
 
 class ProjectResponse(ProjectBase):
     id: int
-    user_id: int
+    user_id: UUID
     status: ProjectStatus
     visual_assessment: Optional[str] = None
     design_plan: Optional[str] = None
     timeline_estimate: Optional[str] = None
     estimated_cost_low: Optional[float] = None
     estimated_cost_high: Optional[float] = None
+    pricing_version: Optional[str] = None
     current_room_image: Optional[str] = None
     inspiration_image: Optional[str] = None
     created_at: datetime
@@ -74,10 +74,47 @@ class ProjectResponse(ProjectBase):
         from_attributes = True
 
 
+class ProjectSummary(ProjectBase):
+    """List view of a project, without the large AI text fields."""
+    id: int
+    status: ProjectStatus
+    estimated_cost_low: Optional[float] = None
+    estimated_cost_high: Optional[float] = None
+    current_room_image: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ProjectPage(BaseModel):
+    items: List[ProjectSummary]
+    next_cursor: Optional[str] = None
+
+
 class ProjectWithRenderings(ProjectResponse):
     renderings: List["RenderingResponse"] = []
 
 
+# Timeline Schemas
+class TimelinePhaseResponse(BaseModel):
+    name: str
+    duration: str
+    min_days: int
+    max_days: int
+
+
+class TimelineResponse(BaseModel):
+    scope: RenovationScope
+    room_type: RoomType
+    duration: str
+    min_days: int
+    max_days: int
+    phases: List[TimelinePhaseResponse]
+    note: Optional[str] = None
+
+
 # Rendering Schemas
 class RenderingBase(BaseModel):
     prompt_used: str
@@ -97,17 +134,26 @@ class RenderingResponse(BaseModel):
     image_size: str
     version: int
     is_latest: bool
+    variant_group_id: Optional[str] = None
+    variant_style: Optional[str] = None
     created_at: datetime
     
     class Config:
         from_attributes = True
 
 
+class RenderingWithEdits(RenderingResponse):
+    parent_rendering_id: Optional[int] = None
+    edits: List["RenderingWithEdits"] = []
+
+
 # Analysis Request
 class AnalysisRequest(BaseModel):
     project_id: int
     current_room_description: Optional[str] = None
     budget_constraint: Optional[float] = None
+    # Style variants to render (RENDERING_VARIANTS if omitted; at most the tier's *_MAX_RENDERING_VARIANTS)
+    variants: Optional[int] = Field(None, ge=1)
 
 
 # Rendering Edit Request
@@ -130,3 +176,4 @@ class SubscriptionResponse(BaseModel):
 
 # Update forward refs
 ProjectWithRenderings.model_rebuild()
+RenderingWithEdits.model_rebuild()
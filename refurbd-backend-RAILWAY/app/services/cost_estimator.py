@@ -1,123 +1,140 @@
-from typing import Dict, Tuple
+from dataclasses import asdict, dataclass
+from functools import cached_property, lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import re
+import numpy as np
 from app.db.models.project import RoomType, RenovationScope
+from app.services.pricing_tables import CountryIndex, PricingTableStore, pricing_store
 
 
-class CostEstimator:
-    """Estimates renovation costs based on location, room type, and scope."""
-    
-    # Base rates per square foot (national average, 2024)
-    BASE_RATES = {
-        RoomType.KITCHEN: {
-            RenovationScope.COSMETIC: (50, 100),
-            RenovationScope.MODERATE: (150, 250),
-            RenovationScope.FULL: (300, 500),
-            RenovationScope.LUXURY: (600, 1200),
-        },
-        RoomType.BATHROOM: {
-            RenovationScope.COSMETIC: (75, 125),
-            RenovationScope.MODERATE: (200, 350),
-            RenovationScope.FULL: (400, 600),
-            RenovationScope.LUXURY: (800, 1500),
-        },
-        RoomType.BEDROOM: {
-            RenovationScope.COSMETIC: (30, 60),
-            RenovationScope.MODERATE: (75, 150),
-            RenovationScope.FULL: (150, 300),
-            RenovationScope.LUXURY: (400, 800),
-        },
-        RoomType.LIVING_ROOM: {
-            RenovationScope.COSMETIC: (40, 80),
-            RenovationScope.MODERATE: (100, 200),
-            RenovationScope.FULL: (200, 400),
-            RenovationScope.LUXURY: (500, 1000),
-        },
-        RoomType.DINING_ROOM: {
-            RenovationScope.COSMETIC: (35, 70),
-            RenovationScope.MODERATE: (90, 180),
-            RenovationScope.FULL: (180, 350),
-            RenovationScope.LUXURY: (450, 900),
-        },
-        RoomType.BASEMENT: {
-            RenovationScope.COSMETIC: (40, 90),
-            RenovationScope.MODERATE: (100, 200),
-            RenovationScope.FULL: (200, 450),
-            RenovationScope.LUXURY: (500, 1100),
-        },
-        RoomType.OTHER: {
-            RenovationScope.COSMETIC: (40, 80),
-            RenovationScope.MODERATE: (100, 200),
-            RenovationScope.FULL: (200, 400),
-            RenovationScope.LUXURY: (500, 1000),
-        },
+# Timeline templates per renovation scope: overall duration and phases
+TIMELINES = {
+    RenovationScope.COSMETIC: {
+        "duration": "1-2 weeks",
+        "phases": [
+            ("Planning & Prep", "1-2 days"),
+            ("Painting/Updates", "3-5 days"),
+            ("Finishing", "2-3 days"),
+        ]
+    },
+    RenovationScope.MODERATE: {
+        "duration": "3-6 weeks",
+        "phases": [
+            ("Planning & Permits", "1 week"),
+            ("Demolition", "2-3 days"),
+            ("Installation", "2-3 weeks"),
+            ("Finishing", "1 week"),
+        ]
+    },
+    RenovationScope.FULL: {
+        "duration": "2-4 months",
+        "phases": [
+            ("Planning & Permits", "2-3 weeks"),
+            ("Demolition", "1 week"),
+            ("Rough Installation", "3-4 weeks"),
+            ("Fine Installation", "2-3 weeks"),
+            ("Finishing", "2 weeks"),
+        ]
+    },
+    RenovationScope.LUXURY: {
+        "duration": "4-6 months",
+        "phases": [
+            ("Planning & Design", "4-6 weeks"),
+            ("Permits", "2-4 weeks"),
+            ("Demolition", "1-2 weeks"),
+            ("Custom Work", "8-12 weeks"),
+            ("Installation", "4-6 weeks"),
+            ("Finishing", "2-3 weeks"),
+        ]
     }
+}
+
+# Room-specific notes appended to the timeline
+TIMELINE_NOTES = {
+    RoomType.KITCHEN: "Kitchen projects may require temporary alternative cooking arrangements.",
+    RoomType.BATHROOM: "You may need to use an alternative bathroom during renovation.",
+}
+
+_DURATION = re.compile(r"^(\d+)(?:-(\d+))?\s+(day|week|month)s?$")
+_UNIT_DAYS = {"day": 1, "week": 7, "month": 30}
+
+
+def _parse_duration(label: str) -> Tuple[int, int]:
+    """Parse a label like "2-3 weeks" into (min_days, max_days)."""
+    match = _DURATION.match(label)
+    if not match:
+        raise ValueError(f"Unrecognised duration: {label}")
+    low, high, unit = match.groups()
+    days = _UNIT_DAYS[unit]
+    return int(low) * days, int(high or low) * days
+
+
+@dataclass(frozen=True)
+class TimelinePhase:
+    name: str
+    duration: str
+    min_days: int
+    max_days: int
+
+
+@dataclass(frozen=True)
+class TimelineTemplate:
+    """Immutable timeline for a (scope, room type) pair."""
     
-    # Location multipliers (state-based)
-    LOCATION_MULTIPLIERS = {
-        # High cost areas
-        "CA": 1.35,  # California
-        "NY": 1.30,  # New York
-        "HI": 1.40,  # Hawaii
-        "MA": 1.25,  # Massachusetts
-        "CT": 1.25,  # Connecticut
-        "NJ": 1.25,  # New Jersey
-        "WA": 1.20,  # Washington
-        "CO": 1.15,  # Colorado
-        "OR": 1.15,  # Oregon
-        "MD": 1.15,  # Maryland
-        
-        # Medium cost areas
-        "IL": 1.10,  # Illinois
-        "FL": 1.05,  # Florida
-        "TX": 1.00,  # Texas
-        "AZ": 1.00,  # Arizona
-        "NC": 0.95,  # North Carolina
-        "GA": 0.95,  # Georgia
-        "VA": 1.05,  # Virginia
-        "PA": 1.00,  # Pennsylvania
-        
-        # Lower cost areas
-        "OH": 0.90,  # Ohio
-        "MI": 0.90,  # Michigan
-        "IN": 0.85,  # Indiana
-        "TN": 0.85,  # Tennessee
-        "MO": 0.85,  # Missouri
-        "AL": 0.80,  # Alabama
-        "MS": 0.75,  # Mississippi
-        "AR": 0.80,  # Arkansas
-        "KY": 0.85,  # Kentucky
-        "WV": 0.80,  # West Virginia
-        
-        # Default for unlisted states
-        "DEFAULT": 1.00,
-    }
+    scope: RenovationScope
+    room_type: RoomType
+    duration: str
+    min_days: int
+    max_days: int
+    phases: Tuple[TimelinePhase, ...]
+    note: Optional[str] = None
     
-    # City-specific adjustments (on top of state multiplier)
-    CITY_MULTIPLIERS = {
-        # Major metros
-        "San Francisco": 1.25,
-        "New York": 1.20,
-        "Los Angeles": 1.15,
-        "Seattle": 1.15,
-        "Boston": 1.15,
-        "Washington": 1.10,
-        "San Diego": 1.10,
-        "Denver": 1.10,
-        "Portland": 1.10,
-        "Miami": 1.10,
-        "Chicago": 1.05,
-        "Austin": 1.05,
-        
-        # Mid-size cities
-        "Phoenix": 1.00,
-        "Dallas": 1.00,
-        "Houston": 0.95,
-        "Atlanta": 0.95,
-        "Charlotte": 0.95,
-        "Nashville": 0.95,
-        
-        # Default
-        "DEFAULT": 1.00,
-    }
+    @cached_property
+    def markdown(self) -> str:
+        """Markdown rendering, built on first access and cached."""
+        lines = [f"**Estimated Timeline:** {self.duration}", "", "**Phases:**"]
+        lines.extend(f"- {phase.name}: {phase.duration}" for phase in self.phases)
+        result = "\n".join(lines) + "\n"
+        if self.note:
+            result += f"\n*Note: {self.note}*"
+        return result
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dict (e.g. for Gantt views)."""
+        data = asdict(self)
+        data["scope"] = self.scope.value
+        data["room_type"] = self.room_type.value
+        return data
+
+
+@lru_cache(maxsize=None)
+def get_timeline_template(scope: RenovationScope, room_type: RoomType) -> TimelineTemplate:
+    """Build (once per scope/room type) the timeline template."""
+    if scope not in TIMELINES:
+        scope = RenovationScope.MODERATE
+    info = TIMELINES[scope]
+    min_days, max_days = _parse_duration(info["duration"])
+    return TimelineTemplate(
+        scope=scope,
+        room_type=room_type,
+        duration=info["duration"],
+        min_days=min_days,
+        max_days=max_days,
+        phases=tuple(
+            TimelinePhase(name, label, *_parse_duration(label))
+            for name, label in info["phases"]
+        ),
+        note=TIMELINE_NOTES.get(room_type),
+    )
+
+
+class CostEstimator:
+    """Estimates renovation costs based on location, room type, and scope."""
+    
+    def __init__(self, store: PricingTableStore = pricing_store):
+        # Rates and multipliers live in versioned pricing tables
+        # (app/data/pricing) that are hot-reloaded by the store
+        self.pricing = store
     
     def estimate_cost(
         self,
@@ -126,33 +143,31 @@ class CostEstimator:
         square_footage: float,
         state: str = None,
         city: str = None,
-    ) -> Dict[str, float]:
+        country: str = None,
+    ) -> Dict[str, Any]:
         """
         Calculate renovation cost estimate with location adjustments.
         
         Returns:
-            Dict with cost_low, cost_high, location_multiplier, breakdown
+            Dict with cost_low, cost_high, location_multiplier (country,
+            state and city factors combined), breakdown, currency and the
+            pricing_version the estimate was computed with
         """
         
+        table = self.pricing.current
+        region = table.country(country)
+        
         # Get base rates
-        base_low, base_high = self.BASE_RATES.get(room_type, {}).get(
-            scope, (100, 200)
-        )
+        base_low, base_high = table.rate_for(room_type, scope)
         
-        # Apply location multipliers
-        location_multiplier = 1.0
+        # Apply location multipliers (country, then state and city within it)
+        location_multiplier = region.multiplier
         
         if state:
-            state_multiplier = self.LOCATION_MULTIPLIERS.get(
-                state.upper(), self.LOCATION_MULTIPLIERS["DEFAULT"]
-            )
-            location_multiplier *= state_multiplier
+            location_multiplier *= region.state_multiplier(state)
         
         if city:
-            city_multiplier = self.CITY_MULTIPLIERS.get(
-                city.title(), self.CITY_MULTIPLIERS["DEFAULT"]
-            )
-            location_multiplier *= city_multiplier
+            location_multiplier *= region.city_multiplier(city)
         
         # Calculate total costs
         adjusted_low = base_low * location_multiplier
@@ -161,22 +176,10 @@ class CostEstimator:
         total_low = adjusted_low * square_footage
         total_high = adjusted_high * square_footage
         
-        # Breakdown (typical distribution)
-        materials_pct = 0.45
-        labor_pct = 0.40
-        permits_pct = 0.05
-        contingency_pct = 0.10
-        
-        breakdown = {
-            "materials_low": total_low * materials_pct,
-            "materials_high": total_high * materials_pct,
-            "labor_low": total_low * labor_pct,
-            "labor_high": total_high * labor_pct,
-            "permits_low": total_low * permits_pct,
-            "permits_high": total_high * permits_pct,
-            "contingency_low": total_low * contingency_pct,
-            "contingency_high": total_high * contingency_pct,
-        }
+        breakdown = {}
+        for name, pct in table.breakdown_pcts.items():
+            breakdown[f"{name}_low"] = total_low * pct
+            breakdown[f"{name}_high"] = total_high * pct
         
         return {
             "cost_low": round(total_low, 2),
@@ -185,70 +188,129 @@ class CostEstimator:
             "breakdown": breakdown,
             "per_sqft_low": round(adjusted_low, 2),
             "per_sqft_high": round(adjusted_high, 2),
+            "currency": region.currency,
+            "pricing_version": table.version,
         }
     
-    def get_timeline_estimate(
+    def estimate_costs_bulk(
         self,
-        scope: RenovationScope,
-        room_type: RoomType,
-    ) -> str:
-        """Get estimated timeline for renovation."""
-        
-        timelines = {
-            RenovationScope.COSMETIC: {
-                "duration": "1-2 weeks",
-                "phases": [
-                    ("Planning & Prep", "1-2 days"),
-                    ("Painting/Updates", "3-5 days"),
-                    ("Finishing", "2-3 days"),
-                ]
-            },
-            RenovationScope.MODERATE: {
-                "duration": "3-6 weeks",
-                "phases": [
-                    ("Planning & Permits", "1 week"),
-                    ("Demolition", "2-3 days"),
-                    ("Installation", "2-3 weeks"),
-                    ("Finishing", "1 week"),
-                ]
-            },
-            RenovationScope.FULL: {
-                "duration": "2-4 months",
-                "phases": [
-                    ("Planning & Permits", "2-3 weeks"),
-                    ("Demolition", "1 week"),
-                    ("Rough Installation", "3-4 weeks"),
-                    ("Fine Installation", "2-3 weeks"),
-                    ("Finishing", "2 weeks"),
-                ]
-            },
-            RenovationScope.LUXURY: {
-                "duration": "4-6 months",
-                "phases": [
-                    ("Planning & Design", "4-6 weeks"),
-                    ("Permits", "2-4 weeks"),
-                    ("Demolition", "1-2 weeks"),
-                    ("Custom Work", "8-12 weeks"),
-                    ("Installation", "4-6 weeks"),
-                    ("Finishing", "2-3 weeks"),
-                ]
-            }
-        }
+        room_types: Sequence[RoomType],
+        scopes: Sequence[RenovationScope],
+        square_footages: Sequence[float],
+        states: Optional[Sequence[Optional[str]]] = None,
+        cities: Optional[Sequence[Optional[str]]] = None,
+        countries: Optional[Sequence[Optional[str]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Calculate cost estimates for many rooms in one vectorized pass.
+        
+        Produces the same numbers as ``estimate_cost`` for every row, but
+        returns them column-wise so re-pricing jobs can process whole
+        portfolios without per-project dict building. All rows are priced
+        against the same pricing table version.
+        
+        Args:
+            room_types: Room type per row
+            scopes: Renovation scope per row
+            square_footages: Square footage per row
+            states: Optional state per row (None entries use no adjustment)
+            cities: Optional city per row (None entries use no adjustment)
+            countries: Optional country per row (None entries use the default country)
+        
+        Returns:
+            Dict of equal-length arrays: cost_low, cost_high,
+            location_multiplier, per_sqft_low, per_sqft_high, currency and
+            one ``<category>_low`` / ``<category>_high`` column per breakdown
+            category, plus the scalar pricing_version
+        """
+        count = len(room_types)
+        if len(scopes) != count or len(square_footages) != count:
+            raise ValueError("room_types, scopes and square_footages must have the same length")
+        for name, column in (("states", states), ("cities", cities), ("countries", countries)):
+            if column is not None and len(column) != count:
+                raise ValueError(f"{name} must have the same length as room_types")
         
-        info = timelines.get(scope, timelines[RenovationScope.MODERATE])
+        table = self.pricing.current
         
-        result = f"**Estimated Timeline:** {info['duration']}\n\n"
-        result += "**Phases:**\n"
-        for phase, duration in info['phases']:
-            result += f"- {phase}: {duration}\n"
+        room_idx = np.fromiter(
+            (table.room_position(r) for r in room_types), dtype=np.intp, count=count
+        )
+        scope_idx = np.fromiter(
+            (table.scope_position(s) for s in scopes), dtype=np.intp, count=count
+        )
+        sqft = np.asarray(square_footages, dtype=float)
+        
+        # Resolve each distinct country once, then each distinct (country, name) pair once
+        region_cache = {}
+        regions = []
+        for country in (countries if countries is not None else [None] * count):
+            if country not in region_cache:
+                region_cache[country] = table.country(country)
+            regions.append(region_cache[country])
+        
+        location_multiplier = np.fromiter((r.multiplier for r in regions), dtype=float, count=count)
+        if states is not None:
+            location_multiplier *= self._lookup_multipliers(regions, states, "state_multiplier")
+        if cities is not None:
+            location_multiplier *= self._lookup_multipliers(regions, cities, "city_multiplier")
         
-        # Add room-specific notes
-        if room_type == RoomType.KITCHEN:
-            result += "\n*Note: Kitchen projects may require temporary alternative cooking arrangements.*"
-        elif room_type == RoomType.BATHROOM:
-            result += "\n*Note: You may need to use an alternative bathroom during renovation.*"
+        per_sqft = table.rates[room_idx, scope_idx] * location_multiplier[:, None]
+        totals = per_sqft * sqft[:, None]
+        
+        # (rows, categories, low/high)
+        breakdown_pcts = np.fromiter(table.breakdown_pcts.values(), dtype=float)
+        breakdown = totals[:, None, :] * breakdown_pcts[None, :, None]
+        
+        result = {
+            "cost_low": np.round(totals[:, 0], 2),
+            "cost_high": np.round(totals[:, 1], 2),
+            "location_multiplier": np.round(location_multiplier, 2),
+            "per_sqft_low": np.round(per_sqft[:, 0], 2),
+            "per_sqft_high": np.round(per_sqft[:, 1], 2),
+            "currency": np.array([r.currency for r in regions], dtype=object),
+            "pricing_version": table.version,
+        }
+        for i, name in enumerate(table.breakdown_pcts):
+            result[f"{name}_low"] = breakdown[:, i, 0]
+            result[f"{name}_high"] = breakdown[:, i, 1]
         
         return result
+    
+    def _lookup_multipliers(
+        self,
+        regions: List[CountryIndex],
+        keys: Sequence[Optional[str]],
+        lookup: str,
+    ) -> np.ndarray:
+        """Map location names to multipliers, resolving each distinct pair only once."""
+        cache = {}
+        values = np.ones(len(keys))
+        for i, (region, key) in enumerate(zip(regions, keys)):
+            if not key:
+                continue
+            pair = (region.code, key)
+            if pair not in cache:
+                cache[pair] = getattr(region, lookup)(key)
+            values[i] = cache[pair]
+        return values
+    
+    def get_timeline(
+        self,
+        scope: RenovationScope,
+        room_type: RoomType,
+    ) -> TimelineTemplate:
+        """Get the precomputed, structured timeline for a scope and room type."""
+        
+        return get_timeline_template(scope, room_type)
+    
+    def get_timeline_estimate(
+        self,
+        scope: RenovationScope,
+        room_type: RoomType,
+    ) -> str:
+        """Get estimated timeline for renovation as markdown."""
+        
+        return get_timeline_template(scope, room_type).markdown
 
 
 # Singleton instance
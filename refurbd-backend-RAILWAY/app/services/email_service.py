@@ -1,62 +1,57 @@
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email, To, Content
-from typing import List, Optional
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+import asyncio
+import logging
+import random
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.core.config import settings
+from app.core.workers import PollingWorker
+from app.db.session import SessionLocal
+from app.db.models.email_outbox import EmailOutbox, EmailStatus
+from app.db.models.project import Project
+from app.db.models.user import User
+from app.services.email_templates import email_templates
+from app.services.quota_service import quota_service
+from app.services.email_transport import (
+    EmailDeliveryError, OutgoingEmail, MAX_RECIPIENTS_PER_REQUEST, create_transport
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UsageDigest:
+    """Per-recipient fields of a usage digest email."""
+    to_email: str
+    user_name: Optional[str]
+    tier: str
+    analyses_used: int
+    projects_completed: int
+    locale: Optional[str] = None
 
 
 class EmailService:
-    """Send emails using SendGrid."""
+    """
+    Compose emails and queue them for delivery.
     
-    def __init__(self):
-        self.client = SendGridAPIClient(settings.SENDGRID_API_KEY)
-        self.from_email = Email(settings.FROM_EMAIL)
+    Bodies come from precompiled templates (see email_templates), so a
+    send only fills in per-recipient fields. Messages are written to the
+    email_outbox table and sent by EmailDeliveryWorker, so callers only
+    pay for one INSERT.
+    """
     
-    async def send_welcome_email(self, to_email: str, user_name: str):
+    async def send_welcome_email(self, to_email: str, user_name: str, locale: Optional[str] = None):
         """Send welcome email to new users."""
         
-        subject = "Welcome to Home Renovation AI! 🏠"
-        
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h1 style="color: #2563eb;">Welcome to Home Renovation AI!</h1>
-                
-                <p>Hi {user_name or 'there'},</p>
-                
-                <p>We're excited to help you transform your space! Here's what you can do with your free account:</p>
-                
-                <ul>
-                    <li>✅ 2 room analyses per month</li>
-                    <li>✅ AI-powered design recommendations</li>
-                    <li>✅ Budget estimates based on your location</li>
-                    <li>✅ Timeline planning</li>
-                    <li>✅ Basic renderings of your renovated space</li>
-                </ul>
-                
-                <p><strong>Ready to get started?</strong></p>
-                
-                <div style="margin: 30px 0;">
-                    <a href="{settings.FRONTEND_URL}/projects/new" 
-                       style="background-color: #2563eb; color: white; padding: 12px 24px; 
-                              text-decoration: none; border-radius: 5px; display: inline-block;">
-                        Create Your First Project
-                    </a>
-                </div>
-                
-                <p>Need more features? Check out our <a href="{settings.FRONTEND_URL}/pricing">Premium Plans</a>.</p>
-                
-                <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 30px 0;">
-                
-                <p style="font-size: 14px; color: #6b7280;">
-                    Questions? Reply to this email or visit our 
-                    <a href="{settings.FRONTEND_URL}/help">Help Center</a>.
-                </p>
-            </div>
-        </body>
-        </html>
-        """
-        
+        subject, html_content = email_templates.render(
+            "welcome", "free", locale,
+            user_name=user_name or "there"
+        )
         await self._send_email(to_email, subject, html_content)
     
     async def send_analysis_complete_email(
@@ -65,49 +60,17 @@ class EmailService:
         user_name: str,
         project_name: str,
         project_id: int,
+        tier: str = "free",
+        locale: Optional[str] = None,
     ):
         """Send notification when analysis is complete."""
         
-        subject = f"Your {project_name} Analysis is Ready! 🎨"
-        
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h1 style="color: #2563eb;">Your Renovation Plan is Ready!</h1>
-                
-                <p>Hi {user_name or 'there'},</p>
-                
-                <p>Great news! We've completed the analysis for your <strong>{project_name}</strong> project.</p>
-                
-                <p>Your personalized plan includes:</p>
-                <ul>
-                    <li>📊 Detailed design recommendations</li>
-                    <li>💰 Location-based budget breakdown</li>
-                    <li>⏱️ Timeline with phases</li>
-                    <li>🎨 Photorealistic rendering of your renovated space</li>
-                </ul>
-                
-                <div style="margin: 30px 0;">
-                    <a href="{settings.FRONTEND_URL}/projects/{project_id}" 
-                       style="background-color: #2563eb; color: white; padding: 12px 24px; 
-                              text-decoration: none; border-radius: 5px; display: inline-block;">
-                        View Your Renovation Plan
-                    </a>
-                </div>
-                
-                <p>You can make edits to the rendering or export your plan to PDF.</p>
-                
-                <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 30px 0;">
-                
-                <p style="font-size: 14px; color: #6b7280;">
-                    Happy renovating! 🛠️
-                </p>
-            </div>
-        </body>
-        </html>
-        """
-        
+        subject, html_content = email_templates.render(
+            "analysis_complete", tier, locale,
+            user_name=user_name or "there",
+            project_name=project_name,
+            project_id=project_id
+        )
         await self._send_email(to_email, subject, html_content)
     
     async def send_subscription_confirmation_email(
@@ -115,90 +78,271 @@ class EmailService:
         to_email: str,
         user_name: str,
         tier: str,
+        locale: Optional[str] = None,
     ):
         """Send subscription confirmation email."""
         
-        subject = f"Welcome to {tier.title()} Plan! 🎉"
+        subject, html_content = email_templates.render(
+            "subscription_confirmation", tier.lower(), locale,
+            user_name=user_name or "there"
+        )
+        await self._send_email(to_email, subject, html_content)
+    
+    async def send_usage_digests(self, digests: Iterable[UsageDigest], period: str) -> int:
+        """
+        Queue usage digest emails.
         
-        features = {
-            "basic": [
-                "10 room analyses per month",
-                "High-resolution renderings (1024x1024)",
-                "Detailed design plans",
-                "Location-based pricing",
-                "Unlimited rendering edits",
-                "Email support",
-            ],
-            "pro": [
-                "Unlimited room analyses",
-                "Ultra-HD renderings (1792x1024)",
-                "Premium design consultation",
-                "3D floor plans",
-                "Contractor matching",
-                "Priority support",
-                "PDF export",
-            ]
-        }
+        Each message only fills the per-recipient fields of a precompiled
+        template, and all of them are queued in one transaction.
         
-        feature_list = features.get(tier.lower(), features["basic"])
-        features_html = "".join([f"<li>✅ {feature}</li>" for feature in feature_list])
+        Args:
+            digests: One entry per recipient
+            period: Label for the period covered, e.g. "October 2026"
+            
+        Returns:
+            Number of messages queued
+        """
+        messages = []
+        for digest in digests:
+            subject, html_content = email_templates.render(
+                "usage_digest", digest.tier, digest.locale,
+                user_name=digest.user_name or "there",
+                period=period,
+                analyses_used=digest.analyses_used,
+                projects_completed=digest.projects_completed
+            )
+            messages.append((digest.to_email, subject, html_content))
+        return await self._enqueue_messages(messages)
+    
+    async def send_monthly_usage_digests(self, db: AsyncSession, batch_size: int = 500) -> int:
+        """
+        Queue a usage digest for every user.
+        
+        Users are read in keyset-paginated batches so memory stays flat.
         
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h1 style="color: #2563eb;">Welcome to {tier.title()} Plan!</h1>
-                
-                <p>Hi {user_name or 'there'},</p>
-                
-                <p>Thank you for upgrading! You now have access to:</p>
-                
-                <ul>
-                    {features_html}
-                </ul>
-                
-                <div style="margin: 30px 0;">
-                    <a href="{settings.FRONTEND_URL}/projects/new" 
-                       style="background-color: #2563eb; color: white; padding: 12px 24px; 
-                              text-decoration: none; border-radius: 5px; display: inline-block;">
-                        Start New Project
-                    </a>
-                </div>
-                
-                <p>Your subscription will renew automatically. You can manage your subscription 
-                   in your <a href="{settings.FRONTEND_URL}/account">account settings</a>.</p>
-                
-                <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 30px 0;">
-                
-                <p style="font-size: 14px; color: #6b7280;">
-                    Questions? We're here to help at support@yourdomain.com
-                </p>
-            </div>
-        </body>
-        </html>
+        Returns:
+            Number of messages queued
         """
+        now = datetime.utcnow()
+        since = now - quota_service.PERIOD
+        completed = (
+            select(Project.user_id, func.count(Project.id).label("projects_completed"))
+            .where(Project.completed_at >= since)
+            .group_by(Project.user_id)
+            .subquery()
+        )
         
-        await self._send_email(to_email, subject, html_content)
+        queued = 0
+        last_id = None
+        while True:
+            query = (
+                select(
+                    User.id,
+                    User.email,
+                    User.subscription_tier,
+                    User.analyses_used_this_month,
+                    User.last_analysis_reset,
+                    func.coalesce(completed.c.projects_completed, 0)
+                )
+                .outerjoin(completed, completed.c.user_id == User.id)
+                .order_by(User.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                query = query.where(User.id > last_id)
+            rows = (await db.execute(query)).all()
+            if not rows:
+                return queued
+            
+            digests = []
+            for user_id, email, tier, used, last_reset, projects_completed in rows:
+                if last_reset is None or last_reset <= since:
+                    used = 0
+                digests.append(UsageDigest(
+                    to_email=email,
+                    user_name=None,
+                    tier=tier.value,
+                    analyses_used=used or 0,
+                    projects_completed=projects_completed
+                ))
+            queued += await self.send_usage_digests(digests, period=f"{now:%B %Y}")
+            last_id = rows[-1][0]
+    
+    async def send_bulk_email(self, recipients: List[str], subject: str, html_content: str) -> int:
+        """
+        Queue the same email to many recipients.
+        
+        The worker sends it as one API request per 1000 recipients, each
+        recipient in its own personalization.
+        
+        Returns:
+            Number of messages queued
+        """
+        return await self._enqueue(recipients, subject, html_content)
     
     async def _send_email(self, to_email: str, subject: str, html_content: str):
-        """Internal method to send email via SendGrid."""
+        """Queue a single email."""
+        await self._enqueue([to_email], subject, html_content)
+    
+    async def _enqueue(self, recipients: List[str], subject: str, html_content: str) -> int:
+        batch_key = uuid4().hex if len(recipients) > 1 else None
+        return await self._enqueue_messages(
+            [(to_email, subject, html_content) for to_email in recipients],
+            batch_key=batch_key
+        )
+    
+    async def _enqueue_messages(
+        self,
+        messages: List[Tuple[str, str, str]],
+        batch_key: Optional[str] = None
+    ) -> int:
+        """Insert (to_email, subject, html_content) messages into the outbox in one transaction."""
+        if not messages:
+            return 0
         try:
-            message = Mail(
-                from_email=self.from_email,
-                to_emails=To(to_email),
-                subject=subject,
-                html_content=Content("text/html", html_content)
-            )
-            
-            response = self.client.send(message)
-            
-            if response.status_code not in [200, 201, 202]:
-                print(f"SendGrid error: {response.status_code} - {response.body}")
-            
+            async with SessionLocal() as db:
+                db.add_all([
+                    EmailOutbox(
+                        to_email=to_email,
+                        subject=subject,
+                        html_content=html_content,
+                        batch_key=batch_key
+                    )
+                    for to_email, subject, html_content in messages
+                ])
+                await db.commit()
         except Exception as e:
-            print(f"Error sending email: {e}")
             # Don't raise - email failures shouldn't break the app
+            logger.error(f"Error queueing {len(messages)} email(s): {e}")
+            return 0
+        
+        email_worker.wake()
+        return len(messages)
+
+
+class EmailDeliveryWorker(PollingWorker):
+    """
+    Drain email_outbox through the configured transport.
+    
+    Due messages are claimed with FOR UPDATE SKIP LOCKED and leased by
+    pushing next_attempt_at EMAIL_LEASE_SECONDS ahead, in a transaction
+    that commits before anything is sent; if the process dies mid-send the
+    messages become due again when the lease runs out. They are grouped by
+    batch_key and sent concurrently, and the results are written in a
+    second short transaction. Failures are retried with exponential
+    backoff (EMAIL_RETRY_BASE_SECONDS doubling up to
+    EMAIL_RETRY_MAX_SECONDS, with jitter); after EMAIL_MAX_ATTEMPTS, or on
+    an error a retry can't fix, a message is marked DEAD and kept for
+    inspection.
+    """
+    
+    name = "email-delivery-worker"
+    
+    def __init__(self, transport, batch_size: int, max_attempts: int, poll_interval: float, lease_seconds: float):
+        super().__init__(poll_interval=poll_interval)
+        self.transport = transport
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+    
+    async def process_batch(self) -> int:
+        messages = await self._claim()
+        if not messages:
+            return 0
+        
+        groups: Dict[str, List[EmailOutbox]] = {}
+        for message in messages:
+            groups.setdefault(message.batch_key or f"id:{message.id}", []).append(message)
+        
+        batches = []
+        for group in groups.values():
+            for i in range(0, len(group), MAX_RECIPIENTS_PER_REQUEST):
+                batches.append(group[i:i + MAX_RECIPIENTS_PER_REQUEST])
+        
+        # No transaction or connection is held while the transport is called
+        failures = await asyncio.gather(*(self._deliver(batch) for batch in batches))
+        await self._record(list(zip(batches, failures)))
+        return len(messages)
+    
+    async def _claim(self) -> List[EmailOutbox]:
+        """Lease up to batch_size due messages and commit. Returns them detached."""
+        now = datetime.now(timezone.utc)
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(EmailOutbox)
+                .where(
+                    EmailOutbox.status == EmailStatus.PENDING,
+                    EmailOutbox.next_attempt_at <= now
+                )
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            messages = result.scalars().all()
+            lease_until = now + timedelta(seconds=self.lease_seconds)
+            for message in messages:
+                message.next_attempt_at = lease_until
+            await db.commit()
+            return messages
+    
+    async def _deliver(self, batch: List[EmailOutbox]) -> Optional[Tuple[str, bool]]:
+        """Send one batch. Returns None on success, else (error, retryable)."""
+        first = batch[0]
+        email = OutgoingEmail(
+            subject=first.subject,
+            html_content=first.html_content,
+            recipients=[message.to_email for message in batch]
+        )
+        try:
+            await self.transport.send(email)
+        except EmailDeliveryError as e:
+            return str(e), e.retryable
+        except Exception as e:
+            return str(e), True
+        return None
+    
+    async def _record(self, outcomes: List[Tuple[List[EmailOutbox], Optional[Tuple[str, bool]]]]):
+        """Write delivery results for leased messages in one transaction."""
+        ids = [message.id for batch, _ in outcomes for message in batch]
+        async with SessionLocal() as db:
+            result = await db.execute(select(EmailOutbox).where(EmailOutbox.id.in_(ids)))
+            rows = {message.id: message for message in result.scalars()}
+            sent_at = datetime.now(timezone.utc)
+            for batch, failure in outcomes:
+                messages = [rows[message.id] for message in batch if message.id in rows]
+                if failure:
+                    self._failed(messages, *failure)
+                    continue
+                for message in messages:
+                    message.status = EmailStatus.SENT
+                    message.attempts += 1
+                    message.sent_at = sent_at
+                    message.last_error = None
+            await db.commit()
+    
+    def _failed(self, batch: List[EmailOutbox], error: str, retryable: bool):
+        now = datetime.now(timezone.utc)
+        for message in batch:
+            message.attempts += 1
+            message.last_error = error
+            if not retryable or message.attempts >= self.max_attempts:
+                message.status = EmailStatus.DEAD
+                logger.error(f"Email {message.id} dead after {message.attempts} attempt(s): {error}")
+                continue
+            delay = min(
+                settings.EMAIL_RETRY_MAX_SECONDS,
+                settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (message.attempts - 1)
+            )
+            message.next_attempt_at = now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+        logger.warning(f"Email delivery failed for {len(batch)} message(s): {error}")
 
 
-# Singleton instance
+# Singleton instances
 email_service = EmailService()
+email_worker = EmailDeliveryWorker(
+    create_transport(),
+    batch_size=settings.EMAIL_BATCH_SIZE,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    poll_interval=settings.EMAIL_POLL_INTERVAL_SECONDS,
+    lease_seconds=settings.EMAIL_LEASE_SECONDS,
+)
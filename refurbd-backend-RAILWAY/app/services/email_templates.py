@@ -0,0 +1,320 @@
+"""
+Email templates, compiled once per template, tier and locale.
+
+Compiling substitutes everything that doesn't depend on the recipient:
+the shared layout, localized copy, links and the tier's feature list
+(built from ``Settings``, so it can't drift from the real limits). What's
+left is a ``string.Template`` with only per-recipient fields such as
+``$user_name`` or ``$project_name``, so rendering a message at send time
+is a single ``substitute()`` call.
+
+Localized copy may use those per-recipient fields as well as the static
+fields below (``$tier_name``, ``$analyses_limit``, ``$image_size``,
+``$frontend_url``, ``$support_email``); a literal dollar sign is ``$$``.
+"""
+from dataclasses import dataclass
+from html import escape
+from string import Template
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from app.core.config import settings
+from app.services.quota_service import quota_service
+
+logger = logging.getLogger(__name__)
+
+LAYOUT = """<html>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+    <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+        <h1 style="color: #2563eb;">$heading</h1>
+
+        <p>$greeting</p>
+
+        $content
+
+        <div style="margin: 30px 0;">
+            <a href="$frontend_url$cta_path"
+               style="background-color: #2563eb; color: white; padding: 12px 24px;
+                      text-decoration: none; border-radius: 5px; display: inline-block;">
+                $cta_label
+            </a>
+        </div>
+
+        $after_cta
+
+        <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 30px 0;">
+
+        <p style="font-size: 14px; color: #6b7280;">
+            $footer
+        </p>
+    </div>
+</body>
+</html>
+"""
+
+
+@dataclass(frozen=True)
+class EmailTemplate:
+    """The parts of one email, in Template syntax over the localized copy."""
+    subject: str
+    heading: str
+    content: str
+    cta_label: str
+    cta_path: str
+    after_cta: str
+    footer: str
+
+
+TEMPLATES: Dict[str, EmailTemplate] = {
+    "welcome": EmailTemplate(
+        subject="$welcome_subject",
+        heading="$welcome_heading",
+        content="<p>$welcome_intro</p>\n        <ul>$features</ul>\n        <p><strong>$welcome_ready</strong></p>",
+        cta_label="$cta_first_project",
+        cta_path="/projects/new",
+        after_cta="<p>$welcome_upgrade</p>",
+        footer="$footer_help",
+    ),
+    "analysis_complete": EmailTemplate(
+        subject="$analysis_subject",
+        heading="$analysis_heading",
+        content="<p>$analysis_intro</p>\n        <p>$analysis_includes</p>\n        <ul>$analysis_items</ul>",
+        cta_label="$cta_view_plan",
+        cta_path="/projects/$project_id",
+        after_cta="<p>$analysis_next_steps</p>",
+        footer="$footer_happy_renovating",
+    ),
+    "subscription_confirmation": EmailTemplate(
+        subject="$subscription_subject",
+        heading="$subscription_heading",
+        content="<p>$subscription_intro</p>\n        <ul>$features</ul>",
+        cta_label="$cta_new_project",
+        cta_path="/projects/new",
+        after_cta="<p>$subscription_renewal</p>",
+        footer="$footer_support",
+    ),
+    "usage_digest": EmailTemplate(
+        subject="$digest_subject",
+        heading="$digest_heading",
+        content="<p>$digest_usage</p>\n        <p>$digest_projects</p>",
+        cta_label="$cta_dashboard",
+        cta_path="/projects",
+        after_cta="<p>$digest_upgrade</p>",
+        footer="$footer_help",
+    ),
+}
+
+# Feature list per tier, as copy keys (looked up as "feature_<key>")
+TIER_FEATURES: Dict[str, List[str]] = {
+    "free": ["analyses", "design_recommendations", "location_budget", "timeline", "rendering"],
+    "basic": ["analyses", "hd_rendering", "design_plans", "location_pricing", "unlimited_edits", "email_support"],
+    "pro": [
+        "analyses", "uhd_rendering", "design_consultation", "floor_plans",
+        "contractor_matching", "priority_support", "pdf_export",
+    ],
+    "enterprise": [
+        "analyses", "uhd_rendering", "design_consultation", "floor_plans",
+        "contractor_matching", "priority_support", "pdf_export",
+    ],
+}
+
+# Tiers that include PDF report export (see projects._require_pdf_export)
+PDF_EXPORT_TIERS = {"pro", "enterprise"}
+
+STRINGS: Dict[str, Dict[str, str]] = {
+    "en": {
+        "greeting": "Hi $user_name,",
+        "tier_free": "Free",
+        "tier_basic": "Basic",
+        "tier_pro": "Pro",
+        "tier_enterprise": "Enterprise",
+
+        "welcome_subject": "Welcome to Home Renovation AI! 🏠",
+        "welcome_heading": "Welcome to Home Renovation AI!",
+        "welcome_intro": "We're excited to help you transform your space! Here's what you can do with your $tier_name account:",
+        "welcome_ready": "Ready to get started?",
+        "welcome_upgrade": 'Need more features? Check out our <a href="$frontend_url/pricing">Premium Plans</a>.',
+
+        "analysis_subject": "Your $project_name Analysis is Ready! 🎨",
+        "analysis_heading": "Your Renovation Plan is Ready!",
+        "analysis_intro": "Great news! We've completed the analysis for your <strong>$project_name</strong> project.",
+        "analysis_includes": "Your personalized plan includes:",
+        "analysis_items": (
+            "<li>📊 Detailed design recommendations</li>"
+            "<li>💰 Location-based budget breakdown</li>"
+            "<li>⏱️ Timeline with phases</li>"
+            "<li>🎨 Photorealistic rendering of your renovated space</li>"
+        ),
+        "analysis_next_steps": "You can make edits to the rendering.",
+        "analysis_next_steps_pdf": "You can make edits to the rendering or export your plan to PDF.",
+
+        "subscription_subject": "Welcome to $tier_name Plan! 🎉",
+        "subscription_heading": "Welcome to $tier_name Plan!",
+        "subscription_intro": "Thank you for upgrading! You now have access to:",
+        "subscription_renewal": (
+            "Your subscription will renew automatically. You can manage your subscription "
+            'in your <a href="$frontend_url/account">account settings</a>.'
+        ),
+
+        "digest_subject": "Your renovation summary for $period",
+        "digest_heading": "Your Month in Renovation",
+        "digest_usage": "You've used <strong>$analyses_used</strong> of your $analyses_limit room analyses this period.",
+        "digest_usage_unlimited": "You ran <strong>$analyses_used</strong> room analyses this period.",
+        "digest_projects": "Projects completed: <strong>$projects_completed</strong>.",
+        "digest_upgrade": 'Need more analyses? See our <a href="$frontend_url/pricing">plans</a>.',
+        "digest_upgrade_unlimited": "",
+
+        "cta_first_project": "Create Your First Project",
+        "cta_view_plan": "View Your Renovation Plan",
+        "cta_new_project": "Start New Project",
+        "cta_dashboard": "Go to Your Projects",
+
+        "footer_help": 'Questions? Reply to this email or visit our <a href="$frontend_url/help">Help Center</a>.',
+        "footer_happy_renovating": "Happy renovating! 🛠️",
+        "footer_support": "Questions? We're here to help at $support_email",
+
+        "feature_analyses": "$analyses_limit room analyses per month",
+        "feature_analyses_unlimited": "Unlimited room analyses",
+        "feature_design_recommendations": "AI-powered design recommendations",
+        "feature_location_budget": "Budget estimates based on your location",
+        "feature_timeline": "Timeline planning",
+        "feature_rendering": "Renderings of your renovated space ($image_size)",
+        "feature_hd_rendering": "High-resolution renderings ($image_size)",
+        "feature_uhd_rendering": "Ultra-HD renderings ($image_size)",
+        "feature_design_plans": "Detailed design plans",
+        "feature_location_pricing": "Location-based pricing",
+        "feature_unlimited_edits": "Unlimited rendering edits",
+        "feature_email_support": "Email support",
+        "feature_design_consultation": "Premium design consultation",
+        "feature_floor_plans": "3D floor plans",
+        "feature_contractor_matching": "Contractor matching",
+        "feature_priority_support": "Priority support",
+        "feature_pdf_export": "PDF export",
+    },
+}
+
+
+def _partial(text: str, values: Dict[str, str]) -> str:
+    """``safe_substitute`` that keeps ``$$`` escaped for the next pass."""
+    return Template(text.replace("$$", "\0")).safe_substitute(values).replace("\0", "$$")
+
+
+@dataclass(frozen=True)
+class CompiledEmail:
+    """A template with everything but the per-recipient fields filled in."""
+    subject: Template
+    html: Template
+
+    def render(self, fields: Dict[str, object]) -> Tuple[str, str]:
+        """
+        Fill in per-recipient fields.
+
+        Values are HTML-escaped in the body (not in the subject).
+
+        Raises:
+            KeyError: If a field the template uses is missing
+        """
+        subject = self.subject.substitute({k: str(v) for k, v in fields.items()})
+        html = self.html.substitute({k: escape(str(v)) for k, v in fields.items()})
+        return subject, html
+
+
+class EmailTemplates:
+    """Compiled templates for every template, tier and locale."""
+
+    def __init__(self, default_locale: str = "en"):
+        self.default_locale = default_locale if default_locale in STRINGS else "en"
+        self._compiled: Dict[Tuple[str, str, str], CompiledEmail] = {}
+        for name in TEMPLATES:
+            for tier in TIER_FEATURES:
+                for locale in STRINGS:
+                    self._compiled[(name, tier, locale)] = self._compile(name, tier, locale)
+        logger.info(f"Compiled {len(self._compiled)} email templates")
+
+    def resolve_locale(self, locale: Optional[str]) -> str:
+        """Best available locale: exact match, then language (``en-AU`` -> ``en``), then the default."""
+        if locale:
+            if locale in STRINGS:
+                return locale
+            language = locale.replace("_", "-").split("-")[0].lower()
+            if language in STRINGS:
+                return language
+        return self.default_locale
+
+    def get(self, name: str, tier: str = "free", locale: Optional[str] = None) -> CompiledEmail:
+        """
+        Compiled template for a tier and locale.
+
+        Unknown tiers fall back to the free tier.
+
+        Raises:
+            KeyError: If there is no template called ``name``
+        """
+        if tier not in TIER_FEATURES:
+            tier = "free"
+        return self._compiled[(name, tier, self.resolve_locale(locale))]
+
+    def render(
+        self,
+        name: str,
+        tier: str = "free",
+        locale: Optional[str] = None,
+        **fields
+    ) -> Tuple[str, str]:
+        """
+        Render a template for one recipient.
+
+        Returns:
+            (subject, html_content)
+        """
+        return self.get(name, tier, locale).render(fields)
+
+    def _compile(self, name: str, tier: str, locale: str) -> CompiledEmail:
+        limit = quota_service.limit_for_tier(tier)
+        image_sizes = {
+            "free": settings.FREE_IMAGE_SIZE,
+            "basic": settings.BASIC_IMAGE_SIZE,
+            "pro": settings.PRO_IMAGE_SIZE,
+            "enterprise": settings.ENTERPRISE_IMAGE_SIZE,
+        }
+        static = {
+            "frontend_url": settings.FRONTEND_URL,
+            "support_email": settings.SUPPORT_EMAIL,
+            "tier_name": STRINGS[locale][f"tier_{tier}"],
+            "analyses_limit": str(limit) if limit is not None else "",
+            "image_size": image_sizes[tier],
+        }
+        copy = {
+            key: _partial(value, static)
+            for key, value in STRINGS[locale].items()
+        }
+
+        # Tier-dependent fragments
+        feature_keys = []
+        for feature in TIER_FEATURES[tier]:
+            if feature == "analyses" and limit is None:
+                feature = "analyses_unlimited"
+            feature_keys.append(f"feature_{feature}")
+        copy["features"] = "".join(f"<li>✅ {copy[key]}</li>" for key in feature_keys)
+        if limit is None:
+            copy["digest_usage"] = copy["digest_usage_unlimited"]
+            copy["digest_upgrade"] = copy["digest_upgrade_unlimited"]
+        if tier in PDF_EXPORT_TIERS:
+            copy["analysis_next_steps"] = copy["analysis_next_steps_pdf"]
+
+        spec = TEMPLATES[name]
+        parts = {
+            field: _partial(getattr(spec, field), copy)
+            for field in ("heading", "content", "cta_label", "cta_path", "after_cta", "footer")
+        }
+        parts["greeting"] = copy["greeting"]
+        html = _partial(LAYOUT, {**static, **parts})
+
+        return CompiledEmail(
+            subject=Template(_partial(spec.subject, copy)),
+            html=Template(html),
+        )
+
+
+# Global templates instance (compiled on import)
+email_templates = EmailTemplates(settings.EMAIL_DEFAULT_LOCALE)
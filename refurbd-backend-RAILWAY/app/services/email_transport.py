@@ -0,0 +1,118 @@
+"""Email transports used by the email delivery worker."""
+from dataclasses import dataclass, field
+from typing import List, Optional
+import logging
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# SendGrid accepts up to 1000 personalizations per request
+MAX_RECIPIENTS_PER_REQUEST = 1000
+
+
+class EmailDeliveryError(Exception):
+    """A send failed; ``retryable`` is False for errors a retry can't fix."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass
+class OutgoingEmail:
+    """One message to one or more recipients (sent as separate personalizations)."""
+    subject: str
+    html_content: str
+    recipients: List[str] = field(default_factory=list)
+
+
+class SendGridTransport:
+    """Send through the SendGrid v3 Mail Send API with a pooled async HTTP client."""
+
+    def __init__(self, api_key: str, from_email: str, base_url: str = "https://api.sendgrid.com"):
+        self.api_key = api_key
+        self.from_email = from_email
+        self.base_url = base_url
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(15.0, connect=5.0),
+            )
+        return self._client
+
+    async def send(self, email: OutgoingEmail):
+        """
+        Send one message.
+
+        Raises:
+            EmailDeliveryError: retryable for network errors, 429 and 5xx
+        """
+        payload = {
+            "personalizations": [{"to": [{"email": to}]} for to in email.recipients],
+            "from": {"email": self.from_email},
+            "subject": email.subject,
+            "content": [{"type": "text/html", "value": email.html_content}],
+        }
+        try:
+            response = await self.client.post("/v3/mail/send", json=payload)
+        except httpx.HTTPError as e:
+            raise EmailDeliveryError(f"SendGrid request failed: {e}")
+
+        if response.status_code in (200, 201, 202):
+            return
+        retryable = response.status_code == 429 or response.status_code >= 500
+        raise EmailDeliveryError(
+            f"SendGrid error: {response.status_code} - {response.text[:500]}",
+            retryable=retryable,
+        )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class FakeEmailTransport:
+    """
+    Keep sent messages in memory instead of delivering them.
+
+    For local development and tests; ``fail_next`` makes the next sends
+    raise so retry and dead-letter handling can be exercised.
+    """
+
+    def __init__(self):
+        self.sent: List[OutgoingEmail] = []
+        self._failures: List[EmailDeliveryError] = []
+
+    def fail_next(self, count: int = 1, retryable: bool = True):
+        self._failures.extend(
+            EmailDeliveryError("Simulated failure", retryable=retryable) for _ in range(count)
+        )
+
+    async def send(self, email: OutgoingEmail):
+        if self._failures:
+            raise self._failures.pop(0)
+        self.sent.append(email)
+        logger.info(f"[fake email] {email.subject!r} to {len(email.recipients)} recipient(s)")
+
+    async def close(self):
+        pass
+
+
+def create_transport():
+    """Transport selected by EMAIL_TRANSPORT (sendgrid | fake)."""
+    if settings.EMAIL_TRANSPORT == "fake":
+        return FakeEmailTransport()
+    return SendGridTransport(
+        settings.SENDGRID_API_KEY,
+        settings.FROM_EMAIL,
+        base_url=settings.SENDGRID_API_BASE,
+    )
@@ -0,0 +1,348 @@
+"""Bulk export of a user's projects, analyses and renderings as a ZIP archive."""
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+import asyncio
+import io
+import json
+import logging
+import zipfile
+
+from sqlalchemy import select, func
+
+from app.core.config import settings
+from app.core.job_manager import job_manager
+from app.db.session import SessionLocal
+from app.db.models.job import Job, JobStatus
+from app.db.models.project import Project
+from app.db.models.rendering import Rendering
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+_DONE = object()
+
+
+class _StreamSink(io.RawIOBase):
+    """
+    Non-seekable write target for ZipFile.
+
+    zipfile falls back to data descriptors for unseekable output, so
+    entries are written front to back and the bytes can be drained as soon
+    as they are produced.
+    """
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _project_record(project: Project) -> dict:
+    return {
+        "id": project.id,
+        "name": project.name,
+        "room_type": project.room_type.value if project.room_type else None,
+        "renovation_scope": project.renovation_scope.value if project.renovation_scope else None,
+        "status": project.status.value if project.status else None,
+        "square_footage": project.square_footage,
+        "current_condition": project.current_condition,
+        "desired_style": project.desired_style,
+        "visual_assessment": project.visual_assessment,
+        "design_plan": project.design_plan,
+        "budget_breakdown": project.budget_breakdown,
+        "timeline_estimate": project.timeline_estimate,
+        "estimated_cost_low": project.estimated_cost_low,
+        "estimated_cost_high": project.estimated_cost_high,
+        "location_multiplier": project.location_multiplier,
+        "pricing_version": project.pricing_version,
+        "created_at": project.created_at,
+        "updated_at": project.updated_at,
+        "completed_at": project.completed_at,
+    }
+
+
+def _rendering_record(rendering: Rendering, arcname: Optional[str]) -> dict:
+    return {
+        "id": rendering.id,
+        "project_id": rendering.project_id,
+        "version": rendering.version,
+        "parent_rendering_id": rendering.parent_rendering_id,
+        "is_latest": rendering.is_latest,
+        "image_size": rendering.image_size,
+        "prompt_used": rendering.prompt_used,
+        "model_used": rendering.model_used,
+        "created_at": rendering.created_at,
+        "file": arcname,  # path inside the archive, or null if the image is missing
+    }
+
+
+def _ndjson(records: List[dict]) -> str:
+    return "".join(json.dumps(record, default=str) + "\n" for record in records)
+
+
+class ExportService:
+    """
+    Write a user's data as a ZIP archive in constant memory.
+
+    Layout::
+
+        projects/part-00001.ndjson     one project (with analysis) per line
+        renderings/part-00001.ndjson   one rendering per line
+        images/<project_id>/<rendering_id>.png
+
+    Projects are exported in batches of EXPORT_BATCH_SIZE ordered by ID;
+    each batch adds one part file of each kind. Images are copied in
+    CHUNK_SIZE pieces and stored uncompressed (they already are).
+    """
+
+    def __init__(self, batch_size: int = 25):
+        self.batch_size = batch_size
+
+    async def _batches(
+        self,
+        db,
+        user_id: UUID,
+        after_project_id: int = 0,
+    ) -> AsyncIterator[Tuple[List[Project], Dict[int, List[Rendering]]]]:
+        """Projects after ``after_project_id`` with their renderings: 2 queries per batch."""
+        while True:
+            result = await db.execute(
+                select(Project)
+                .where(Project.user_id == user_id, Project.id > after_project_id)
+                .order_by(Project.id)
+                .limit(self.batch_size)
+            )
+            projects = result.scalars().all()
+            if not projects:
+                return
+
+            result = await db.execute(
+                select(Rendering)
+                .where(Rendering.project_id.in_([p.id for p in projects]))
+                .order_by(Rendering.project_id, Rendering.version)
+            )
+            renderings: Dict[int, List[Rendering]] = {}
+            for rendering in result.scalars():
+                renderings.setdefault(rendering.project_id, []).append(rendering)
+
+            yield projects, renderings
+            after_project_id = projects[-1].id
+
+    def _write_batch(
+        self,
+        zf: zipfile.ZipFile,
+        part: int,
+        projects: List[Project],
+        renderings: Dict[int, List[Rendering]],
+    ) -> Iterator[None]:
+        """
+        Write one batch; yields after every entry or chunk so a stream can drain.
+
+        Blocking (file reads and DEFLATE): step through it in a thread.
+        """
+        rendering_records = []
+        images = []
+        for project in projects:
+            for rendering in renderings.get(project.id, []):
+                path = Path(rendering.image_path)
+                arcname = None
+                if path.is_file():
+                    arcname = f"images/{project.id}/{rendering.id}{path.suffix or '.png'}"
+                    images.append((path, arcname))
+                rendering_records.append(_rendering_record(rendering, arcname))
+
+        zf.writestr(f"projects/part-{part:05d}.ndjson", _ndjson([_project_record(p) for p in projects]))
+        yield
+        zf.writestr(f"renderings/part-{part:05d}.ndjson", _ndjson(rendering_records))
+        yield
+
+        for path, arcname in images:
+            info = zipfile.ZipInfo(arcname, date_time=datetime.utcnow().timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            with path.open("rb") as src, zf.open(info, "w", force_zip64=True) as dest:
+                while True:
+                    chunk = src.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    yield
+
+    async def stream(self, user_id: UUID) -> AsyncIterator[bytes]:
+        """
+        Stream the user's archive as it is built (for StreamingResponse).
+
+        Uses its own session: request-scoped dependencies are closed before
+        a streaming body is sent.
+        """
+        sink = _StreamSink()
+        async with SessionLocal() as db:
+            with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+                part = 0
+                async for projects, renderings in self._batches(db, user_id):
+                    part += 1
+                    entries = self._write_batch(zf, part, projects, renderings)
+                    while await asyncio.to_thread(next, entries, _DONE) is not _DONE:
+                        data = sink.drain()
+                        if data:
+                            yield data
+        # central directory
+        yield sink.drain()
+
+    def archive_path(self, job: Job) -> Path:
+        return Path(settings.EXPORT_DIR) / str(job.user_id) / f"export_{job.id}.zip"
+
+    @staticmethod
+    def _directory_path(path: Path) -> Path:
+        return path.with_name(path.name + ".dir")
+
+    def _save_checkpoint(self, path: Path, directory_offset: int):
+        """
+        Keep a copy of the archive's central directory next to it.
+
+        Appending overwrites the directory in place, so it can't be
+        recovered from the archive itself if the next batch fails.
+        """
+        with path.open("rb") as f:
+            f.seek(directory_offset)
+            directory = f.read()
+        tmp = self._directory_path(path).with_suffix(".tmp")
+        tmp.write_bytes(directory)
+        tmp.replace(self._directory_path(path))
+
+    def _write_part(
+        self,
+        path: Path,
+        mode: str,
+        part: int,
+        projects: List[Project],
+        renderings: Dict[int, List[Rendering]],
+    ) -> Tuple[int, int]:
+        """
+        Add one batch to the archive on disk and checkpoint its directory (blocking).
+
+        Returns:
+            (directory offset, archive size)
+        """
+        with zipfile.ZipFile(path, mode, compression=zipfile.ZIP_DEFLATED) as zf:
+            for _ in self._write_batch(zf, part, projects, renderings):
+                pass
+            # where close() is about to write the central directory
+            directory_offset = zf.start_dir
+        self._save_checkpoint(path, directory_offset)
+        return directory_offset, path.stat().st_size
+
+    def _restore_checkpoint(self, path: Path, checkpoint: dict) -> bool:
+        """Cut the archive back to its last checkpoint. Returns False if that isn't possible."""
+        directory_path = self._directory_path(path)
+        if not path.exists() or not directory_path.exists():
+            return False
+        directory = directory_path.read_bytes()
+        if checkpoint["directory_offset"] + len(directory) != checkpoint["archive_bytes"]:
+            return False
+        with path.open("r+b") as f:
+            f.truncate(checkpoint["directory_offset"])
+            f.seek(checkpoint["directory_offset"])
+            f.write(directory)
+        return True
+
+    async def run_job(self, job_id: int):
+        """
+        Build (or resume) an export job's archive on disk.
+
+        After every batch the archive is closed, which writes a complete
+        central directory, and the job records the archive size, directory
+        offset and last project ID in ``result_data``. A resumed job cuts
+        the archive back to that checkpoint, restores the directory and
+        appends from the next project.
+        """
+        async with SessionLocal() as db:
+            job = (await db.execute(select(Job).where(Job.id == job_id))).scalar_one()
+            checkpoint = dict(job.result_data or {})
+            path = self.archive_path(job)
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            total = (await db.execute(
+                select(func.count(Project.id)).where(Project.user_id == job.user_id)
+            )).scalar_one()
+
+            job.status = JobStatus.RUNNING
+            job.started_at = job.started_at or datetime.utcnow()
+            job.error_message = None
+            await db.commit()
+
+            try:
+                # archive I/O and compression run in a thread, one call per batch
+                if checkpoint.get("archive_bytes") and await asyncio.to_thread(
+                    self._restore_checkpoint, path, checkpoint
+                ):
+                    mode = "a"
+                else:
+                    checkpoint = {
+                        "archive_bytes": 0,
+                        "directory_offset": 0,
+                        "last_project_id": 0,
+                        "parts": 0,
+                        "projects": 0,
+                    }
+                    mode = "w"
+
+                async for projects, renderings in self._batches(db, job.user_id, checkpoint["last_project_id"]):
+                    part = checkpoint["parts"] + 1
+                    directory_offset, archive_bytes = await asyncio.to_thread(
+                        self._write_part, path, mode, part, projects, renderings
+                    )
+                    mode = "a"
+
+                    checkpoint = {
+                        "archive_bytes": archive_bytes,
+                        "directory_offset": directory_offset,
+                        "last_project_id": projects[-1].id,
+                        "parts": part,
+                        "projects": checkpoint["projects"] + len(projects),
+                    }
+                    progress = min(99.0, 100.0 * checkpoint["projects"] / max(total, 1))
+                    job.result_data = checkpoint
+                    job.progress_percent = progress
+                    job.current_step = f"Exported {checkpoint['projects']} of {total} projects"
+                    await db.commit()
+                    await job_manager.job_progress(
+                        job_id, JobStatus.RUNNING.value, step=job.current_step, progress_percent=progress
+                    )
+
+                if mode == "w":
+                    # no projects: still produce a valid, empty archive
+                    with zipfile.ZipFile(path, "w"):
+                        pass
+                    checkpoint["archive_bytes"] = path.stat().st_size
+
+                self._directory_path(path).unlink(missing_ok=True)
+                job.result_data = checkpoint
+                job.status = JobStatus.COMPLETED
+                job.progress_percent = 100.0
+                job.completed_at = datetime.utcnow()
+                await db.commit()
+                await job_manager.job_progress(job_id, JobStatus.COMPLETED.value, progress_percent=100.0)
+
+            except Exception as e:
+                logger.error(f"Export job {job_id} failed: {e}")
+                await db.rollback()
+                job.status = JobStatus.FAILED
+                job.error_message = str(e)
+                await db.commit()
+                await job_manager.job_progress(job_id, JobStatus.FAILED.value, step=str(e))
+
+
+# Singleton instance
+export_service = ExportService(batch_size=settings.EXPORT_BATCH_SIZE)
@@ -0,0 +1,207 @@
+"""Idempotency-Key support for expensive POST endpoints."""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from uuid import UUID
+import hashlib
+import json
+import logging
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.idempotency_key import IdempotencyKey, IdempotencyStatus
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+
+@dataclass(frozen=True)
+class IdempotencyClaim:
+    """
+    Result of ``IdempotencyService.begin``.
+
+    If ``replayed`` is set the key was already used and ``response`` holds
+    the stored first response; otherwise this request owns the key and
+    must ``complete`` or ``abandon`` it.
+    """
+    record_id: int
+    response_code: Optional[int] = None
+    response_body: Optional[Any] = None
+
+    @property
+    def replayed(self) -> bool:
+        return self.response_code is not None
+
+    def response(self) -> JSONResponse:
+        return JSONResponse(
+            status_code=self.response_code,
+            content=self.response_body,
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+
+class IdempotencyService:
+    """
+    Deduplicate retried requests by client-supplied Idempotency-Key.
+
+    The first request with a key inserts an in-flight row (``INSERT ... ON
+    CONFLICT DO NOTHING``, so concurrent duplicates can't both win) and
+    stores its response when it finishes. Duplicates get that response
+    back for ``IDEMPOTENCY_KEY_TTL_SECONDS``, or 409 while the first
+    request is still running. Failed requests give the key up so the
+    client can retry.
+    """
+
+    @staticmethod
+    def request_hash(payload: Any) -> str:
+        encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    async def begin(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        key: Optional[str],
+        endpoint: str,
+        payload: Any,
+    ) -> Optional[IdempotencyClaim]:
+        """
+        Claim an idempotency key, or find the response already recorded for it.
+
+        Args:
+            db: Database session
+            user_id: ID of the requesting user (keys are scoped per user)
+            key: Idempotency-Key header value, or None
+            endpoint: Name of the operation (keys are scoped per endpoint)
+            payload: Request parameters; reusing a key with different ones is an error
+
+        Returns:
+            IdempotencyClaim, or None if no key was sent
+
+        Raises:
+            HTTPException: 400 for an invalid key, 409 while the original
+                request is in flight, 422 if the key was used with a
+                different payload
+        """
+        if key is None:
+            return None
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters",
+            )
+
+        request_hash = self.request_hash(payload)
+        now = datetime.now(timezone.utc)
+        scope = (
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.endpoint == endpoint,
+        )
+
+        # An expired row (old response or crashed in-flight request) frees the key
+        await db.execute(delete(IdempotencyKey).where(*scope, IdempotencyKey.expires_at <= now))
+
+        result = await db.execute(
+            insert(IdempotencyKey)
+            .values(
+                user_id=user_id,
+                key=key,
+                endpoint=endpoint,
+                request_hash=request_hash,
+                status=IdempotencyStatus.IN_FLIGHT,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_IN_FLIGHT_TIMEOUT_SECONDS),
+            )
+            .on_conflict_do_nothing(index_elements=["user_id", "key", "endpoint"])
+            .returning(IdempotencyKey.id)
+        )
+        record_id = result.scalar_one_or_none()
+        await db.commit()
+
+        if record_id is not None:
+            return IdempotencyClaim(record_id=record_id)
+
+        result = await db.execute(select(IdempotencyKey).where(*scope))
+        record = result.scalar_one_or_none()
+        if record is None:
+            # the holder abandoned it between our insert and select
+            return await self.begin(db, user_id, key, endpoint, payload)
+
+        if record.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with different request parameters",
+            )
+
+        if record.status == IdempotencyStatus.IN_FLIGHT:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed",
+                headers={"Retry-After": "1"},
+            )
+
+        logger.info(f"Replaying {endpoint} response for idempotency key of user {user_id}")
+        return IdempotencyClaim(
+            record_id=record.id,
+            response_code=record.response_code,
+            response_body=record.response_body,
+        )
+
+    async def complete(
+        self,
+        db: AsyncSession,
+        claim: Optional[IdempotencyClaim],
+        response_body: Any,
+        response_code: int = status.HTTP_200_OK,
+    ):
+        """
+        Record the response for a claimed key so duplicates get it back.
+
+        Never raises: the work has already been done, so a failure here is
+        logged and the in-flight lease is left to expire.
+        """
+        if claim is None:
+            return
+        try:
+            await db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.id == claim.record_id)
+                .values(
+                    status=IdempotencyStatus.COMPLETED,
+                    response_code=response_code,
+                    response_body=jsonable_encoder(response_body),
+                    expires_at=datetime.now(timezone.utc) + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+                )
+            )
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to record response for idempotency key {claim.record_id}: {e}")
+
+    async def abandon(self, db: AsyncSession, claim: Optional[IdempotencyClaim]):
+        """Release a claimed key after a failed request so it can be retried."""
+        if claim is None:
+            return
+        try:
+            await db.rollback()
+            await db.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.id == claim.record_id,
+                    IdempotencyKey.status == IdempotencyStatus.IN_FLIGHT,
+                )
+            )
+            await db.commit()
+        except Exception as e:
+            # the in-flight lease expires on its own
+            logger.error(f"Failed to release idempotency key {claim.record_id}: {e}")
+
+
+# Singleton instance
+idempotency_service = IdempotencyService()
@@ -1,16 +1,50 @@
-import openai
-import httpx
+import asyncio
+import base64
 import time
-from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Sequence, Union
 from app.core.config import settings
+from app.core.http import http_client
+from app.core.rate_limit import admission_controller
+from app.services.providers import GeneratedImage, ImageProvider, create_image_provider
+from app.services.storage import storage, StoredFile
+
+
+# Alternative styles offered as variants after the project's own style
+VARIANT_STYLES = [
+    "modern",
+    "scandinavian",
+    "transitional",
+    "mid-century modern",
+    "industrial",
+    "coastal",
+]
+
+GenerationResult = tuple[str, float, Optional[str]]
+
+
+def variant_styles(style: Optional[str], count: int) -> List[str]:
+    """The project's style (or "modern") followed by ``count - 1`` different ones."""
+    styles = [style or VARIANT_STYLES[0]]
+    for candidate in VARIANT_STYLES:
+        if len(styles) >= count:
+            break
+        if candidate.lower() != styles[0].lower():
+            styles.append(candidate)
+    return styles[:count]
 
 
 class ImageGenerator:
     """Generates and edits renovation renderings using DALL-E 3."""
     
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+    # Base64 characters decoded per chunk (a multiple of 4; 48 KiB of image data)
+    B64_CHUNK_CHARS = 64 * 1024
+    
+    def __init__(self, provider: Optional[ImageProvider] = None):
+        # DALL-E 3 by default; AI_PROVIDER=fake swaps in the offline stand-in
+        self.provider = provider or create_image_provider()
+        # "b64_json": the image comes back in the API response itself;
+        # "url": it has to be fetched from the provider's CDN afterwards
+        self.response_format = settings.IMAGE_RESPONSE_FORMAT
     
     async def generate_rendering(
         self,
@@ -19,7 +53,7 @@ class ImageGenerator:
         style: str,
         image_size: str = "1024x1024",
         save_path: Optional[str] = None,
-    ) -> tuple[str, float]:
+    ) -> tuple[str, float, Optional[str]]:
         """
         Generate a photorealistic rendering of the renovated space.
         
@@ -31,7 +65,8 @@ class ImageGenerator:
             save_path: Path to save the image
         
         Returns:
-            tuple of (image_path, generation_time_seconds)
+            tuple of (image_path, generation_time_seconds, sha256 of the
+            saved image or None if it wasn't saved)
         """
         
         # Build comprehensive prompt
@@ -41,43 +76,67 @@ class ImageGenerator:
         
         try:
             # Generate image with DALL-E 3
-            response = self.client.images.generate(
-                model="dall-e-3",
-                prompt=prompt,
-                size=image_size,
-                quality="hd" if image_size != "512x512" else "standard",
-                n=1,
-            )
+            async with admission_controller.provider_call():
+                image = await self.provider.generate(
+                    prompt=prompt,
+                    size=image_size,
+                    quality="hd" if image_size != "512x512" else "standard",
+                    response_format=self._response_format(save_path),
+                )
             
-            image_url = response.data[0].url
-            
-            # Download and save image
-            if save_path:
-                async with httpx.AsyncClient() as client:
-                    img_response = await client.get(image_url)
-                    img_response.raise_for_status()
-                    
-                    # Ensure directory exists
-                    Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-                    
-                    with open(save_path, "wb") as f:
-                        f.write(img_response.content)
+            # Save image
+            image_location, sha256 = await self._store(image, save_path)
             
             generation_time = time.time() - start_time
             
-            return save_path or image_url, generation_time
+            return image_location, generation_time, sha256
             
         except Exception as e:
             print(f"Error generating image: {e}")
             raise
     
+    async def generate_variants(
+        self,
+        design_description: str,
+        room_type: str,
+        styles: Sequence[str],
+        image_size: str = "1024x1024",
+        save_paths: Optional[Sequence[str]] = None,
+    ) -> List[Union[GenerationResult, Exception]]:
+        """
+        Generate one rendering per style concurrently.
+        
+        Each request holds its own provider-concurrency slot, so the variants
+        run side by side up to PROVIDER_MAX_CONCURRENCY and queue behind it
+        after that.
+        
+        Args:
+            design_description: Detailed description from the design plan
+            room_type: Type of room
+            styles: One design style per variant
+            image_size: "512x512", "1024x1024", or "1792x1024"
+            save_paths: One save path per style
+        
+        Returns:
+            One entry per style, in order: the generate_rendering result, or
+            the exception that variant failed with
+        """
+        save_paths = save_paths or [None] * len(styles)
+        return await asyncio.gather(
+            *(
+                self.generate_rendering(design_description, room_type, style, image_size, save_path)
+                for style, save_path in zip(styles, save_paths)
+            ),
+            return_exceptions=True
+        )
+    
     async def edit_rendering(
         self,
         original_image_path: str,
         edit_instructions: str,
         image_size: str = "1024x1024",
         save_path: Optional[str] = None,
-    ) -> tuple[str, float]:
+    ) -> tuple[str, float, Optional[str]]:
         """
         Edit an existing rendering based on user feedback.
         
@@ -91,7 +150,8 @@ class ImageGenerator:
             save_path: Path to save the new image
         
         Returns:
-            tuple of (image_path, generation_time_seconds)
+            tuple of (image_path, generation_time_seconds, sha256 of the
+            saved image or None if it wasn't saved)
         """
         
         # For now, we'll regenerate with modified prompt
@@ -107,34 +167,61 @@ Maintain photorealistic quality, professional lighting, and interior design maga
         start_time = time.time()
         
         try:
-            response = self.client.images.generate(
-                model="dall-e-3",
-                prompt=prompt,
-                size=image_size,
-                quality="hd" if image_size != "512x512" else "standard",
-                n=1,
-            )
-            
-            image_url = response.data[0].url
+            async with admission_controller.provider_call():
+                image = await self.provider.generate(
+                    prompt=prompt,
+                    size=image_size,
+                    quality="hd" if image_size != "512x512" else "standard",
+                    response_format=self._response_format(save_path),
+                )
             
-            if save_path:
-                async with httpx.AsyncClient() as client:
-                    img_response = await client.get(image_url)
-                    img_response.raise_for_status()
-                    
-                    Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-                    
-                    with open(save_path, "wb") as f:
-                        f.write(img_response.content)
+            # Save image
+            image_location, sha256 = await self._store(image, save_path)
             
             generation_time = time.time() - start_time
             
-            return save_path or image_url, generation_time
+            return image_location, generation_time, sha256
             
         except Exception as e:
             print(f"Error editing image: {e}")
             raise
     
+    def _response_format(self, save_path: Optional[str]) -> str:
+        # Without a save path the caller gets a URL back, so ask for one
+        return self.response_format if save_path else "url"
+    
+    async def _store(self, image: GeneratedImage, save_path: Optional[str]) -> tuple[str, Optional[str]]:
+        """
+        Save a generated image.
+        
+        Uses the inline base64 payload when the response has one, otherwise
+        falls back to downloading the URL.
+        
+        Returns:
+            tuple of (save_path or the image URL, sha256 or None)
+        """
+        if not save_path:
+            return image.url, None
+        if image.b64_json:
+            stored = await storage.save_stream(save_path, self._decode_b64(image.b64_json))
+        else:
+            stored = await self._download(image.url, save_path)
+        return save_path, stored.sha256
+    
+    async def _decode_b64(self, data: str) -> AsyncIterator[bytes]:
+        """Decode base64 chunk by chunk, so the full decoded image is never held alongside it."""
+        for offset in range(0, len(data), self.B64_CHUNK_CHARS):
+            yield base64.b64decode(data[offset:offset + self.B64_CHUNK_CHARS])
+    
+    async def _download(self, image_url: str, save_path: str) -> StoredFile:
+        """Stream an image from the provider to storage in chunks, over the shared client."""
+        async with http_client.client.stream("GET", image_url) as response:
+            response.raise_for_status()
+            return await storage.save_stream(
+                save_path,
+                response.aiter_bytes(settings.IMAGE_DOWNLOAD_CHUNK_SIZE)
+            )
+    
     def _build_rendering_prompt(
         self,
         design_description: str,
@@ -1,15 +1,76 @@
 """Image processing utilities for thumbnails and optimization."""
-from PIL import Image
+from PIL import Image, ImageOps, ExifTags
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+# EXIF orientations that swap width and height
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+# The fast path's reduce() step stops at this multiple of the target size
+# before the final LANCZOS pass (same role as Pillow's reducing_gap)
+THUMBNAIL_REDUCING_GAP = 2.0
+
+
+def _continuous_tone(img: Image.Image) -> Image.Image:
+    """
+    Convert modes that can't be averaged to one that can.
+    
+    ``reduce`` rejects palette, 1-bit and 16-bit integer images (or, for
+    PA, averages palette indices), and ``resize`` falls back to NEAREST
+    for P and 1.
+    """
+    if img.mode in ("P", "PA"):
+        has_alpha = img.mode == "PA" or "transparency" in img.info
+        return img.convert("RGBA" if has_alpha else "RGB")
+    if img.mode == "1":
+        return img.convert("L")
+    if img.mode.startswith("I;16"):
+        return img.convert("I")
+    return img
+
+
+def _fast_thumbnail(img: Image.Image, thumbnail_size: tuple) -> Image.Image:
+    """
+    Downscale for a thumbnail without decoding the image at full size.
+    
+    1. JPEGs are decoded at the smallest 1/2, 1/4 or 1/8 scale that still
+       covers the target size (libjpeg DCT scaling via ``draft``). DCT
+       scaling is itself a filtered downsample, so unlike Pillow's
+       ``thumbnail()`` this doesn't keep a 2x margin at this stage.
+    2. ``reduce`` box-averages by the largest integer factor that still
+       leaves THUMBNAIL_REDUCING_GAP times the target size (non-JPEGs, or
+       JPEGs far larger than 8x the target). Palette, 1-bit and 16-bit
+       images are converted first (see ``_continuous_tone``).
+    3. A final LANCZOS resample to the target size.
+    
+    EXIF orientation is applied at the end, on the small image; the target
+    box is swapped up front for rotated images so the bounds still hold.
+    """
+    target_w, target_h = thumbnail_size
+    if img.getexif().get(ExifTags.Base.Orientation) in _TRANSPOSED_ORIENTATIONS:
+        target_w, target_h = target_h, target_w
+    
+    if img.format == "JPEG":
+        img.draft("RGB" if img.mode in ("RGB", "YCbCr") else None, (target_w, target_h))
+    img = _continuous_tone(img)
+    
+    min_w = int(target_w * THUMBNAIL_REDUCING_GAP)
+    min_h = int(target_h * THUMBNAIL_REDUCING_GAP)
+    factor = min(img.width // min_w, img.height // min_h) if min_w and min_h else 0
+    if factor >= 2:
+        img = img.reduce(factor)
+    
+    img.thumbnail((target_w, target_h), Image.Resampling.LANCZOS, reducing_gap=None)
+    return ImageOps.exif_transpose(img)
+
 
 def create_thumbnail(
     image_path: str,
     thumbnail_size: tuple = (300, 300),
-    quality: int = 85
+    quality: int = 85,
+    fast: bool = True
 ) -> str:
     """
     Create a thumbnail for an image.
@@ -18,6 +79,10 @@ def create_thumbnail(
         image_path: Path to original image
         thumbnail_size: Size of thumbnail (width, height)
         quality: JPEG quality (1-100)
+        fast: Use the reduced-decode path (see ``_fast_thumbnail``), which
+            also applies EXIF orientation and keeps the ICC profile.
+            False is the previous plain ``thumbnail()`` path, kept for
+            benchmarks.
     
     Returns:
         Path to thumbnail image, or None if failed
@@ -29,13 +94,24 @@ def create_thumbnail(
         
         # Open image
         img = Image.open(image_path)
+        icc_profile = img.info.get("icc_profile")
         
-        # Convert RGBA to RGB if necessary (for JPEG compatibility)
-        if img.mode == 'RGBA':
-            img = img.convert('RGB')
-        
-        # Create thumbnail (maintains aspect ratio)
-        img.thumbnail(thumbnail_size, Image.Resampling.LANCZOS)
+        if fast:
+            img = _fast_thumbnail(img, thumbnail_size)
+            if img.mode == "I":
+                # 16-bit greyscale (see _continuous_tone) down to 8 bits
+                img = img.point(lambda v: v * (1 / 256)).convert("L")
+            elif img.mode not in ("RGB", "RGBA", "L", "LA"):
+                if img.mode == "CMYK":
+                    icc_profile = None  # a CMYK profile doesn't describe the converted pixels
+                img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        else:
+            # Convert RGBA to RGB if necessary (for JPEG compatibility)
+            if img.mode == 'RGBA':
+                img = img.convert('RGB')
+            
+            # Create thumbnail (maintains aspect ratio)
+            img.thumbnail(thumbnail_size, Image.Resampling.LANCZOS)
         
         # Generate thumbnail path
         directory = os.path.dirname(image_path)
@@ -43,11 +119,14 @@ def create_thumbnail(
         name, ext = os.path.splitext(filename)
         thumbnail_path = os.path.join(directory, f"{name}_thumb{ext}")
         
-        # Save thumbnail
+        # Save thumbnail (colour profile kept, other metadata dropped)
+        save_kwargs = {"icc_profile": icc_profile} if fast and icc_profile else {}
         if ext.lower() in ['.jpg', '.jpeg']:
-            img.save(thumbnail_path, format='JPEG', quality=quality, optimize=True)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            img.save(thumbnail_path, format='JPEG', quality=quality, optimize=True, **save_kwargs)
         else:
-            img.save(thumbnail_path, format='PNG', optimize=True)
+            img.save(thumbnail_path, format='PNG', optimize=True, **save_kwargs)
         
         logger.info(f"Thumbnail created: {thumbnail_path}")
         return thumbnail_path
@@ -97,3 +176,57 @@ def optimize_image(
     except Exception as e:
         logger.error(f"Error optimizing image: {e}")
         return False
+
+
+TRANSCODE_EXTENSIONS = {
+    "JPEG": ".jpg",
+    "PNG": ".png",
+    "WEBP": ".webp",
+}
+
+
+def transcode_image(
+    image_path: str,
+    output_format: str = "WEBP",
+    quality: int = 85,
+    output_path: str = None
+) -> str:
+    """
+    Convert an image to another format.
+    
+    Args:
+        image_path: Path to the source image
+        output_format: JPEG, PNG or WEBP
+        quality: Quality for lossy formats (1-100)
+        output_path: Where to write the result (defaults to the source
+            path with the new format's extension)
+    
+    Returns:
+        Path to the converted image, or None if failed
+    """
+    try:
+        output_format = output_format.upper()
+        if output_format not in TRANSCODE_EXTENSIONS:
+            logger.error(f"Unsupported output format: {output_format}")
+            return None
+        
+        img = Image.open(image_path)
+        
+        # JPEG has no alpha channel
+        if output_format == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        
+        if output_path is None:
+            output_path = os.path.splitext(image_path)[0] + TRANSCODE_EXTENSIONS[output_format]
+        
+        if output_format == "PNG":
+            img.save(output_path, format="PNG", optimize=True)
+        else:
+            img.save(output_path, format=output_format, quality=quality, optimize=True)
+        
+        logger.info(f"Image transcoded: {output_path}")
+        return output_path
+    
+    except Exception as e:
+        logger.error(f"Error transcoding image: {e}")
+        return None
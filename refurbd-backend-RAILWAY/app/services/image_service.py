@@ -0,0 +1,188 @@
+"""Async image processing on a process pool."""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.services import image_processor
+
+logger = logging.getLogger(__name__)
+
+
+class ImageServiceError(Exception):
+    """Image work could not be run."""
+
+
+class ImageServiceBusy(ImageServiceError):
+    """The submission queue stayed full for IMAGE_QUEUE_TIMEOUT_SECONDS."""
+
+
+class ImageTaskTimeout(ImageServiceError):
+    """A task ran longer than IMAGE_TASK_TIMEOUT_SECONDS."""
+
+
+class ImageService:
+    """
+    Run Pillow work (thumbnails, optimisation, transcoding) in worker processes.
+
+    Decoding and resampling a 1792x1024 image holds the GIL for hundreds of
+    milliseconds, so it must not run on the event loop or its thread pool.
+
+    - At most ``max_workers + max_pending`` tasks are accepted at once;
+      callers beyond that wait up to ``queue_timeout`` for a slot and then
+      get ``ImageServiceBusy``.
+    - Only ``max_workers`` of those are submitted to the pool, so every
+      submitted task is running and the rest wait here, on the event loop.
+    - A task that runs past ``task_timeout`` (which includes starting a
+      fresh worker process, if it needs one) raises ``ImageTaskTimeout``
+      and the pool is replaced, since a running task can't be cancelled.
+      The other tasks running in that pool are killed with it and run
+      again once on the new pool.
+    - Each worker process is replaced after ``max_tasks_per_child`` tasks
+      so leaks in native image code don't accumulate.
+
+    The wrapped functions keep their own contract: ``thumbnail`` and
+    ``transcode`` return None and ``optimize`` returns False if the image
+    itself can't be processed.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_pending: int,
+        max_tasks_per_child: int,
+        task_timeout: float,
+        queue_timeout: float,
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_tasks_per_child = max_tasks_per_child
+        self.task_timeout = task_timeout
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._workers: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._running = 0
+        self._recycled = asyncio.Event()  # set when the current pool is replaced
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # created on first use so importing the module doesn't start workers;
+        # max_tasks_per_child implies the "spawn" start method
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                max_tasks_per_child=self.max_tasks_per_child,
+            )
+        return self._executor
+
+    async def thumbnail(self, image_path: str, size: tuple = (300, 300), quality: int = 85) -> Optional[str]:
+        """Create ``<name>_thumb<ext>`` next to the image. Returns its path, or None."""
+        return await self._run(image_processor.create_thumbnail, image_path, size, quality)
+
+    async def optimize(self, image_path: str, max_size: tuple = (1920, 1920), quality: int = 90) -> bool:
+        """Downscale and recompress an image in place."""
+        return await self._run(image_processor.optimize_image, image_path, max_size, quality)
+
+    async def transcode(
+        self,
+        image_path: str,
+        output_format: str = "WEBP",
+        quality: int = 85,
+        output_path: Optional[str] = None,
+    ) -> Optional[str]:
+        """Convert an image to JPEG, PNG or WEBP. Returns the new path, or None."""
+        return await self._run(image_processor.transcode_image, image_path, output_format, quality, output_path)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "in_flight": self._in_flight,
+            "running": self._running,
+            "capacity": self.max_workers + self.max_pending,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_pending)
+            self._workers = asyncio.Semaphore(self.max_workers)
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise ImageServiceBusy("Image processing queue is full")
+
+        self._in_flight += 1
+        try:
+            # admission already bounds how many wait here
+            async with self._workers:
+                self._running += 1
+                try:
+                    return await self._submit(fn, *args)
+                finally:
+                    self._running -= 1
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    async def _submit(self, fn, *args, retry: bool = True):
+        """Run ``fn`` on a worker; the caller holds a worker slot, so it starts right away."""
+        executor, recycled = self.executor, self._recycled
+        future = asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        # killing a pool's processes doesn't fail the futures running on it, so also wait for a recycle
+        replaced = asyncio.ensure_future(recycled.wait())
+        try:
+            done, _ = await asyncio.wait(
+                {future, replaced}, timeout=self.task_timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            replaced.cancel()
+            future.cancel()
+
+        if future in done:
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                if self._executor is executor:
+                    logger.error(f"Image worker died during {fn.__name__}; recycling image workers")
+                    self._recycle(executor)
+                    raise ImageServiceError(f"{fn.__name__} failed: worker process died")
+        elif replaced not in done:
+            logger.error(f"{fn.__name__} timed out after {self.task_timeout}s; recycling image workers")
+            self._recycle(executor)
+            raise ImageTaskTimeout(f"{fn.__name__} timed out")
+
+        # the pool was replaced under this task because of another one
+        if retry:
+            return await self._submit(fn, *args, retry=False)
+        raise ImageServiceError(f"{fn.__name__} failed: worker process died")
+
+    def _recycle(self, executor: ProcessPoolExecutor):
+        """Replace the pool, killing its workers (a stuck task can't be cancelled otherwise)."""
+        if self._executor is executor:
+            self._executor = None
+            self._recycled.set()
+            self._recycled = asyncio.Event()
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+
+# Singleton instance
+image_service = ImageService(
+    max_workers=settings.IMAGE_WORKERS,
+    max_pending=settings.IMAGE_MAX_PENDING,
+    max_tasks_per_child=settings.IMAGE_WORKER_MAX_TASKS,
+    task_timeout=settings.IMAGE_TASK_TIMEOUT_SECONDS,
+    queue_timeout=settings.IMAGE_QUEUE_TIMEOUT_SECONDS,
+)
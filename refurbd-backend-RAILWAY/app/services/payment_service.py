@@ -1,55 +1,83 @@
 import stripe
 from typing import Dict, Optional
 from datetime import datetime
+from uuid import UUID
+import asyncio
+import logging
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.db.models.user import SubscriptionTier
+
+logger = logging.getLogger(__name__)
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
+stripe.max_network_retries = settings.STRIPE_MAX_NETWORK_RETRIES
+if settings.STRIPE_API_BASE:
+    # e.g. a local stripe-mock server for tests
+    stripe.api_base = settings.STRIPE_API_BASE
+
+
+async def _call(fn, *args, **kwargs):
+    """Run a blocking Stripe SDK call on a worker thread."""
+    return await asyncio.to_thread(fn, *args, **kwargs)
 
 
 class PaymentService:
-    """Handle Stripe payments and subscriptions."""
+    """
+    Handle Stripe payments and subscriptions.
+    
+    The Stripe SDK is synchronous, so every API call runs on a worker
+    thread instead of blocking the event loop.
+    """
     
     PRICE_IDS = {
-        SubscriptionTier.BASIC: settings.STRIPE_PRICE_ID_BASIC,
-        SubscriptionTier.PRO: settings.STRIPE_PRICE_ID_PRO,
+        "basic": settings.STRIPE_PRICE_ID_BASIC,
+        "pro": settings.STRIPE_PRICE_ID_PRO,
     }
     
+    def __init__(self):
+        self._subscriptions = TTLCache(
+            maxsize=settings.STRIPE_CACHE_MAX_ENTRIES,
+            ttl=settings.STRIPE_SUBSCRIPTION_CACHE_TTL_SECONDS,
+        )
+    
     async def create_checkout_session(
         self,
-        user_id: int,
+        user_id: UUID,
         user_email: str,
-        tier: SubscriptionTier,
+        tier: str,
         success_url: str,
         cancel_url: str,
+        customer_id: Optional[str] = None,
     ) -> Dict[str, str]:
         """
         Create a Stripe Checkout session for subscription.
         
+        Args:
+            tier: Plan to subscribe to (a SubscriptionTier or its value)
+            customer_id: The user's stored Stripe customer ID, if any
+        
         Returns:
-            Dict with session_id and url
+            Dict with session_id, url and customer_id
         """
         
+        # Get price ID for tier
+        tier = getattr(tier, "value", tier)
+        price_id = self.PRICE_IDS.get(tier)
+        if not price_id:
+            raise ValueError(f"No price ID configured for tier: {tier}")
+        
+        # Reuse the stored customer; otherwise Checkout creates one and the
+        # checkout.session.completed webhook stores its ID, so this is
+        # always a single Stripe request
+        if customer_id:
+            customer_args = {"customer": customer_id}
+        else:
+            customer_args = {"customer_email": user_email}
+        
         try:
-            # Get or create Stripe customer
-            customers = stripe.Customer.list(email=user_email, limit=1)
-            
-            if customers.data:
-                customer = customers.data[0]
-            else:
-                customer = stripe.Customer.create(
-                    email=user_email,
-                    metadata={"user_id": user_id}
-                )
-            
-            # Get price ID for tier
-            price_id = self.PRICE_IDS.get(tier)
-            if not price_id:
-                raise ValueError(f"No price ID configured for tier: {tier}")
-            
-            # Create checkout session
-            session = stripe.checkout.Session.create(
-                customer=customer.id,
+            session = await _call(
+                stripe.checkout.Session.create,
+                **customer_args,
                 payment_method_types=["card"],
                 line_items=[
                     {
@@ -60,21 +88,21 @@ class PaymentService:
                 mode="subscription",
                 success_url=success_url,
                 cancel_url=cancel_url,
+                client_reference_id=str(user_id),
                 metadata={
-                    "user_id": user_id,
-                    "tier": tier.value,
+                    "user_id": str(user_id),
+                    "tier": tier,
                 }
             )
-            
-            return {
-                "session_id": session.id,
-                "url": session.url,
-                "customer_id": customer.id,
-            }
-            
         except Exception as e:
-            print(f"Error creating checkout session: {e}")
+            logger.error(f"Error creating checkout session: {e}")
             raise
+        
+        return {
+            "session_id": session.id,
+            "url": session.url,
+            "customer_id": customer_id,
+        }
     
     async def create_customer_portal_session(
         self,
@@ -88,53 +116,74 @@ class PaymentService:
             Portal URL
         """
         try:
-            session = stripe.billing_portal.Session.create(
+            session = await _call(
+                stripe.billing_portal.Session.create,
                 customer=customer_id,
                 return_url=return_url,
             )
             return session.url
         except Exception as e:
-            print(f"Error creating portal session: {e}")
+            logger.error(f"Error creating portal session: {e}")
             raise
     
     async def cancel_subscription(self, subscription_id: str) -> bool:
         """Cancel a subscription at period end."""
         try:
-            stripe.Subscription.modify(
+            await _call(
+                stripe.Subscription.modify,
                 subscription_id,
                 cancel_at_period_end=True
             )
+            self.invalidate_subscription(subscription_id)
             return True
         except Exception as e:
-            print(f"Error canceling subscription: {e}")
+            logger.error(f"Error canceling subscription: {e}")
             return False
     
     async def get_subscription_info(self, subscription_id: str) -> Optional[Dict]:
-        """Get subscription details from Stripe."""
+        """
+        Get subscription details from Stripe.
+        
+        Results are cached for STRIPE_SUBSCRIPTION_CACHE_TTL_SECONDS and
+        dropped when a webhook reports a change to the subscription.
+        """
+        info = self._subscriptions.get(subscription_id)
+        if info is not None:
+            return info
+        
         try:
-            subscription = stripe.Subscription.retrieve(subscription_id)
-            return {
-                "id": subscription.id,
-                "status": subscription.status,
-                "current_period_end": datetime.fromtimestamp(subscription.current_period_end),
-                "cancel_at_period_end": subscription.cancel_at_period_end,
-            }
+            subscription = await _call(stripe.Subscription.retrieve, subscription_id)
         except Exception as e:
-            print(f"Error retrieving subscription: {e}")
+            logger.error(f"Error retrieving subscription: {e}")
             return None
+        
+        info = {
+            "id": subscription.id,
+            "customer_id": subscription.customer,
+            "status": subscription.status,
+            "current_period_end": datetime.fromtimestamp(subscription.current_period_end),
+            "cancel_at_period_end": subscription.cancel_at_period_end,
+        }
+        self._subscriptions.set(subscription_id, info)
+        return info
+    
+    def invalidate_subscription(self, subscription_id: Optional[str]):
+        """Drop a cached subscription after it changed."""
+        if subscription_id:
+            self._subscriptions.pop(subscription_id)
     
     def verify_webhook_signature(self, payload: bytes, sig_header: str) -> Optional[dict]:
-        """Verify Stripe webhook signature and return event."""
+        """Verify Stripe webhook signature and return event (local HMAC check, no API call)."""
         try:
             event = stripe.Webhook.construct_event(
                 payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
             )
             return event
         except ValueError as e:
-            print(f"Invalid payload: {e}")
+            logger.warning(f"Invalid webhook payload: {e}")
             return None
         except stripe.error.SignatureVerificationError as e:
-            print(f"Invalid signature: {e}")
+            logger.warning(f"Invalid webhook signature: {e}")
             return None
 
 
@@ -0,0 +1,251 @@
+"""Versioned pricing tables compiled into a normalized lookup index."""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import re
+import threading
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.db.models.project import RoomType, RenovationScope
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[.,'’]")
+_SEPARATORS = re.compile(r"[\s\-_]+")
+
+
+def normalize_key(value: str) -> str:
+    """
+    Normalize a location name for lookups.
+
+    Casefolds, drops punctuation and collapses separators so that
+    "St. Louis", "st louis" and "ST-LOUIS" all map to the same key.
+    """
+    value = _PUNCTUATION.sub("", value.casefold())
+    return _SEPARATORS.sub(" ", value).strip()
+
+
+def _version_key(version: str) -> Tuple[int, ...]:
+    return tuple(int(part) for part in re.findall(r"\d+", version))
+
+
+@dataclass(frozen=True)
+class CountryIndex:
+    """Compiled state/city multipliers for a single country."""
+
+    code: str
+    currency: str
+    multiplier: float
+    states: Dict[str, float]
+    cities: Dict[str, float]
+
+    def state_multiplier(self, state: str) -> float:
+        return self.states.get(normalize_key(state), 1.0)
+
+    def city_multiplier(self, city: str) -> float:
+        return self.cities.get(normalize_key(city), 1.0)
+
+
+@dataclass(frozen=True)
+class PricingTable:
+    """An immutable, compiled pricing table version."""
+
+    version: str
+    default_country: str
+    default_rate: Tuple[float, float]
+    breakdown_pcts: Dict[str, float]
+    countries: Dict[str, CountryIndex]
+    country_aliases: Dict[str, str]
+    room_index: Dict[RoomType, int]
+    scope_index: Dict[RenovationScope, int]
+    # rates[room, scope] -> (low, high) per sqft; the last row and column
+    # hold default_rate for room types or scopes missing from the table
+    rates: np.ndarray
+
+    def rate_for(self, room_type: RoomType, scope: RenovationScope) -> Tuple[float, float]:
+        low, high = self.rates[self.room_position(room_type), self.scope_position(scope)]
+        return float(low), float(high)
+
+    def room_position(self, room_type: RoomType) -> int:
+        return self.room_index.get(room_type, len(self.room_index))
+
+    def scope_position(self, scope: RenovationScope) -> int:
+        return self.scope_index.get(scope, len(self.scope_index))
+
+    def country(self, code: Optional[str]) -> CountryIndex:
+        """Resolve a country code, name or alias, falling back to the default country."""
+        if code:
+            key = normalize_key(code)
+            key = self.country_aliases.get(key, key)
+            if key in self.countries:
+                return self.countries[key]
+        return self.countries[normalize_key(self.default_country)]
+
+
+def _compile_lookup(values: Dict[str, float], aliases: Dict[str, str]) -> Dict[str, float]:
+    index = {normalize_key(name): float(multiplier) for name, multiplier in values.items()}
+    for alias, target in aliases.items():
+        target_key = normalize_key(target)
+        if target_key not in index:
+            raise ValueError(f"Alias {alias!r} points at unknown entry {target!r}")
+        index[normalize_key(alias)] = index[target_key]
+    return index
+
+
+def compile_pricing_table(data: dict) -> PricingTable:
+    """
+    Compile a raw pricing table document into a PricingTable.
+
+    Args:
+        data: Parsed pricing table (see app/data/pricing/*.json)
+
+    Returns:
+        PricingTable with casefolded, alias-expanded, country-scoped lookups
+
+    Raises:
+        ValueError: If the document is incomplete or inconsistent
+    """
+    for key in ("version", "default_country", "base_rates", "breakdown", "countries"):
+        if key not in data:
+            raise ValueError(f"Pricing table is missing '{key}'")
+
+    room_index = {room: i for i, room in enumerate(RoomType)}
+    scope_index = {scope: i for i, scope in enumerate(RenovationScope)}
+    default_rate = tuple(float(x) for x in data.get("default_rate", (100, 200)))
+
+    rates = np.empty((len(room_index) + 1, len(scope_index) + 1, 2))
+    rates[:] = default_rate
+    for room_name, scopes in data["base_rates"].items():
+        room = RoomType(room_name)
+        for scope_name, (low, high) in scopes.items():
+            rates[room_index[room], scope_index[RenovationScope(scope_name)]] = (low, high)
+    rates.setflags(write=False)
+
+    countries = {}
+    for code, region in data["countries"].items():
+        countries[normalize_key(code)] = CountryIndex(
+            code=code.upper(),
+            currency=region.get("currency", "USD"),
+            multiplier=float(region.get("multiplier", 1.0)),
+            states=_compile_lookup(region.get("states", {}), region.get("state_aliases", {})),
+            cities=_compile_lookup(region.get("cities", {}), region.get("city_aliases", {})),
+        )
+
+    country_aliases = {
+        normalize_key(alias): normalize_key(code)
+        for alias, code in data.get("country_aliases", {}).items()
+    }
+
+    if normalize_key(data["default_country"]) not in countries:
+        raise ValueError(f"Default country {data['default_country']!r} has no multipliers")
+
+    return PricingTable(
+        version=str(data["version"]),
+        default_country=data["default_country"],
+        default_rate=default_rate,
+        breakdown_pcts={name: float(pct) for name, pct in data["breakdown"].items()},
+        countries=countries,
+        country_aliases=country_aliases,
+        room_index=room_index,
+        scope_index=scope_index,
+        rates=rates,
+    )
+
+
+class PricingTableStore:
+    """
+    Load pricing tables from a directory of versioned JSON files.
+
+    The active table is the pinned version if one is configured, otherwise
+    the highest version on disk. The directory is re-scanned at most every
+    ``reload_interval`` seconds and a changed table is swapped in atomically,
+    so new rates take effect without a restart or deploy.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        pinned_version: Optional[str] = None,
+        reload_interval: float = 30.0,
+    ):
+        self.directory = Path(directory)
+        self.pinned_version = pinned_version or None
+        self.reload_interval = reload_interval
+        self._tables: Dict[str, PricingTable] = {}
+        self._current: Optional[PricingTable] = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> PricingTable:
+        """The active pricing table, reloaded from disk if it has changed."""
+        self._refresh()
+        return self._current
+
+    def get(self, version: str) -> Optional[PricingTable]:
+        """Get a loaded table version (e.g. to reproduce an old estimate)."""
+        self._refresh()
+        return self._tables.get(version)
+
+    def versions(self) -> List[str]:
+        """All loaded table versions, oldest first."""
+        self._refresh()
+        return sorted(self._tables, key=_version_key)
+
+    def _refresh(self):
+        if self._current is None or time.monotonic() - self._checked_at >= self.reload_interval:
+            self.reload()
+
+    def reload(self, force: bool = False) -> PricingTable:
+        """
+        Re-scan the pricing directory and swap in the active table.
+
+        A file that fails to compile is logged and skipped; the previously
+        active table stays in place rather than leaving the estimator empty.
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            files = sorted(self.directory.glob("*.json"))
+            signature = tuple((f.name, f.stat().st_mtime_ns) for f in files)
+            if not force and signature == self._signature and self._current is not None:
+                return self._current
+
+            tables = {}
+            for path in files:
+                try:
+                    table = compile_pricing_table(json.loads(path.read_text()))
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.error(f"Skipping invalid pricing table {path.name}: {e}")
+                    continue
+                tables[table.version] = table
+
+            if self.pinned_version:
+                active = tables.get(self.pinned_version)
+            else:
+                active = tables[max(tables, key=_version_key)] if tables else None
+
+            if active is None:
+                if self._current is None:
+                    raise RuntimeError(f"No usable pricing table found in {self.directory}")
+                logger.error("No usable pricing table after reload, keeping current table")
+                return self._current
+
+            self._tables = tables
+            self._signature = signature
+            logger.info(f"Pricing table {active.version} active ({len(tables)} loaded)")
+            self._current = active
+            return active
+
+
+# Global pricing table store
+pricing_store = PricingTableStore(
+    settings.PRICING_TABLES_DIR,
+    pinned_version=settings.PRICING_TABLE_VERSION,
+    reload_interval=settings.PRICING_RELOAD_INTERVAL_SECONDS,
+)
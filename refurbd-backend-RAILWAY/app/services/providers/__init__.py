@@ -0,0 +1,39 @@
+"""AI providers for room analysis and rendering, selected by AI_PROVIDER (live | fake)."""
+from app.core.config import settings
+from app.services.providers.base import AnalysisProvider, GeneratedImage, ImageProvider, ProviderError
+from app.services.providers.anthropic_provider import AnthropicAnalysisProvider
+from app.services.providers.openai_provider import OpenAIImageProvider
+from app.services.providers.fake import (
+    FakeAnalysisProvider, FakeBehaviour, FakeImageProvider, parse_error_mix
+)
+
+
+def _fake_behaviour(latency_ms: float, error_rate: float) -> FakeBehaviour:
+    return FakeBehaviour(
+        latency_ms=latency_ms,
+        latency_sigma=settings.FAKE_LATENCY_SIGMA,
+        error_rate=error_rate,
+        error_mix=parse_error_mix(settings.FAKE_ERROR_MIX),
+        timeout_ms=settings.FAKE_TIMEOUT_MS,
+    )
+
+
+def create_analysis_provider() -> AnalysisProvider:
+    """Analysis provider selected by AI_PROVIDER. No client is created until the first call."""
+    if settings.AI_PROVIDER == "fake":
+        return FakeAnalysisProvider(
+            _fake_behaviour(settings.FAKE_ANALYSIS_LATENCY_MS, settings.FAKE_ANALYSIS_ERROR_RATE),
+            seed=settings.FAKE_PROVIDER_SEED,
+        )
+    return AnthropicAnalysisProvider(settings.ANTHROPIC_API_KEY, settings.ANTHROPIC_MODEL)
+
+
+def create_image_provider() -> ImageProvider:
+    """Image provider selected by AI_PROVIDER. No client is created until the first call."""
+    if settings.AI_PROVIDER == "fake":
+        return FakeImageProvider(
+            _fake_behaviour(settings.FAKE_IMAGE_LATENCY_MS, settings.FAKE_IMAGE_ERROR_RATE),
+            seed=settings.FAKE_PROVIDER_SEED,
+        )
+    return OpenAIImageProvider(settings.OPENAI_API_KEY, settings.OPENAI_IMAGE_MODEL)
+
@@ -0,0 +1,53 @@
+"""Room analysis with Anthropic's Claude models."""
+from typing import List
+
+from app.services.providers.base import AnalysisProvider, ProviderError, retryable_status
+
+
+class AnthropicAnalysisProvider(AnalysisProvider):
+    """Analysis through the Anthropic Messages API (async client, created on first use)."""
+
+    name = "anthropic"
+
+    def __init__(self, api_key: str, model: str):
+        self.api_key = api_key
+        self.model = model
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            # imported here so AI_PROVIDER=fake runs without the SDK or a key
+            import anthropic
+            self._client = anthropic.AsyncAnthropic(api_key=self.api_key)
+        return self._client
+
+    async def analyze(self, content: List[dict], max_tokens: int = 4000) -> str:
+        client = self.client
+        import anthropic
+
+        try:
+            message = await client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": content
+                    }
+                ]
+            )
+        except anthropic.APIStatusError as e:
+            raise ProviderError(
+                f"Anthropic API error {e.status_code}: {e.message}",
+                status_code=e.status_code,
+                retryable=retryable_status(e.status_code),
+            ) from e
+        except anthropic.APIConnectionError as e:  # includes timeouts
+            raise ProviderError(f"Anthropic API unreachable: {e}") from e
+        return message.content[0].text
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
@@ -0,0 +1,92 @@
+"""Interfaces the analysis and rendering pipeline uses to call AI providers."""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+class ProviderError(Exception):
+    """
+    An AI provider call failed.
+
+    Providers raise this instead of their SDK's exceptions, so the pipeline
+    handles one error type whichever provider is configured.
+    ``status_code`` is the provider's HTTP status, or None if no response
+    arrived (timeouts, connection errors). ``retryable`` is True when the
+    same request may succeed later (rate limits, overload, server errors,
+    timeouts) and False when it would be rejected again.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retryable: bool = True):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+def retryable_status(status_code: Optional[int]) -> bool:
+    """Whether a provider's HTTP status is worth retrying (None = no response at all)."""
+    return status_code is None or status_code in (408, 409, 429) or status_code >= 500
+
+
+@dataclass
+class GeneratedImage:
+    """One generated image: inline base64 data, a URL to fetch it from, or both."""
+    b64_json: Optional[str] = None
+    url: Optional[str] = None
+    revised_prompt: Optional[str] = None
+
+
+class AnalysisProvider(ABC):
+    """Answers a multimodal prompt (room photos plus instructions) with text."""
+
+    name = "analysis"
+
+    @abstractmethod
+    async def analyze(self, content: List[dict], max_tokens: int = 4000) -> str:
+        """
+        Run one analysis.
+
+        Args:
+            content: Message content blocks, ``{"type": "text", "text": ...}``
+                or ``{"type": "image", "source": {"type": "base64", ...}}``
+            max_tokens: Upper bound on the length of the answer
+
+        Returns:
+            The model's answer as text
+
+        Raises:
+            ProviderError: If the provider call fails
+        """
+
+    async def close(self):
+        pass
+
+
+class ImageProvider(ABC):
+    """Generates images from text prompts."""
+
+    name = "image"
+    model = None
+
+    @abstractmethod
+    async def generate(
+        self,
+        prompt: str,
+        size: str = "1024x1024",
+        quality: str = "standard",
+        response_format: str = "b64_json",
+    ) -> GeneratedImage:
+        """
+        Generate one image.
+
+        Args:
+            prompt: Image description
+            size: "WIDTHxHEIGHT"
+            quality: "standard" or "hd"
+            response_format: "b64_json" or "url"
+
+        Raises:
+            ProviderError: If the provider call fails
+        """
+
+    async def close(self):
+        pass
@@ -0,0 +1,221 @@
+"""Deterministic offline stand-ins for the AI providers (AI_PROVIDER=fake)."""
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List
+import asyncio
+import base64
+import hashlib
+import io
+import math
+import random
+
+from PIL import Image
+
+from app.services.providers.base import (
+    AnalysisProvider, GeneratedImage, ImageProvider, ProviderError, retryable_status
+)
+
+# Simulated failure kinds: the HTTP status each one answers with (None = no answer)
+ERROR_KINDS = {
+    "rate_limit": 429,
+    "server": 500,
+    "overloaded": 529,
+    "timeout": None,
+    "invalid": 400,
+}
+
+PALETTES = [
+    "warm white walls, natural oak and brushed brass",
+    "soft sage green, white oak and matte black fixtures",
+    "greige walls, walnut accents and polished nickel",
+    "crisp white, charcoal cabinetry and honed marble",
+    "terracotta accents, limewash walls and aged bronze",
+]
+
+FLOORING = [
+    "wide-plank engineered oak",
+    "large-format porcelain tile",
+    "polished concrete",
+    "herringbone luxury vinyl plank",
+]
+
+ANALYSIS_TEMPLATE = """## VISUAL ASSESSMENT
+Simulated assessment based on {images} image(s). The space has a workable layout with
+dated finishes, limited task lighting and underused storage.
+
+## DESIGN PLAN
+- Layout: keep the existing footprint and open up circulation around the main work area
+- Color palette: {palette}
+- Flooring: {flooring}
+- Lighting: layered ambient, task and accent lighting on separate dimmers
+- Storage: full-height built-ins with concealed organisers
+- Key fixtures: statement pendant, integrated hardware, quality tapware
+
+## BUDGET BREAKDOWN
+- Materials: ${materials_low:,} - ${materials_high:,}
+- Labor: ${labor_low:,} - ${labor_high:,}
+- Permits/Fees: $500 - $1,500
+- Contingency (10%): ${contingency:,}
+- Total: ${total_low:,} - ${total_high:,}
+
+## TIMELINE
+- Planning & Permits: 2 weeks
+- Demolition: 3 days
+- Installation: {install_weeks} weeks
+- Finishing: 1 week
+Total: {total_weeks_low}-{total_weeks_high} weeks
+
+## KEY RECOMMENDATIONS
+1. Prioritise lighting and flooring, which change the room the most per dollar
+2. Keep plumbing and electrical where they are to control costs
+3. Order long-lead fixtures before demolition starts
+
+(Simulated analysis {reference})"""
+
+
+def parse_error_mix(spec: str) -> Dict[str, float]:
+    """
+    Parse a weighted error mix such as ``"rate_limit=6,server=3,timeout=1"``.
+
+    Returns:
+        Dict of error kind -> relative weight
+    """
+    mix = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        kind, _, weight = part.partition("=")
+        kind = kind.strip().lower()
+        if kind not in ERROR_KINDS:
+            raise ValueError(f"Unknown fake provider error kind: {kind}")
+        mix[kind] = float(weight or 1)
+    return mix or {"server": 1.0}
+
+
+@dataclass
+class FakeBehaviour:
+    """Latency and failure distribution of a fake provider."""
+    latency_ms: float = 1000.0  # median
+    latency_sigma: float = 0.0  # log-normal spread around the median; 0 = fixed
+    error_rate: float = 0.0  # fraction of calls that fail
+    error_mix: Dict[str, float] = field(default_factory=lambda: {"server": 1.0})
+    timeout_ms: float = 30000.0  # how long a simulated timeout takes to fail
+
+
+class _SimulatedCalls:
+    """
+    Latency and failures drawn from a per-call RNG.
+
+    Call ``n`` of a provider always gets the same draw for a given seed,
+    so a run with the same seed and the same order of calls repeats
+    exactly.
+    """
+
+    def __init__(self, behaviour: FakeBehaviour, seed: int = 0):
+        self.behaviour = behaviour
+        self.seed = seed
+        self.calls = 0
+        self.failures = 0
+
+    async def _simulate(self) -> random.Random:
+        """Wait out one call's latency, or raise its simulated failure. Returns the call's RNG."""
+        self.calls += 1
+        call = self.calls
+        rng = random.Random(f"{self.seed}:{self.name}:{call}")
+        behaviour = self.behaviour
+
+        latency = behaviour.latency_ms / 1000
+        if behaviour.latency_sigma:
+            latency *= math.exp(rng.gauss(0, behaviour.latency_sigma))
+
+        if rng.random() < behaviour.error_rate:
+            kind = rng.choices(list(behaviour.error_mix), weights=list(behaviour.error_mix.values()))[0]
+            status_code = ERROR_KINDS[kind]
+            if kind == "timeout":
+                latency = behaviour.timeout_ms / 1000
+            elif kind in ("rate_limit", "invalid"):
+                # rejected up front rather than after doing the work
+                latency *= 0.05
+            await asyncio.sleep(latency)
+            self.failures += 1
+            raise ProviderError(
+                f"Simulated {kind} error from {self.name} (call {call})",
+                status_code=status_code,
+                retryable=retryable_status(status_code),
+            )
+
+        await asyncio.sleep(latency)
+        return rng
+
+
+class FakeAnalysisProvider(_SimulatedCalls, AnalysisProvider):
+    """Returns a plausible, deterministic analysis in the sections RoomAnalyzer parses."""
+
+    name = "fake-analysis"
+
+    async def analyze(self, content: List[dict], max_tokens: int = 4000) -> str:
+        rng = await self._simulate()
+        prompt = "\n".join(block["text"] for block in content if block.get("type") == "text")
+        digest = hashlib.sha256(prompt.encode()).digest()
+        images = sum(1 for block in content if block.get("type") == "image")
+
+        materials = 4000 + digest[2] * 40
+        labor = 3000 + digest[3] * 30
+        install_weeks = 2 + digest[4] % 4
+        text = ANALYSIS_TEMPLATE.format(
+            images=images,
+            palette=PALETTES[digest[0] % len(PALETTES)],
+            flooring=FLOORING[digest[1] % len(FLOORING)],
+            materials_low=materials,
+            materials_high=materials * 3 // 2,
+            labor_low=labor,
+            labor_high=labor * 3 // 2,
+            contingency=(materials + labor) // 10,
+            total_low=materials + labor + 500,
+            total_high=(materials + labor) * 3 // 2 + 1500,
+            install_weeks=install_weeks,
+            total_weeks_low=install_weeks + 3,
+            total_weeks_high=install_weeks + 5,
+            reference=f"{digest.hex()[:12]}-{rng.randrange(16 ** 6):06x}",
+        )
+        return text[:max_tokens * 4]
+
+
+@lru_cache(maxsize=64)
+def _png(size: str, color: tuple) -> str:
+    """A solid-colour PNG of the requested size, base64 encoded."""
+    width, height = (int(v) for v in size.lower().split("x"))
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+class FakeImageProvider(_SimulatedCalls, ImageProvider):
+    """
+    Returns a real PNG of the requested size, coloured by a hash of the prompt.
+
+    Both ``b64_json`` and a placeholder ``url`` are always set, so callers
+    that save images use the inline data whatever ``response_format`` was.
+    """
+
+    name = "fake-image"
+    model = "fake"
+
+    async def generate(
+        self,
+        prompt: str,
+        size: str = "1024x1024",
+        quality: str = "standard",
+        response_format: str = "b64_json",
+    ) -> GeneratedImage:
+        await self._simulate()
+        digest = hashlib.sha256(prompt.encode()).digest()
+        # coarse colours keep the PNG cache small across many prompts
+        color = tuple(64 + (b % 4) * 48 for b in digest[:3])
+        b64_json = await asyncio.to_thread(_png, size, color)
+        return GeneratedImage(
+            b64_json=b64_json,
+            url=f"https://fake-provider.invalid/images/{digest.hex()[:16]}.png",
+            revised_prompt=prompt,
+        )
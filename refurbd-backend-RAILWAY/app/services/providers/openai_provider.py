@@ -0,0 +1,65 @@
+"""Rendering generation with OpenAI's image models."""
+from app.services.providers.base import GeneratedImage, ImageProvider, ProviderError, retryable_status
+
+
+class OpenAIImageProvider(ImageProvider):
+    """
+    Images through the OpenAI Images API (async client, created on first use).
+
+    The client also honours ``OPENAI_BASE_URL``, e.g. to point it at a
+    local stand-in for benchmarks.
+    """
+
+    name = "openai"
+
+    def __init__(self, api_key: str, model: str):
+        self.api_key = api_key
+        self.model = model
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            # imported here so AI_PROVIDER=fake runs without the SDK or a key
+            import openai
+            self._client = openai.AsyncOpenAI(api_key=self.api_key)
+        return self._client
+
+    async def generate(
+        self,
+        prompt: str,
+        size: str = "1024x1024",
+        quality: str = "standard",
+        response_format: str = "b64_json",
+    ) -> GeneratedImage:
+        client = self.client
+        import openai
+
+        try:
+            response = await client.images.generate(
+                model=self.model,
+                prompt=prompt,
+                size=size,
+                quality=quality,
+                n=1,
+                response_format=response_format,
+            )
+        except openai.APIStatusError as e:
+            raise ProviderError(
+                f"OpenAI API error {e.status_code}: {e.message}",
+                status_code=e.status_code,
+                retryable=retryable_status(e.status_code),
+            ) from e
+        except openai.APIConnectionError as e:  # includes timeouts
+            raise ProviderError(f"OpenAI API unreachable: {e}") from e
+        image = response.data[0]
+        return GeneratedImage(
+            b64_json=getattr(image, "b64_json", None),
+            url=getattr(image, "url", None),
+            revised_prompt=getattr(image, "revised_prompt", None),
+        )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
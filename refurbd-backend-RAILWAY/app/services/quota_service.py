@@ -0,0 +1,149 @@
+"""Per-user monthly analysis quota backed by atomic counter updates."""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+import logging
+
+from sqlalchemy import update, case, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.user_cache import user_cache
+from app.db.models.user import User, SubscriptionTier
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QuotaReservation:
+    """A unit of analysis quota taken from a user's monthly allowance."""
+    user_id: UUID
+    used: int
+    reserved_at: datetime
+
+
+class QuotaService:
+    """
+    Reserve and release analysis quota without read-modify-write races.
+
+    Every check is a single conditional ``UPDATE ... RETURNING``: the
+    counter is only incremented while it is below the tier limit, and a
+    period older than ``PERIOD`` is rolled over in the same statement.
+    """
+
+    PERIOD = timedelta(days=30)
+
+    def limit_for_tier(self, tier: str) -> Optional[int]:
+        """Monthly analysis limit for a tier (a SubscriptionTier or its value), or None if unlimited."""
+        limits = {
+            SubscriptionTier.FREE: settings.FREE_TIER_ANALYSES_PER_MONTH,
+            SubscriptionTier.BASIC: settings.BASIC_TIER_ANALYSES_PER_MONTH,
+        }
+        return limits.get(tier)
+
+    def remaining(self, user: User, now: Optional[datetime] = None) -> Optional[int]:
+        """
+        Analyses left in the current period for an already-loaded user.
+
+        Advisory only (e.g. for display); use ``reserve`` to actually
+        consume quota.
+
+        Returns:
+            Remaining analyses, or None if the tier is unlimited
+        """
+        limit = self.limit_for_tier(user.subscription_tier)
+        if limit is None:
+            return None
+
+        now = now or datetime.utcnow()
+        if user.last_analysis_reset is None or now - user.last_analysis_reset >= self.PERIOD:
+            return limit
+        return max(0, limit - (user.analyses_used_this_month or 0))
+
+    async def reserve(self, db: AsyncSession, user_id: UUID) -> Optional[QuotaReservation]:
+        """
+        Atomically take one analysis from the user's quota and commit.
+
+        Args:
+            db: Database session
+            user_id: ID of the user
+
+        Returns:
+            QuotaReservation, or None if the user is over their limit
+        """
+        now = datetime.utcnow()
+        rolled_over = or_(
+            User.last_analysis_reset.is_(None),
+            User.last_analysis_reset <= now - self.PERIOD,
+        )
+        # Resolve the limit from the row's tier inside the statement, so a
+        # concurrent tier change can't be raced either. Comparisons (not a
+        # value= mapping) so the tiers are bound with the column's enum type.
+        tier_limits = []
+        for tier in SubscriptionTier:
+            tier_limit = self.limit_for_tier(tier)
+            if tier_limit is not None:
+                tier_limits.append((User.subscription_tier == tier, tier_limit))
+        limit = case(*tier_limits, else_=None)
+
+        result = await db.execute(
+            update(User)
+            .where(
+                User.id == user_id,
+                or_(rolled_over, limit.is_(None), User.analyses_used_this_month < limit),
+            )
+            .values(
+                analyses_used_this_month=case(
+                    (rolled_over, 1),
+                    else_=User.analyses_used_this_month + 1,
+                ),
+                last_analysis_reset=case(
+                    (rolled_over, now),
+                    else_=User.last_analysis_reset,
+                ),
+            )
+            .returning(User.analyses_used_this_month)
+            .execution_options(synchronize_session=False)
+        )
+        used = result.scalar_one_or_none()
+        await db.commit()
+        user_cache.invalidate(user_id)
+
+        if used is None:
+            return None
+        return QuotaReservation(user_id=user_id, used=used, reserved_at=now)
+
+    async def release(self, db: AsyncSession, reservation: QuotaReservation) -> bool:
+        """
+        Give back a reservation (e.g. when the analysis failed) and commit.
+
+        A reservation made before the current period started is ignored,
+        since the rollover already discarded it.
+
+        Returns:
+            True if the quota was returned
+        """
+        result = await db.execute(
+            update(User)
+            .where(
+                User.id == reservation.user_id,
+                User.last_analysis_reset <= reservation.reserved_at,
+            )
+            .values(
+                analyses_used_this_month=func.greatest(User.analyses_used_this_month - 1, 0)
+            )
+            .returning(User.analyses_used_this_month)
+            .execution_options(synchronize_session=False)
+        )
+        released = result.scalar_one_or_none() is not None
+        await db.commit()
+        user_cache.invalidate(reservation.user_id)
+
+        if not released:
+            logger.info(f"Quota reservation for user {reservation.user_id} expired before release")
+        return released
+
+
+# Singleton instance
+quota_service = QuotaService()
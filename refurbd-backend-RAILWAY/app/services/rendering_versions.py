@@ -0,0 +1,120 @@
+"""Per-project rendering version numbers, latest pointer and edit lineage."""
+from typing import List, Optional, Tuple
+from uuid import UUID
+import logging
+
+from sqlalchemy import select, update, case, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.project import Project
+from app.db.models.rendering import Rendering
+
+logger = logging.getLogger(__name__)
+
+
+class RenderingVersionService:
+    """
+    Version bookkeeping for a project's renderings.
+
+    Version numbers come from a per-project counter
+    (``projects.rendering_version_seq``) bumped with ``UPDATE ... RETURNING``,
+    so concurrent edits never get the same number. Exactly one rendering
+    per project is ``is_latest``; it is moved in a single UPDATE while the
+    project row is locked.
+    """
+
+    async def next_version(self, db: AsyncSession, project_id: int) -> int:
+        """
+        Allocate the next version number for a project.
+
+        The number is reserved as soon as the caller commits; a failed
+        generation leaves a gap rather than a duplicate.
+        """
+        result = await db.execute(
+            update(Project)
+            .where(Project.id == project_id)
+            .values(rendering_version_seq=Project.rendering_version_seq + 1)
+            .returning(Project.rendering_version_seq)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalar_one()
+
+    async def set_latest(self, db: AsyncSession, project_id: int, rendering_id: int):
+        """
+        Make ``rendering_id`` the project's only latest rendering.
+
+        Does not commit. Locks the project row so concurrent calls for the
+        same project apply one after the other.
+        """
+        await db.execute(select(Project.id).where(Project.id == project_id).with_for_update())
+        await db.execute(
+            update(Rendering)
+            .where(
+                Rendering.project_id == project_id,
+                (Rendering.is_latest == True) | (Rendering.id == rendering_id)
+            )
+            .values(is_latest=case((Rendering.id == rendering_id, True), else_=False))
+            .execution_options(synchronize_session=False)
+        )
+
+    async def latest(self, db: AsyncSession, project_id: int) -> Optional[Rendering]:
+        """The project's latest rendering (served from ix_renderings_project_id_is_latest)."""
+        result = await db.execute(
+            select(Rendering)
+            .where(Rendering.project_id == project_id, Rendering.is_latest == True)
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def lineage(
+        self,
+        db: AsyncSession,
+        rendering_id: int,
+        user_id: UUID,
+    ) -> List[Tuple[Rendering, int]]:
+        """
+        The whole edit tree a rendering belongs to, in one query.
+
+        A recursive CTE walks up from the rendering to its root, a second
+        one walks down from the root through every edit.
+
+        Returns:
+            (rendering, depth) pairs ordered by depth then version; empty if
+            the rendering doesn't exist or belongs to someone else
+        """
+        ancestors = (
+            select(Rendering.id, Rendering.parent_rendering_id)
+            .where(Rendering.id == rendering_id, Rendering.user_id == user_id)
+            .cte("ancestors", recursive=True)
+        )
+        ancestors = ancestors.union_all(
+            select(Rendering.id, Rendering.parent_rendering_id)
+            .join(ancestors, Rendering.id == ancestors.c.parent_rendering_id)
+        )
+        root_id = (
+            select(ancestors.c.id)
+            .where(ancestors.c.parent_rendering_id.is_(None))
+            .scalar_subquery()
+        )
+
+        tree = (
+            select(Rendering.id, literal(0).label("depth"))
+            .where(Rendering.id == root_id)
+            .cte("tree", recursive=True)
+        )
+        tree = tree.union_all(
+            select(Rendering.id, tree.c.depth + 1)
+            .join(tree, Rendering.parent_rendering_id == tree.c.id)
+        )
+
+        result = await db.execute(
+            select(Rendering, tree.c.depth)
+            .join(tree, Rendering.id == tree.c.id)
+            .where(Rendering.user_id == user_id)
+            .order_by(tree.c.depth, Rendering.version)
+        )
+        return [(rendering, depth) for rendering, depth in result.all()]
+
+
+# Singleton instance
+rendering_versions = RenderingVersionService()
@@ -0,0 +1,252 @@
+"""PDF project reports, built in a process pool and cached on disk."""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+import asyncio
+import io
+import logging
+import os
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.job_manager import job_manager
+from app.db.session import SessionLocal
+from app.db.models.job import Job, JobStatus
+from app.db.models.project import Project
+from app.db.models.rendering import Rendering
+from app.services.cost_estimator import get_timeline_template
+from app.services.rendering_versions import rendering_versions
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (900, 900)
+
+
+def build_report_pdf(report: dict, output_path: str) -> int:
+    """
+    Render a project report to ``output_path``.
+
+    Runs in a worker process, so it only takes plain data (see
+    ``ReportService._report_data``) and imports reportlab lazily.
+
+    Returns:
+        Size of the written PDF in bytes
+    """
+    from PIL import Image as PILImage
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    from xml.sax.saxutils import escape
+
+    styles = getSampleStyleSheet()
+    content_width = A4[0] - 40 * mm
+
+    def paragraphs(text: Optional[str]):
+        blocks = [block.strip() for block in (text or "").split("\n\n") if block.strip()]
+        if not blocks:
+            return [Paragraph("Not available yet.", styles["Italic"])]
+        return [
+            Paragraph(escape(block).replace("\n", "<br/>"), styles["BodyText"])
+            for block in blocks
+        ]
+
+    def table(rows, col_widths):
+        t = Table(rows, colWidths=col_widths, hAlign="LEFT")
+        t.setStyle(TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#2563eb")),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#d1d5db")),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ]))
+        return t
+
+    story = [
+        Paragraph(escape(report["name"]), styles["Title"]),
+        Paragraph(
+            escape(f"{report['room_type']} · {report['renovation_scope']} renovation"
+                   f" · generated {report['generated_at']}"),
+            styles["Normal"],
+        ),
+        Spacer(1, 6 * mm),
+    ]
+
+    if report["cost_low"] is not None and report["cost_high"] is not None:
+        story.append(Paragraph(
+            f"Estimated cost: <b>${report['cost_low']:,.0f} - ${report['cost_high']:,.0f}</b>",
+            styles["Heading3"],
+        ))
+
+    if report["thumbnail"]:
+        with PILImage.open(report["thumbnail"]) as img:
+            img.thumbnail(THUMBNAIL_SIZE)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            buffer = io.BytesIO()
+            img.save(buffer, format="JPEG", quality=85)
+            width, height = img.size
+        buffer.seek(0)
+        scale = min(content_width / width, 110 * mm / height)
+        story += [
+            Image(buffer, width=width * scale, height=height * scale),
+            Paragraph(f"Latest rendering (version {report['rendering_version']})", styles["Italic"]),
+        ]
+
+    story += [Paragraph("Visual assessment", styles["Heading2"]), *paragraphs(report["visual_assessment"])]
+    story += [Paragraph("Design plan", styles["Heading2"]), *paragraphs(report["design_plan"])]
+
+    if report["budget"]:
+        story.append(Paragraph("Budget breakdown", styles["Heading2"]))
+        rows = [["Category", "Low", "High"]]
+        for item in report["budget"]:
+            rows.append([item["name"], f"${item['low']:,.0f}", f"${item['high']:,.0f}"])
+        story.append(table(rows, [content_width * 0.5, content_width * 0.25, content_width * 0.25]))
+
+    if report["timeline"]:
+        timeline = report["timeline"]
+        story += [
+            Paragraph("Timeline", styles["Heading2"]),
+            Paragraph(f"Total duration: <b>{escape(timeline['duration'])}</b>", styles["BodyText"]),
+            Spacer(1, 2 * mm),
+        ]
+        rows = [["Phase", "Duration"]] + [[phase["name"], phase["duration"]] for phase in timeline["phases"]]
+        story.append(table(rows, [content_width * 0.7, content_width * 0.3]))
+        if timeline.get("note"):
+            story.append(Paragraph(escape(timeline["note"]), styles["Italic"]))
+
+    SimpleDocTemplate(
+        output_path,
+        pagesize=A4,
+        leftMargin=20 * mm,
+        rightMargin=20 * mm,
+        title=report["name"],
+        author="Refurbd",
+    ).build(story)
+    return os.path.getsize(output_path)
+
+
+class ReportService:
+    """
+    Generate PDF reports for analysed projects.
+
+    Building the PDF (layout and image resampling) is CPU-bound, so it runs
+    in a process pool rather than on the event loop or its thread pool.
+    Reports are cached on disk under a key derived from the project's
+    ``updated_at`` and its latest rendering version, so a report is only
+    rebuilt after the project or its renderings change.
+    """
+
+    def __init__(self, report_dir: str, max_workers: int):
+        self.report_dir = Path(report_dir)
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # created on first use so importing the module doesn't fork workers
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def cache_key(self, project: Project, latest: Optional[Rendering]) -> str:
+        updated_at = project.updated_at or project.created_at
+        stamp = int(updated_at.timestamp()) if updated_at else 0
+        version = latest.version if latest else 0
+        return f"{stamp}-v{version}"
+
+    def report_path(self, project: Project, cache_key: str) -> Path:
+        return self.report_dir / str(project.user_id) / f"project_{project.id}_{cache_key}.pdf"
+
+    async def cached_report(self, db, project: Project) -> Optional[Path]:
+        """Path of an up-to-date report for the project, if one was already built."""
+        latest = await rendering_versions.latest(db, project.id)
+        path = self.report_path(project, self.cache_key(project, latest))
+        return path if path.exists() else None
+
+    def _report_data(self, project: Project, latest: Optional[Rendering]) -> dict:
+        # budget_breakdown is flat: {"materials_low": ..., "materials_high": ...}
+        breakdown = project.budget_breakdown or {}
+        budget = []
+        for key, low in breakdown.items():
+            name = key[:-len("_low")] if key.endswith("_low") else None
+            if name and f"{name}_high" in breakdown:
+                budget.append({
+                    "name": name.replace("_", " ").title(),
+                    "low": low,
+                    "high": breakdown[f"{name}_high"],
+                })
+
+        timeline = None
+        if project.renovation_scope and project.room_type:
+            timeline = get_timeline_template(project.renovation_scope, project.room_type).to_dict()
+
+        thumbnail = None
+        if latest:
+            for candidate in (latest.thumbnail_path, latest.image_path):
+                if candidate and Path(candidate).is_file():
+                    thumbnail = candidate
+                    break
+
+        return {
+            "name": project.name,
+            "room_type": project.room_type.value.replace("_", " ").title(),
+            "renovation_scope": project.renovation_scope.value.title() if project.renovation_scope else "",
+            "generated_at": datetime.utcnow().strftime("%Y-%m-%d"),
+            "cost_low": project.estimated_cost_low,
+            "cost_high": project.estimated_cost_high,
+            "visual_assessment": project.visual_assessment,
+            "design_plan": project.design_plan,
+            "budget": budget,
+            "timeline": timeline,
+            "thumbnail": thumbnail,
+            "rendering_version": latest.version if latest else None,
+        }
+
+    async def run_job(self, job_id: int):
+        """Build the report for a REPORT job's project and record where it was written."""
+        async with SessionLocal() as db:
+            job = (await db.execute(select(Job).where(Job.id == job_id))).scalar_one()
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.utcnow()
+            await db.commit()
+            await job_manager.job_progress(job_id, JobStatus.RUNNING.value, step="Building PDF")
+
+            try:
+                project = (await db.execute(
+                    select(Project).where(Project.id == job.project_id)
+                )).scalar_one()
+                latest = await rendering_versions.latest(db, project.id)
+                cache_key = self.cache_key(project, latest)
+                path = self.report_path(project, cache_key)
+
+                if not path.exists():
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp_path = path.with_suffix(".tmp")
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(
+                        self.executor, build_report_pdf, self._report_data(project, latest), str(tmp_path)
+                    )
+                    tmp_path.replace(path)
+
+                job.status = JobStatus.COMPLETED
+                job.progress_percent = 100.0
+                job.completed_at = datetime.utcnow()
+                job.result_data = {"cache_key": cache_key, "size_bytes": path.stat().st_size}
+                await db.commit()
+                await job_manager.job_progress(job_id, JobStatus.COMPLETED.value, progress_percent=100.0)
+
+            except Exception as e:
+                logger.error(f"Report job {job_id} failed: {e}")
+                await db.rollback()
+                job.status = JobStatus.FAILED
+                job.error_message = str(e)
+                await db.commit()
+                await job_manager.job_progress(job_id, JobStatus.FAILED.value, step=str(e))
+
+
+# Singleton instance
+report_service = ReportService(settings.REPORT_DIR, max_workers=settings.REPORT_WORKERS)
@@ -1,15 +1,16 @@
-import anthropic
 import base64
 from pathlib import Path
 from typing import Optional, Dict
-from app.core.config import settings
+from app.core.rate_limit import admission_controller
+from app.services.providers import AnalysisProvider, create_analysis_provider
 
 
 class RoomAnalyzer:
     """Analyzes room photos and provides renovation insights using Claude."""
     
-    def __init__(self):
-        self.client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+    def __init__(self, provider: Optional[AnalysisProvider] = None):
+        # Claude by default; AI_PROVIDER=fake swaps in the offline stand-in
+        self.provider = provider or create_analysis_provider()
     
     def _encode_image(self, image_path: str) -> tuple[str, str]:
         """Encode image to base64 and detect media type."""
@@ -156,18 +157,8 @@ Be specific, practical, and consider the budget if provided.""")
         
         # Call Claude API
         try:
-            message = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4000,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": content
-                    }
-                ]
-            )
-            
-            full_response = message.content[0].text
+            async with admission_controller.provider_call():
+                full_response = await self.provider.analyze(content, max_tokens=4000)
             
             # Parse the response into sections
             sections = self._parse_response(full_response)
@@ -0,0 +1,61 @@
+"""Storage for generated files, written from async byte streams."""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterable
+import asyncio
+import hashlib
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    """Where a stream was written, with its size and SHA-256."""
+    path: str
+    size: int
+    sha256: str
+
+
+class LocalStorage:
+    """
+    Write streams to the local filesystem (UPLOAD_DIR paths).
+
+    Chunks are hashed as they arrive and written on a worker thread, so
+    memory stays at one chunk and file I/O never blocks the event loop.
+    Data goes to ``<path>.part`` and is renamed into place once complete,
+    so readers never see a partial file.
+    """
+
+    async def save_stream(self, path: str, chunks: AsyncIterable[bytes]) -> StoredFile:
+        """
+        Write a byte stream to ``path``.
+
+        Raises:
+            Whatever the stream raises; the partial file is removed
+        """
+        target = Path(path)
+        tmp_path = target.with_name(target.name + ".part")
+        await asyncio.to_thread(target.parent.mkdir, parents=True, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        f = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            async for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                await asyncio.to_thread(f.write, chunk)
+            await asyncio.to_thread(f.close)
+            await asyncio.to_thread(os.replace, tmp_path, target)
+        except BaseException:
+            f.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        return StoredFile(path=str(target), size=size, sha256=digest.hexdigest())
+
+
+# Singleton instance
+storage = LocalStorage()
@@ -0,0 +1,252 @@
+"""Stripe webhook events: durable intake and ordered, asynchronous processing."""
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional
+import logging
+import random
+import uuid
+
+from sqlalchemy import select, exists, and_, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.core.user_cache import user_cache
+from app.core.workers import PollingWorker
+from app.db.session import SessionLocal
+from app.db.models.stripe_event import StripeEvent, StripeEventStatus
+from app.db.models.user import User, SubscriptionTier
+from app.services.email_service import email_service
+from app.services.payment_service import payment_service
+
+logger = logging.getLogger(__name__)
+
+AfterCommit = Callable[[], Awaitable[None]]
+
+
+def _customer_of(event: dict) -> Optional[str]:
+    """Stripe customer an event belongs to, used to order its processing."""
+    obj = event.get("data", {}).get("object", {})
+    if obj.get("object") == "customer":
+        return obj.get("id")
+    customer = obj.get("customer")
+    if isinstance(customer, dict):
+        return customer.get("id")
+    return customer
+
+
+class StripeEventService:
+    """
+    Record verified webhook events and apply them to users.
+
+    The webhook only calls ``record`` (one INSERT keyed on the Stripe event
+    ID, so redeliveries are no-ops) and returns; ``StripeEventWorker``
+    calls ``apply`` later.
+    """
+
+    async def record(self, db: AsyncSession, event: dict) -> bool:
+        """
+        Store a verified event and commit.
+
+        Returns:
+            False if the event had already been received
+        """
+        result = await db.execute(
+            insert(StripeEvent)
+            .values(
+                event_id=event["id"],
+                type=event["type"],
+                customer_id=_customer_of(event),
+                stripe_created=datetime.fromtimestamp(event["created"], tz=timezone.utc),
+                payload=event,
+                status=StripeEventStatus.PENDING,
+                attempts=0,
+            )
+            .on_conflict_do_nothing(index_elements=["event_id"])
+            .returning(StripeEvent.id)
+        )
+        created = result.scalar_one_or_none() is not None
+        await db.commit()
+
+        if created:
+            stripe_event_worker.wake()
+        else:
+            logger.info(f"Duplicate Stripe event {event['id']} ignored")
+        return created
+
+    async def apply(self, db: AsyncSession, event: dict, after_commit: List[AfterCommit]):
+        """
+        Apply one event's changes to the session (the caller commits).
+
+        Side effects that must only happen once the changes are committed
+        (emails) are appended to ``after_commit``.
+        """
+        handler = {
+            "checkout.session.completed": self._checkout_completed,
+            "customer.subscription.updated": self._subscription_updated,
+            "customer.subscription.deleted": self._subscription_deleted,
+        }.get(event["type"])
+
+        if handler:
+            await handler(db, event["data"]["object"], after_commit)
+
+    async def _checkout_completed(self, db: AsyncSession, session: dict, after_commit: List[AfterCommit]):
+        try:
+            user_id = uuid.UUID(session["metadata"]["user_id"])
+        except (KeyError, ValueError):
+            logger.warning(f"Checkout session {session.get('id')} has no valid user_id in its metadata")
+            return
+        tier = session["metadata"]["tier"]
+
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if not user:
+            return
+
+        user.subscription_tier = SubscriptionTier(tier)
+        user.stripe_customer_id = session["customer"]
+        user.stripe_subscription_id = session["subscription"]
+
+        # Reset monthly usage
+        user.analyses_used_this_month = 0
+        user.last_analysis_reset = datetime.utcnow()
+
+        email, name = user.email, "there"
+
+        async def notify():
+            user_cache.invalidate(user_id)
+            await email_service.send_subscription_confirmation_email(email, name, tier)
+
+        after_commit.append(notify)
+
+    async def _subscription_updated(self, db: AsyncSession, subscription: dict, after_commit: List[AfterCommit]):
+        subscription_id = subscription["id"]
+        payment_service.invalidate_subscription(subscription_id)
+
+        result = await db.execute(
+            select(User).where(User.stripe_subscription_id == subscription_id)
+        )
+        user = result.scalar_one_or_none()
+
+        if user and subscription["status"] in ["active", "trialing"]:
+            user.subscription_ends_at = datetime.fromtimestamp(
+                subscription["current_period_end"]
+            )
+            user_id = user.id
+
+            async def invalidate():
+                user_cache.invalidate(user_id)
+
+            after_commit.append(invalidate)
+
+    async def _subscription_deleted(self, db: AsyncSession, subscription: dict, after_commit: List[AfterCommit]):
+        subscription_id = subscription["id"]
+        payment_service.invalidate_subscription(subscription_id)
+
+        result = await db.execute(
+            select(User).where(User.stripe_subscription_id == subscription_id)
+        )
+        user = result.scalar_one_or_none()
+
+        if user:
+            user.subscription_tier = SubscriptionTier.FREE
+            user.stripe_subscription_id = None
+            user.subscription_ends_at = None
+            user_id = user.id
+
+            async def invalidate():
+                user_cache.invalidate(user_id)
+
+            after_commit.append(invalidate)
+
+
+class StripeEventWorker(PollingWorker):
+    """
+    Apply pending Stripe events, in order per customer.
+
+    An event is only claimed once no earlier event for the same customer
+    is still pending, so a failing event holds back that customer's later
+    events (but nobody else's) until it succeeds or is given up on after
+    STRIPE_EVENT_MAX_ATTEMPTS. Each event runs in its own savepoint.
+    """
+
+    name = "stripe-event-worker"
+
+    def __init__(self, batch_size: int, max_attempts: int, poll_interval: float):
+        super().__init__(poll_interval=poll_interval)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+
+    async def process_batch(self) -> int:
+        now = datetime.now(timezone.utc)
+        earlier = aliased(StripeEvent)
+        blocked = exists().where(
+            earlier.customer_id == StripeEvent.customer_id,
+            earlier.status == StripeEventStatus.PENDING,
+            or_(
+                earlier.stripe_created < StripeEvent.stripe_created,
+                and_(earlier.stripe_created == StripeEvent.stripe_created, earlier.id < StripeEvent.id),
+            ),
+        )
+
+        after_commit: List[AfterCommit] = []
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(StripeEvent)
+                .where(
+                    StripeEvent.status == StripeEventStatus.PENDING,
+                    StripeEvent.next_attempt_at <= now,
+                    ~blocked
+                )
+                .order_by(StripeEvent.stripe_created, StripeEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            events = result.scalars().all()
+            if not events:
+                return 0
+
+            for event in events:
+                event.attempts += 1
+                pending: List[AfterCommit] = []
+                try:
+                    async with db.begin_nested():
+                        await stripe_event_service.apply(db, event.payload, pending)
+                except Exception as e:
+                    self._failed(event, str(e), now)
+                    continue
+                event.status = StripeEventStatus.PROCESSED
+                event.processed_at = now
+                event.last_error = None
+                after_commit.extend(pending)
+
+            await db.commit()
+
+        for callback in after_commit:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"Stripe event follow-up failed: {e}")
+        return len(events)
+
+    def _failed(self, event: StripeEvent, error: str, now: datetime):
+        event.last_error = error
+        if event.attempts >= self.max_attempts:
+            event.status = StripeEventStatus.FAILED
+            logger.error(f"Stripe event {event.event_id} failed after {event.attempts} attempts: {error}")
+            return
+        delay = min(
+            settings.STRIPE_EVENT_RETRY_MAX_SECONDS,
+            settings.STRIPE_EVENT_RETRY_BASE_SECONDS * 2 ** (event.attempts - 1)
+        )
+        event.next_attempt_at = now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+        logger.warning(f"Stripe event {event.event_id} ({event.type}) failed, retrying in {delay:.0f}s: {error}")
+
+
+# Singleton instances
+stripe_event_service = StripeEventService()
+stripe_event_worker = StripeEventWorker(
+    batch_size=settings.STRIPE_EVENT_BATCH_SIZE,
+    max_attempts=settings.STRIPE_EVENT_MAX_ATTEMPTS,
+    poll_interval=settings.STRIPE_EVENT_POLL_INTERVAL_SECONDS,
+)
@@ -0,0 +1,134 @@
+"""
+End-to-end rendering latency: URL responses (second download hop) vs inline b64_json.
+
+Calls ImageGenerator.generate_rendering with save_path set, once with
+response_format "url" (generate, then fetch the image from the CDN) and
+once with "b64_json" (image decoded from the API response). Both modes go
+through the same OpenAI client, storage and hashing code.
+
+By default the provider is simulated by a local HTTP server: the
+generations endpoint waits --api-latency-ms, and in URL mode the CDN
+fetch waits a further --cdn-latency-ms before the body is sent (a
+connection setup plus time to first byte on the real CDN). With --live
+it calls the real API and bills OPENAI_API_KEY for every image.
+
+Usage:
+    python -m benchmarks.bench_image_response --renders 10
+    python -m benchmarks.bench_image_response --live --renders 3
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _start_fake_provider(image: bytes, api_latency: float, cdn_latency: float) -> ThreadingHTTPServer:
+    encoded = base64.b64encode(image).decode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body: bytes, content_type: str):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(api_latency)
+            if request.get("response_format") == "b64_json":
+                item = {"b64_json": encoded, "revised_prompt": request["prompt"]}
+            else:
+                host, port = self.server.server_address
+                item = {"url": f"http://{host}:{port}/cdn/image.png", "revised_prompt": request["prompt"]}
+            self._send(json.dumps({"created": int(time.time()), "data": [item]}).encode(), "application/json")
+
+        def do_GET(self):
+            time.sleep(cdn_latency)
+            self._send(image, "image/png")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def _run_mode(image_generator, response_format: str, renders: int, directory: str) -> dict:
+    image_generator.response_format = response_format
+    latencies = []
+    for i in range(renders):
+        start = time.perf_counter()
+        await image_generator.generate_rendering(
+            design_description="Bright Scandinavian kitchen with oak cabinets",
+            room_type="kitchen",
+            style="scandinavian",
+            image_size="1024x1024",
+            save_path=os.path.join(directory, f"{response_format}_{i}.png"),
+        )
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "renders": renders,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 1),
+            "p50": round(_percentile(latencies, 50) * 1000, 1),
+            "p95": round(_percentile(latencies, 95) * 1000, 1),
+        },
+    }
+
+
+async def main(args):
+    server = None
+    if not args.live:
+        image = os.urandom(args.image_kb * 1024)
+        server = _start_fake_provider(image, args.api_latency_ms / 1000, args.cdn_latency_ms / 1000)
+        host, port = server.server_address
+        # read by the OpenAI client when ImageGenerator is created
+        os.environ["OPENAI_BASE_URL"] = f"http://{host}:{port}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+    from app.core.http import http_client
+    from app.services.image_generator import image_generator
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            results = {
+                "provider": "live" if args.live else {
+                    "api_latency_ms": args.api_latency_ms,
+                    "cdn_latency_ms": args.cdn_latency_ms,
+                    "image_kb": args.image_kb,
+                },
+                "url": await _run_mode(image_generator, "url", args.renders, directory),
+                "b64_json": await _run_mode(image_generator, "b64_json", args.renders, directory),
+            }
+    finally:
+        await http_client.aclose()
+        if server:
+            server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--renders", type=int, default=10)
+    parser.add_argument("--live", action="store_true", help="Call the real OpenAI API (billed)")
+    parser.add_argument("--api-latency-ms", type=float, default=500)
+    parser.add_argument("--cdn-latency-ms", type=float, default=150)
+    parser.add_argument("--image-kb", type=int, default=3000, help="Simulated PNG size")
+    asyncio.run(main(parser.parse_args()))
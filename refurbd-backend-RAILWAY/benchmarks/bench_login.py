@@ -0,0 +1,95 @@
+"""
+Login latency under concurrent load: inline bcrypt vs the hashing pool.
+
+Fires bursts of concurrent password verifications the way the /auth/login
+handler does, once calling pwd_context.verify directly on the event loop
+(the old behaviour) and once through verify_and_update_password. A probe
+task ticking every 10ms measures event-loop lag, which is what every other
+request and WebSocket on the worker experiences during the burst.
+
+Usage:
+    python -m benchmarks.bench_login --concurrency 32 --bursts 5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.core.security import pwd_context, verify_and_update_password
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _probe_loop_lag(samples: list, stop: asyncio.Event, interval: float = 0.01):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def _login_inline(password: str, hashed: str):
+    # what the handler used to do: blocking bcrypt inside async def
+    return pwd_context.verify(password, hashed)
+
+
+async def _login_offloaded(password: str, hashed: str):
+    valid, _ = await verify_and_update_password(password, hashed)
+    return valid
+
+
+async def _run_mode(login, password: str, hashed: str, concurrency: int, bursts: int) -> dict:
+    latencies, lag = [], []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe_loop_lag(lag, stop))
+
+    async def timed_login():
+        start = time.perf_counter()
+        assert await login(password, hashed)
+        latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    for _ in range(bursts):
+        await asyncio.gather(*(timed_login() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+
+    return {
+        "logins": len(latencies),
+        "throughput_per_s": round(len(latencies) / elapsed, 2),
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50) * 1000, 1),
+            "p95": round(_percentile(latencies, 95) * 1000, 1),
+            "p99": round(_percentile(latencies, 99) * 1000, 1),
+        },
+        "loop_lag_ms": {
+            "mean": round(statistics.mean(lag) * 1000, 1) if lag else None,
+            "max": round(max(lag) * 1000, 1) if lag else None,
+        },
+    }
+
+
+async def main(args):
+    hashed = pwd_context.hash(args.password)
+    results = {
+        "bcrypt_rounds": pwd_context.to_dict()["bcrypt__rounds"],
+        "concurrency": args.concurrency,
+        "bursts": args.bursts,
+        "inline": await _run_mode(_login_inline, args.password, hashed, args.concurrency, args.bursts),
+        "offloaded": await _run_mode(_login_offloaded, args.password, hashed, args.concurrency, args.bursts),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--password", default="correct horse battery staple")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,131 @@
+"""
+Thumbnail cost for camera-sized JPEGs: previous path vs the reduced-decode fast path.
+
+Runs create_thumbnail over the same images with fast=False (the previous
+path: Pillow's thumbnail(), which drafts to 2x the target) and fast=True
+(DCT-scaled decode straight to the target, reduce, then LANCZOS). Each mode
+runs in a fresh process so its peak RSS isn't hidden by the other mode's
+allocations; the reported memory is the peak RSS growth over the
+process's baseline after imports.
+
+Without --images, synthetic 4000x3000 JPEGs (EXIF orientation 6, sRGB
+ICC profile) are generated in a temporary directory.
+
+Usage:
+    python -m benchmarks.bench_thumbnails --runs 5
+    python -m benchmarks.bench_thumbnails --images photos/*.jpg
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import statistics
+import tempfile
+import time
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _peak_rss_kb() -> int:
+    # VmHWM belongs to the current address space, so unlike ru_maxrss it
+    # isn't inherited from the (much larger) parent across fork/exec
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _make_images(directory: str, count: int, size: tuple) -> list:
+    import numpy as np
+    from PIL import Image, ImageCms
+
+    icc = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+    height, width = size[1], size[0]
+    y, x = np.mgrid[0:height, 0:width]
+    paths = []
+    for i in range(count):
+        # smooth gradients plus noise compress roughly like a photo
+        rng = np.random.default_rng(i)
+        pixels = np.stack([
+            (x * 255 // width + i * 40) % 256,
+            y * 255 // height,
+            (x + y) * 255 // (width + height),
+        ], axis=-1) + rng.integers(-4, 4, (height, width, 3))
+        img = Image.fromarray(pixels.clip(0, 255).astype("uint8"))
+        exif = img.getexif()
+        exif[0x0112] = 6  # rotated, as phones store portrait shots
+        path = os.path.join(directory, f"photo_{i}.jpg")
+        img.save(path, quality=92, exif=exif.tobytes(), icc_profile=icc)
+        paths.append(path)
+    return paths
+
+
+def _run_mode(fast: bool, paths: list, runs: int, size: tuple, workdir: str, results) -> None:
+    from app.services.image_processor import create_thumbnail
+
+    baseline_kb = _peak_rss_kb()
+    timings = []
+    for _ in range(runs):
+        for path in paths:
+            # work on a copy so the thumbnail lands in the scratch directory
+            src = os.path.join(workdir, os.path.basename(path))
+            if not os.path.exists(src):
+                shutil.copyfile(path, src)
+            start = time.perf_counter()
+            assert create_thumbnail(src, thumbnail_size=size, fast=fast)
+            timings.append(time.perf_counter() - start)
+    peak_kb = _peak_rss_kb()
+
+    results.put({
+        "thumbnails": len(timings),
+        "time_ms": {
+            "mean": round(statistics.mean(timings) * 1000, 1),
+            "p50": round(_percentile(timings, 50) * 1000, 1),
+            "p95": round(_percentile(timings, 95) * 1000, 1),
+        },
+        "peak_rss_growth_mb": round((peak_kb - baseline_kb) / 1024, 1),
+    })
+
+
+def _measure(fast: bool, paths: list, runs: int, size: tuple) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    with tempfile.TemporaryDirectory() as workdir:
+        process = ctx.Process(target=_run_mode, args=(fast, paths, runs, size, workdir, results))
+        process.start()
+        result = results.get()
+        process.join()
+    return result
+
+
+def main(args):
+    size = (args.size, args.size)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.images or _make_images(tmp, args.count, (4000, 3000))
+        results = {
+            "images": len(paths),
+            "runs": args.runs,
+            "thumbnail_size": list(size),
+            "previous": _measure(False, paths, args.runs, size),
+            "fast_path": _measure(True, paths, args.runs, size),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--images", nargs="*", help="JPEG files to use instead of synthetic ones")
+    parser.add_argument("--count", type=int, default=4, help="Synthetic images to generate")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--size", type=int, default=300, help="Thumbnail bounding box (px)")
+    main(parser.parse_args())
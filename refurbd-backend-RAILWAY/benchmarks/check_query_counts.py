@@ -0,0 +1,136 @@
+"""
+Check the query budgets of the loader options in app/db/loaders.py.
+
+Seeds a scratch SQLite database with a project of RENDERINGS renderings
+and an edit tree MAX_EDIT_DEPTH levels deep (EDITS_PER_RENDERING edits per
+rendering), then loads them the way the API does and walks every
+relationship the responses serialize:
+
+- project detail: the project and its renderings in 2 queries
+- rendering with edit_depth N: the rendering and N levels of edits in
+  1 + N queries, for every N up to MAX_EDIT_DEPTH
+
+The budgets don't depend on how many rows are loaded, so an N+1 shows up
+as extra statements. A relationship missing from the options can't lazy
+load under AsyncSession and is reported as a failure too.
+
+Usage:
+    python -m benchmarks.check_query_counts
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+
+RENDERINGS = 10
+EDITS_PER_RENDERING = 2
+OWNER_ID = uuid.uuid4()
+
+
+async def _seed(engine, SessionLocal) -> tuple:
+    from app.db.loaders import MAX_EDIT_DEPTH
+    from app.db.models import Base, Project, Rendering
+    from app.db.models.project import RoomType
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with SessionLocal() as db:
+        project = Project(user_id=OWNER_ID, name="Query budget", room_type=list(RoomType)[0])
+        db.add(project)
+        await db.flush()
+
+        def rendering(parent=None):
+            return Rendering(
+                user_id=OWNER_ID,
+                project_id=project.id,
+                parent_rendering_id=parent.id if parent else None,
+                image_path="missing.png",
+                prompt_used="check",
+                image_size="1024x1024",
+            )
+
+        roots = [rendering() for _ in range(RENDERINGS)]
+        db.add_all(roots)
+        await db.flush()
+        level = roots[:1]
+        for _ in range(MAX_EDIT_DEPTH):
+            edits = [rendering(parent) for parent in level for _ in range(EDITS_PER_RENDERING)]
+            db.add_all(edits)
+            await db.flush()
+            level = edits
+        await db.commit()
+        return project.id, roots[0].id
+
+
+def _walk_edits(rendering, depth: int) -> int:
+    """Touch ``depth`` levels of edits like the rendering response does. Returns the node count."""
+    if depth <= 0:
+        return 1
+    return 1 + sum(_walk_edits(edit, depth - 1) for edit in rendering.edits)
+
+
+async def _check(engine, SessionLocal, project_id: int, rendering_id: int) -> list:
+    from sqlalchemy import select
+    from app.db.loaders import MAX_EDIT_DEPTH, edit_tree_options, project_detail_options
+    from app.db.models import Project, Rendering
+    from app.db.query_counter import assert_max_queries
+
+    failures = []
+
+    async def budget(name: str, limit: int, load):
+        try:
+            with assert_max_queries(limit, engine) as counter:
+                async with SessionLocal() as db:
+                    loaded = await load(db)
+            print(f"{name:28} {counter.count} queries (budget {limit}), {loaded} rows")
+        except AssertionError as e:
+            failures.append(f"{name}: {e}")
+        except Exception as e:
+            # typically MissingGreenlet: a relationship the options didn't load
+            failures.append(f"{name}: {type(e).__name__}: {str(e).splitlines()[0]}")
+
+    async def project_detail(db):
+        project = (await db.execute(
+            select(Project).where(Project.id == project_id).options(*project_detail_options())
+        )).scalar_one()
+        return 1 + len(project.renderings)
+
+    await budget("project detail", 2, project_detail)
+
+    for depth in range(MAX_EDIT_DEPTH + 1):
+        async def rendering_tree(db, depth=depth):
+            rendering = (await db.execute(
+                select(Rendering).where(Rendering.id == rendering_id).options(*edit_tree_options(depth))
+            )).scalar_one()
+            return _walk_edits(rendering, depth)
+
+        await budget(f"rendering, edit_depth={depth}", 1 + depth, rendering_tree)
+
+    return failures
+
+
+async def _main() -> list:
+    from app.db.session import engine, SessionLocal
+
+    try:
+        project_id, rendering_id = await _seed(engine, SessionLocal)
+        return await _check(engine, SessionLocal, project_id, rendering_id)
+    finally:
+        await engine.dispose()
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        # before anything imports app.db.session: the engine is created at import
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tmp, 'queries.db')}"
+        failures = asyncio.run(_main())
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Check that the fast thumbnail path handles every common image mode.
+
+For each mode, a 2000x1500 image is thumbnailed with fast=True and
+fast=False. The fast thumbnail must exist and fit the box. Its mean colour
+must match the previous path's to within a few levels, which catches
+averaged palette indices. The previous path fails on 16-bit images, so
+those are only checked for size.
+
+Usage:
+    python -m benchmarks.check_thumbnail_modes
+"""
+import os
+import sys
+import tempfile
+
+from PIL import Image, ImageStat
+
+from app.services.image_processor import create_thumbnail
+
+SIZE = (2000, 1500)
+BOX = (300, 300)
+MAX_MEAN_DIFFERENCE = 6.0
+
+
+def _source(mode: str) -> Image.Image:
+    base = Image.merge("RGB", [
+        Image.linear_gradient("L").resize(SIZE),
+        Image.radial_gradient("L").resize(SIZE),
+        Image.linear_gradient("L").rotate(90).resize(SIZE),
+    ])
+    if mode == "P":
+        return base.quantize(64)
+    if mode == "P+transparency":
+        img = base.quantize(64)
+        img.info["transparency"] = 0
+        return img
+    if mode == "1":
+        return base.convert("L").convert("1")
+    if mode == "I;16":
+        return base.convert("L").point(lambda v: v * 256).convert("I").convert("I;16")
+    return base.convert(mode)
+
+
+def _mean(path: str) -> list:
+    img = Image.open(path)
+    img = img.convert("RGB") if img.mode not in ("I", "I;16") else img.point(lambda v: v * (1 / 256)).convert("RGB")
+    return ImageStat.Stat(img).mean
+
+
+def main() -> int:
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ["RGB", "RGBA", "L", "LA", "CMYK", "P", "P+transparency", "1", "I;16"]:
+            img = _source(mode)
+            ext = ".jpg" if mode in ("RGB", "L", "CMYK") else ".png"
+            before = len(failures)
+            results = {}
+            for fast in (True, False):
+                path = os.path.join(tmp, f"{mode.replace(';', '_').replace('+', '_')}_{fast}{ext}")
+                img.save(path)
+                results[fast] = create_thumbnail(path, thumbnail_size=BOX, fast=fast)
+
+            if not results[True]:
+                failures.append(f"{mode}: no fast thumbnail")
+                continue
+            width, height = Image.open(results[True]).size
+            if width > BOX[0] or height > BOX[1]:
+                failures.append(f"{mode}: {width}x{height} exceeds {BOX}")
+            if results[False]:
+                difference = max(abs(a - b) for a, b in zip(_mean(results[True]), _mean(results[False])))
+                if difference > MAX_MEAN_DIFFERENCE:
+                    failures.append(f"{mode}: mean colour differs by {difference:.1f} from the previous path")
+            compared = "" if results[False] else " (previous path can't read it; not compared)"
+            print(f"{mode:16} {'ok' if len(failures) == before else 'FAILED'}{compared}")
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())